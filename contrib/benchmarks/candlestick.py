@@ -0,0 +1,106 @@
+"""
+Throughput and memory benchmark for the Candlestick example manipulation plugin.
+
+Writes a synthetic many-to-one dataset with thousands of columns to a CSV file and
+runs the Candlestick trend extraction on it twice: once with the previous implementation
+(the whole CSV in memory and a Python loop over every feature and interval, kept below as
+a reference) and once with the chunked reshape-and-reduce implementation of
+examples/plugins/manips/many_to_one_candlestick.py. Reports wall time, rows per second,
+and the peak traced memory of both, and checks that the two outputs are identical.
+
+### Usage:
+    python contrib/benchmarks/candlestick.py --rows 4000 --columns 2000 --time-interval 20
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Allow importing jespipe when launched from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+
+def _load_plugin() -> object:
+    """Import the Candlestick example plugin without running its __main__ block."""
+    plugin_file = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "examples", "plugins", "manips", "many_to_one_candlestick.py"))
+    spec = importlib.util.spec_from_file_location("many_to_one_candlestick", plugin_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _loop_candlestick(dataset: str, time_interval: int) -> tuple:
+    """Previous implementation of CandlestickManip._preproc_candlestick, kept as the baseline."""
+    import numpy as np
+    import pandas as pd
+
+    dataset = pd.read_csv(dataset, header=None)
+    features = np.array(dataset)[:, :-1]
+    labels = np.array(dataset)[:, -1]
+
+    new_features = np.zeros((int(features.shape[0] / time_interval), int(features.shape[1] * 4)))
+    new_labels = np.zeros((int(labels.shape[0] / time_interval),))
+    for feature_ind in range(features.shape[1]):
+        new_feature_ind = feature_ind * 4
+        new_row_ind = 0
+        for row_ind in range(0, features.shape[0] - time_interval, time_interval):
+            new_features[new_row_ind, new_feature_ind] = features[row_ind, feature_ind]
+            end_ind = int(row_ind + (time_interval-1))
+            new_features[new_row_ind, new_feature_ind + 1] = features[end_ind, feature_ind]
+            new_features[new_row_ind, new_feature_ind + 2] = np.max(features[row_ind:end_ind, feature_ind])
+            new_features[new_row_ind, new_feature_ind + 3] = np.min(features[row_ind:end_ind, feature_ind])
+            new_labels[new_row_ind] = labels[row_ind]
+            new_row_ind += 1
+
+    return new_features, new_labels
+
+
+def _run(args: argparse.Namespace) -> None:
+    """Write the synthetic dataset and time both implementations."""
+    import numpy as np
+    import pandas as pd
+
+    tmp_path = tempfile.mkdtemp()
+    try:
+        # A random walk per column looks more like a price series than uniform noise
+        rng = np.random.default_rng(args.seed)
+        data = np.cumsum(rng.standard_normal((args.rows, args.columns)), axis=0)
+        dataset = tmp_path + "/synthetic.csv"
+        pd.DataFrame(data).to_csv(dataset, header=False, index=False)
+        del data
+
+        plugin = _load_plugin()
+        manip = plugin.CandlestickManip({"dataset": dataset, "manip_tag": "benchmark", "manip_params": {"time_interval": args.time_interval},
+                                         "save_path": tmp_path, "tmp_path": tmp_path})
+
+        results = dict()
+        print("implementation,rows,columns,wall_s,rows_per_s,peak_traced_mib")
+        for name, preproc in [("loop", lambda: _loop_candlestick(dataset, args.time_interval)), ("vectorised", manip._preproc_candlestick)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            results[name] = preproc()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+            print("{},{},{},{:.3f},{:.1f},{:.1f}".format(name, args.rows, args.columns, elapsed, args.rows / elapsed, peak / 2**20))
+            sys.stdout.flush()
+
+        identical = all([np.array_equal(a, b) for a, b in zip(results["loop"], results["vectorised"])])
+        print("identical_output,{}".format(identical))
+
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Candlestick manipulation throughput and memory benchmark.")
+    parser.add_argument("--rows", type=int, default=4000, help="Rows of the synthetic dataset (default: 4000).")
+    parser.add_argument("--columns", type=int, default=2000, help="Columns of the synthetic dataset, the label included (default: 2000).")
+    parser.add_argument("--time-interval", type=int, default=20, help="Rows aggregated into one candle (default: 20).")
+    parser.add_argument("--seed", type=int, default=2020, help="Seed for the synthetic data (default: 2020).")
+    args = parser.parse_args()
+
+    _run(args)
@@ -0,0 +1,154 @@
+"""
+Optimization step throughput benchmark for the C&W L2 example attack plugin.
+
+Trains a small LSTM regressor on synthetic windows and attacks it twice with the same
+parameters: once with the previous eager implementation (model.predict after every step
+and per-sample Python loops, kept below as a reference) and once with the tf.function
+compiled implementation of examples/plugins/attacks/carlinil2.py. Reports optimization
+iterations per second for both. Pin the run to the CPU with CUDA_VISIBLE_DEVICES="".
+
+### Usage:
+    CUDA_VISIBLE_DEVICES="" python contrib/benchmarks/cw_l2.py --samples 256 --max-iter 50
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+# Allow importing jespipe when launched from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+
+def _load_plugin() -> object:
+    """Import the C&W L2 example plugin without running its __main__ block."""
+    plugin_file = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "examples", "plugins", "attacks", "carlinil2.py"))
+
+    # The plugin imports its surrogate helpers from its own directory
+    sys.path.insert(0, os.path.dirname(plugin_file))
+    spec = importlib.util.spec_from_file_location("carlinil2", plugin_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _eager_batch(attack: object, x, pred):
+    """Previous eager implementation of CarliniL2._generate_batch, kept as the baseline."""
+    import numpy as np
+    import tensorflow as tf
+
+    c_current = np.ones(x.shape[0]) * attack.initial_const
+    c_best = np.zeros(x.shape[0])
+    best_l2dist = np.inf * np.ones(x.shape[0])
+    best_x_adv = x.copy()
+
+    mean = pred.mean()
+    above = (mean <= attack.mean)
+    if above:
+        if mean + attack.min_change > 0.9:
+            above = False
+    else:
+        if mean - attack.min_change < 0.1:
+            above = True
+
+    for bss in range(attack.binary_search_steps):
+        w = tf.Variable(np.zeros(x.shape), trainable=True, dtype=tf.float32)
+        for i_iter in range(attack.max_iter):
+            with tf.GradientTape() as tape:
+                tape.watch(w)
+                x_adv = (tf.tanh(w) + 1.0) / 2.0
+                pred_adv = attack.model(x_adv)
+                square_diff = tf.square(tf.subtract(x, x_adv))
+                l2dist = tf.reduce_sum(tf.reduce_sum(square_diff, axis=2), keepdims=(True))
+                if above:
+                    f_sum = tf.add(tf.add(pred, attack.min_change), tf.negative(pred_adv))
+                else:
+                    f_sum = tf.add(tf.add(tf.negative(pred), attack.min_change), pred_adv)
+                c_loss = tf.multiply(c_current, tf.maximum(f_sum, tf.zeros(x_adv.shape[0])))
+                loss = tf.add(l2dist, c_loss)
+
+            gradients = tape.gradient(loss, w)
+            w = tf.subtract(w, tf.multiply(attack.learning_rate, gradients))
+
+            x_adv = x_adv.numpy()
+            pred_adv = attack.model.predict(x_adv)
+            l2dist = np.sum(np.square(x - x_adv).reshape(x.shape[0], -1), axis=1)
+            for e in range(x.shape[0]):
+                if above:
+                    if pred_adv[e] >= pred[e] + attack.min_change and l2dist[e] <= best_l2dist[e]:
+                        best_x_adv[e] = x_adv[e]; best_l2dist[e] = l2dist[e]
+                else:
+                    if pred_adv[e] <= pred[e] - attack.min_change and l2dist[e] <= best_l2dist[e]:
+                        best_x_adv[e] = x_adv[e]; best_l2dist[e] = l2dist[e]
+
+        pred_adv = attack.model.predict(x_adv)
+        for e in range(x.shape[0]):
+            reached = pred_adv[e] >= pred[e] + attack.min_change if above else pred_adv[e] <= pred[e] - attack.min_change
+            if reached:
+                c_best[e] = c_current[e]; c_current[e] /= 2
+            elif c_best[e] == 0:
+                c_current[e] *= 10
+            else:
+                c_current[e] = (c_current[e] + c_best[e]) / 2
+
+    return best_x_adv
+
+
+def _run(args: argparse.Namespace) -> None:
+    """Build the synthetic model and time both implementations."""
+    import numpy as np
+    import tensorflow as tf
+
+    rng = np.random.default_rng(args.seed); tf.random.set_seed(args.seed)
+    x = rng.random((args.samples, args.timesteps, args.features)).astype(np.float32)
+    y = x[:, -1, 0:1] + 0.1 * rng.standard_normal((args.samples, 1)).astype(np.float32)
+
+    model = tf.keras.Sequential([tf.keras.layers.LSTM(args.units, input_shape=(args.timesteps, args.features)),
+                                 tf.keras.layers.Dense(1)])
+    model.compile(optimizer="adam", loss="mse")
+    model.fit(x, y, epochs=1, batch_size=args.batch_size, verbose=0)
+
+    model_path = tempfile.mkdtemp() + "/model.h5"
+    model.save(model_path)
+
+    plugin = _load_plugin()
+    params = {"change": args.change, "learning_rate": args.learning_rate, "max_iter": args.max_iter,
+              "binary_search_steps": args.binary_search_steps, "batch_size": args.batch_size, "initial_const": args.initial_const,
+              "sequence_length": args.timesteps, "verbose": False}
+    attack = plugin.CarliniL2(model_path, x, params)
+    pred = attack.model.predict(x); attack.mean = pred.mean(); attack.min_change = args.change
+
+    batches = [(x[i:i + args.batch_size], pred[i:i + args.batch_size]) for i in range(0, args.samples, args.batch_size)]
+    iterations = len(batches) * args.binary_search_steps * args.max_iter
+
+    print("implementation,iterations,wall_s,iterations_per_s")
+    for name, generate in [("eager", lambda xb, pb: _eager_batch(attack, xb, pb)), ("compiled", attack._generate_batch)]:
+        # Warm up so tracing and the first model call are not timed
+        generate(*batches[0])
+
+        start = time.perf_counter()
+        for xb, pb in batches:
+            generate(xb, pb)
+
+        elapsed = time.perf_counter() - start
+        print("{},{},{:.3f},{:.1f}".format(name, iterations, elapsed, iterations / elapsed))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="C&W L2 optimization step throughput benchmark.")
+    parser.add_argument("--samples", type=int, default=256, help="Number of synthetic windows to attack (default: 256).")
+    parser.add_argument("--timesteps", type=int, default=10, help="Length of every window (default: 10).")
+    parser.add_argument("--features", type=int, default=5, help="Features per timestep (default: 5).")
+    parser.add_argument("--units", type=int, default=32, help="LSTM units of the synthetic model (default: 32).")
+    parser.add_argument("--batch-size", type=int, default=64, help="Attack batch size (default: 64).")
+    parser.add_argument("--max-iter", type=int, default=50, help="Optimization steps per binary search step (default: 50).")
+    parser.add_argument("--binary-search-steps", type=int, default=2, help="Binary search steps (default: 2).")
+    parser.add_argument("--learning-rate", type=float, default=0.001, help="Learning rate of the attack (default: 0.001).")
+    parser.add_argument("--initial-const", type=float, default=1.0, help="Initial constant c (default: 1.0).")
+    parser.add_argument("--change", type=float, default=0.05, help="Minimum change budget (default: 0.05).")
+    parser.add_argument("--seed", type=int, default=2020, help="Seed for the synthetic data and model (default: 2020).")
+    args = parser.parse_args()
+
+    _run(args)
@@ -0,0 +1,107 @@
+"""
+Stage throughput scaling benchmark for the Jespipe worker runtime.
+
+Serves a synthetic stage of heterogeneous tasks through scattershot.dispatch/execute,
+the same path Worker.run uses, and reports tasks per second for the MPI.COMM_WORLD size
+it was launched with. Task durations are drawn from a long-tailed distribution so a few
+tasks behave like a slow LSTM training run or C&W attack.
+
+### Usage:
+Run a single COMM_WORLD size (prints one CSV row):
+    mpirun -np 8 python contrib/benchmarks/scaling.py --tasks 256
+
+Sweep from 2 ranks up to N ranks (launches mpirun for every size):
+    python contrib/benchmarks/scaling.py --sweep 64 --tasks 512
+
+Run 4 plugin slots per worker rank:
+    mpirun -np 4 python contrib/benchmarks/scaling.py --tasks 256 --slots 4 --subprocess
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+
+# Allow importing utils when launched from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+
+def _durations(tasks: int, mean: float, seed: int) -> list:
+    """Generate long-tailed synthetic task durations in seconds."""
+    rng = random.Random(seed)
+    return [min(rng.expovariate(1.0 / mean), 20 * mean) for i in range(tasks)]
+
+
+def _run_stage(args: argparse.Namespace) -> None:
+    """Run one synthetic stage on the current MPI.COMM_WORLD."""
+    from mpi4py import MPI
+
+    from utils.workerops import scattershot as sst
+
+    comm = MPI.COMM_WORLD
+    size = comm.Get_size(); rank = comm.Get_rank()
+    if size < 2:
+        raise RuntimeError("Scaling benchmark needs at least 2 ranks (1 manager, 1 worker).")
+
+    comm.Barrier()
+    if rank == 0:
+        directives = _durations(args.tasks, args.mean, args.seed)
+        start = time.perf_counter()
+        sst.dispatch(comm, size, directives, chunk_size=args.chunk_size, disable=True)
+        elapsed = time.perf_counter() - start
+
+        # Ideal is total work spread evenly across every slot of every worker
+        ideal = sum(directives) / ((size - 1) * args.slots)
+        print("{},{},{},{:.3f},{:.3f},{:.2f},{:.1f}".format(
+            size, size - 1, args.tasks, elapsed, ideal, args.tasks / elapsed, 100 * ideal / elapsed))
+        sys.stdout.flush()
+
+    else:
+        def run_task(duration: float) -> None:
+            if args.subprocess:
+                # Include plugin process launch overhead like the real worker runtime
+                subprocess.run([sys.executable, "-c", "import time; time.sleep({})".format(duration)])
+
+            else:
+                time.sleep(duration)
+
+        sst.execute(comm, rank, run_task, slots=args.slots, poll=0.01)
+
+
+def _sweep(args: argparse.Namespace) -> None:
+    """Launch the benchmark with mpirun for COMM_WORLD sizes 2, 4, 8, ... up to --sweep."""
+    sizes = list(); n = 2
+    while n < args.sweep:
+        sizes.append(n); n *= 2
+    sizes.append(args.sweep)
+
+    print("ranks,workers,tasks,wall_s,ideal_s,tasks_per_s,efficiency_pct")
+    sys.stdout.flush()
+    for n in sizes:
+        cmd = [args.mpirun, "-np", str(n), sys.executable, os.path.abspath(__file__),
+                "--tasks", str(args.tasks), "--mean", str(args.mean), "--seed", str(args.seed),
+                "--chunk-size", str(args.chunk_size), "--slots", str(args.slots)]
+        if args.subprocess:
+            cmd.append("--subprocess")
+
+        subprocess.run(cmd, check=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jespipe stage throughput scaling benchmark.")
+    parser.add_argument("--tasks", type=int, default=256, help="Number of synthetic tasks in the stage (default: 256).")
+    parser.add_argument("--mean", type=float, default=0.05, help="Mean synthetic task duration in seconds (default: 0.05).")
+    parser.add_argument("--seed", type=int, default=2020, help="Seed for the synthetic task durations (default: 2020).")
+    parser.add_argument("--chunk-size", type=int, default=1, help="Directives handed out per request (default: 1).")
+    parser.add_argument("--slots", type=int, default=1, help="Concurrent execution slots per worker rank (default: 1).")
+    parser.add_argument("--subprocess", action="store_true", default=False, help="Run every task as a Python subprocess.")
+    parser.add_argument("--sweep", type=int, default=None, help="Sweep COMM_WORLD sizes from 2 up to this many ranks.")
+    parser.add_argument("--mpirun", type=str, default="mpirun", help="MPI launcher to use for --sweep (default: mpirun).")
+    args = parser.parse_args()
+
+    if args.sweep is not None:
+        _sweep(args)
+
+    else:
+        _run_stage(args)
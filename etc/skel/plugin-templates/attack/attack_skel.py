@@ -20,6 +20,8 @@ class Attack(Attack):
 
         #### Notes:
         - You can add internal methods to help perform your attack.
+        - Long attacks can subclass jespipe.plugin.attack.attack.StreamingAttack instead and yield their adversarial
+          examples batch by batch. Saving them with save.adver_stream bounds memory and resumes a killed attack.
         - You can modify your attack to not use a model. (File path to trained model is still sent by Jespipe)
         """
         pass
@@ -47,7 +49,11 @@ if __name__ == "__main__":
         - `name`: Name of the attack being used.
         - `model_path`: File path to model being attacked.
         - `model_test_features`: Test features to use for adversarial example generation.
-        - `attack_params`: Parameters to use for the attack.
+        - `attack_params`: Parameters to use for the attack. The change budget is stored under `change`. If the plugin
+          sets `JESPIPE_MULTI_BUDGET = True` at module level, every change budget is passed at once as the list `changes`
+          and one adversarial example should be saved per budget. If the plugin sets `JESPIPE_SHARDABLE = True` at module
+          level, large attacks may be split across workers: `attack_params` then holds `shard` = [index, count] and only the
+          rows of that shard should be attacked and saved. Jespipe concatenates the shards back in shard order.
         - `save_path`: Where to save the adversarial example.
         """
         pass
@@ -159,6 +159,12 @@ if __name__ == "__main__":
         - `model_labels`: Test labels to use for evaluation of model's adversarial robustness.
         - `log_path`: The file path to use for saving your evaluation data. (Important to your adversarial analysis).
         - `model_path`: Path to your saved model file in HDF5 format. (Loaded back into memory during the evaluation).
+        - `merge_log`: True if the statistics should be added to those saved for the attack by an earlier call.
+
+        Attacks with an `adaptive_tolerance` parameter search the change budgets instead of sweeping them. They need
+        this block to hand back a dictionary mapping each evaluated change budget (the name of its adversarial example
+        file without .pkl) to a dictionary of metrics, e.g. with `jespipe.plugin.registry` by returning it from the handler.
+        Every round of the search only passes its new change budgets and sets `merge_log` after the first round.
         """
         pass
 
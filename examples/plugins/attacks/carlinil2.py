@@ -1,13 +1,25 @@
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+import jespipe.plugin.registry as registry
 import jespipe.plugin.save as save
 import numpy as np
+import surrogate
 import tensorflow as tf
-from jespipe.plugin.attack.attack import Attack
-from jespipe.plugin.start import start
+from jespipe.plugin.attack import autotune
+from jespipe.plugin.attack.attack import StreamingAttack
 from tensorflow.keras.models import load_model
 from tqdm import trange
 
+# Every change budget of an attack is generated in one call
+JESPIPE_MULTI_BUDGET = True
+
+# Large attacks can be split into shards of whole batches across workers
+JESPIPE_SHARDABLE = True
+
 
-class CarliniL2(Attack):
+class CarliniL2(StreamingAttack):
     """
     This is a modified version of the L_2 optimized attack of Carlini and Wagner (2016).
     It has been modified to fit time series regression problems.
@@ -23,72 +35,184 @@ class CarliniL2(Attack):
 
         ### Methods:
         - public
-          - attack (abstract): Launch L_2 attack on the given time series data.
+          - budgets (abstract): List the change budgets generated by the attack.
+          - shape (abstract): Get the shape of the adversarial examples of one change budget.
+          - rows: Get the first row and the row after the last row of the shard.
+          - stream (abstract): Launch L_2 attack on the given time series data batch by batch at every change budget.
         - private
-          - _generate: Internal method to perform the L_2 attack on the given time series data.
-          - _generate_batch: Internal method to generate batched adversarial samples and return them in an array.
+          - _tune: Internal method to tune the batch size on the first rows of the test features.
+          - _batches: Internal method to find the batches of the shard.
+          - _generate: Internal method to perform the L_2 attack on the given time series data batch by batch at every change budget.
+          - _generate_batch: Internal method to generate batched adversarial samples for the current change budget and return them in an array.
+          - _optimize: Internal method to run the optimization steps of one binary search step.
         """
-        self.model = load_model(model)
+        self.victim = load_model(model)
+        self.model = self.victim
         self.features = features
-        self.min_change = parameters["change"]
+        self.changes = parameters["changes"] if "changes" in parameters else [parameters["change"]]
+        self.shard = parameters.get("shard", [0, 1])
         self.learning_rate = parameters["learning_rate"]
         self.max_iter = parameters["max_iter"]
         self.binary_search_steps = parameters["binary_search_steps"]
+        self.optimizer = parameters.get("optimizer", "adam")
+        self.warm_start = parameters.get("warm_start", False)
+        self.warm_max_iter = parameters.get("warm_max_iter", self.max_iter)
+        self.warm_binary_search_steps = parameters.get("warm_binary_search_steps", self.binary_search_steps)
         self.batch_size = parameters["batch_size"]
         self.initial_const = parameters["initial_const"]
         self.sequence_length = parameters["sequence_length"]
         self.verbose = parameters["verbose"]
+        self.use_surrogate = parameters.get("surrogate", False)
+        self.distill_seconds = 0.0
+
+        # Run the optimization against a smaller surrogate distilled from the victim
+        if self.use_surrogate:
+            self.model, self.distill_seconds = surrogate.distill(self.victim, surrogate.training_features(model, features), parameters)
+
+        # Shards are made of whole batches, so only attacks without shards tune their batch size
+        self.autotune_max_batch_size = parameters.get("autotune_max_batch_size", 256)
+        self.autotune_max_iter = parameters.get("autotune_max_iter", 10)
+        if parameters.get("autotune_batch_size", False) and self.shard[1] == 1:
+            self.batch_size = self._tune(model)
+
+    def budgets(self) -> List[float]:
+        """
+        List the change budgets generated by the attack.
+
+        ### Returns:
+        :return: List of change budgets.
+        """
+        return list(self.changes)
+
+    def shape(self) -> Tuple[int, ...]:
+        """
+        Get the shape of the adversarial examples of one change budget.
+
+        ### Returns:
+        :return: Shape of the adversarial examples of the shard.
+        """
+        first, last = self.rows()
+        return (last - first,) + tuple(self.features.shape[1:])
+
+    def rows(self) -> Tuple[int, int]:
+        """
+        Get the first row and the row after the last row of the shard.
+
+        ### Returns:
+        :return: (first, last) rows of the test features attacked by the shard.
+        """
+        first, last = self._batches(self.features.shape[0])
+        return first * self.batch_size, min(last * self.batch_size, self.features.shape[0])
+
+    def stream(self, start: int = 0) -> Iterator[Dict[float, np.ndarray]]:
+        """
+        Launch L_2 attack on the given time series data batch by batch at every change budget.
+
+        ### Parameters:
+        :param start: First row of the shard to generate (default: 0).
+
+        ### Returns:
+        :return: Iterator over dictionaries mapping every change budget to the adversarial examples of the next batch.
+        """
+        return self._generate(self.features, start=start)
 
-    def attack(self) -> np.ndarray:
+    def _tune(self, model: str) -> int:
         """
-        Launch L_2 attack on the given time series data.
+        Internal method to tune the batch size on the first rows of the test features. Every probe runs
+        autotune_max_iter optimization steps of the smallest change budget under the RSS limit of the slot.
+        The best batch size is recorded next to the model, so later attacks on the model skip the probe.
+
+        ### Parameters:
+        :param model: System file path to trained regressor model.
 
         ### Returns:
-        :return: An array holding the adversarial examples.
+        :return: Best batch size.
         """
-        return self._generate(self.features)
+        rows = min(self.autotune_max_batch_size, self.features.shape[0])
+        candidates = sorted(set([2 ** i for i in range(3, 16) if 2 ** i <= rows] + [min(self.batch_size, rows)]))
+        x = np.asarray(self.features[:rows]); pred = self.model.predict(x)
+        self.mean = pred.mean(); self.min_change = min(self.changes)
+
+        # The best batch size depends on the optimized model, the sample shape, and the memory available
+        key = json.dumps({"attack": type(self).__name__, "model_params": int(self.model.count_params()), "shape": list(x.shape[1:]),
+                          "candidates": candidates, "max_iter": self.autotune_max_iter, "rss_limit": autotune.slot_rss_limit()}, sort_keys=True)
+        max_iter = self.max_iter; self.max_iter = self.autotune_max_iter
+        binary_search_steps = self.binary_search_steps; self.binary_search_steps = 1
+        try:
+            return autotune.batch_size(lambda size: self._generate_batch(x[:size], pred[:size]), candidates,
+                                       os.path.dirname(model) + "/autotune-{}.json".format(type(self).__name__), key)
+
+        finally:
+            self.max_iter = max_iter
+            self.binary_search_steps = binary_search_steps
 
-    def _generate(self, x: np.ndarray, **kwargs) -> np.ndarray:
+    def _batches(self, rows: int) -> Tuple[int, int]:
         """
-        Internal method to perform the L_2 attack on the given time series data.
+        Internal method to find the batches of the shard. Shards are made of whole batches.
+
+        ### Parameters:
+        :param rows: Number of rows of the test features.
+
+        ### Returns:
+        :return: Index of the first batch of the shard and index of the batch after its last batch.
+        """
+        nb_batches = int(np.ceil(rows / float(self.batch_size)))
+        return nb_batches * self.shard[0] // self.shard[1], nb_batches * (self.shard[0] + 1) // self.shard[1]
+
+    def _generate(self, x: np.ndarray, **kwargs) -> Iterator[Dict[float, np.ndarray]]:
+        """
+        Internal method to perform the L_2 attack on the given time series data batch by batch at every change budget.
+        The benign predictions are computed once and shared by every budget. With warm_start, the budgets
+        of a batch run in ascending order and each one starts from the adversarial examples of the previous budget.
+        Only the batches of the shard are attacked, so shards produce the same examples as a single run.
 
         ### Parameters:
         :param x: An array with the original inputs to be attacked.
+        - kwargs
+          - start: First row of the shard to generate (default: 0).
 
         ### Returns:
-        :return: An array holding the adversarial examples.
+        :return: Iterator over dictionaries mapping every change budget to the adversarial examples of the next batch.
         """
+        start = kwargs.get("start", 0)
         pred = self.model.predict(x)
         self.mean = pred.mean()
-        
-        # Generate adversarial examples
-        x_adv = np.zeros(x.shape)
-        nb_batches = int(np.ceil(x.shape[0] / float(self.batch_size)))
-        for i in trange(nb_batches, desc="C&W L_2", disable = not self.verbose):
+
+        # Generate adversarial examples for every budget one batch at a time
+        first, last = self._batches(x.shape[0])
+        for i in trange(first + start // self.batch_size, last, desc="C&W L_2", disable = not self.verbose):
             index = i * self.batch_size
-            x_adv[index:index+self.batch_size] = (self._generate_batch(x[index:index+self.batch_size]))
-        print(x_adv.shape)
-        return x_adv
+            warm = dict() if self.warm_start else None
+            batch = dict()
+            for change in (sorted(self.changes) if self.warm_start else self.changes):
+                self.min_change = change
+                batch[change] = self._generate_batch(x[index:index+self.batch_size], pred[index:index+self.batch_size], warm=warm)
+
+            yield batch
     
-    def _generate_batch(self, x: np.ndarray, **kwargs) -> np.ndarray:
+    def _generate_batch(self, x: np.ndarray, pred: np.ndarray, **kwargs) -> np.ndarray:
         """
-        Internal method to generate batched adversarial samples and return them in an array.
+        Internal method to generate batched adversarial samples for the current change budget and return them in an array.
 
         ### Parameters:
         :param x: An array with the batched original inputs to be attacked.
+        :param pred: An array with the benign predictions of the batched original inputs.
+        - kwargs
+          - warm: Dictionary holding the warm start of the batch. Filled with the solution of the current
+          budget to seed the next budget (default: None).
 
         ### Returns:
         :return: An array holding the batched adversarial examples.
         """
+        warm = kwargs.get("warm")
+
         # Initialize constant for binary search:
         c_current = np.ones(x.shape[0]) * self.initial_const
         c_best = np.zeros(x.shape[0])
         
         # Initialize placeholders for best l2 distance and attack found so far
-        best_l2dist = np.inf * np.ones(x.shape[0])
-        best_x_adv = x.copy()
-        
-        pred = self.model.predict(x)
+        best_l2dist = tf.fill([x.shape[0]], np.inf)
+        best_x_adv = tf.convert_to_tensor(x, dtype=tf.float32)
         
         # Initialize boolean to decide if advesarial examples should predict above or below original
         # Since the adv examples are normalized between [0,1], adv examples that predict values approaching 0 or 1 are difficult to generate, hence the bool
@@ -101,91 +225,128 @@ class CarliniL2(Attack):
         else:
             if mean - self.min_change < 0.1:
                 above = True
+
+        # Seed the samples the previous budget succeeded on with its solution and constant c, unless the
+        # predictions are now pushed the other way. Other samples start from w = 0 as in a cold start
+        w_start = np.zeros(x.shape, dtype=np.float32)
+        max_iter = self.max_iter; binary_search_steps = self.binary_search_steps
+        if warm and warm["above"] == above:
+            found = warm["found"]
+            w_start[found] = np.arctanh(np.clip(2 * warm["x_adv"][found] - 1, -1 + 1e-6, 1 - 1e-6))
+            # c_best stays 0 for a sample whose example was only found mid-step, and c = 0 never grows again
+            c_current = np.where(found & (warm["const"] > 0), warm["const"], c_current)
+            max_iter = self.warm_max_iter; binary_search_steps = self.warm_binary_search_steps
+
+        x_tensor = tf.convert_to_tensor(x, dtype=tf.float32)
+        pred_tensor = tf.reshape(tf.convert_to_tensor(pred, dtype=tf.float32), [-1])
+        direction = tf.constant(1.0 if above else -1.0)
+        change = tf.constant(self.min_change, dtype=tf.float32)
         
-        for bss in range(self.binary_search_steps):
+        for bss in range(binary_search_steps):
+            best_l2dist, best_x_adv, success = self._optimize(x_tensor, pred_tensor, direction, change,
+                                                              tf.convert_to_tensor(c_current, dtype=tf.float32), best_l2dist, best_x_adv,
+                                                              tf.convert_to_tensor(w_start), tf.constant(max_iter))
             
-            # Initialize variable to optimize
-            w = tf.Variable(np.zeros(x.shape), trainable=True, dtype=tf.float32)
+            # Update constant c using modified binary search
+            success = success.numpy()
+            c_next = np.where(success, c_current / 2, np.where(c_best == 0, c_current * 10, (c_current + c_best) / 2))
+            c_best = np.where(success, c_current, c_best)
+            c_current = c_next
+
+        if warm is not None:
+            found = np.isfinite(best_l2dist.numpy())
+            warm.update({"above": above, "x_adv": best_x_adv.numpy(), "found": found, "const": c_best})
+
+        return best_x_adv.numpy().astype(x.dtype)
+
+    @tf.function
+    def _optimize(self, x: tf.Tensor, pred: tf.Tensor, direction: tf.Tensor, change: tf.Tensor, const: tf.Tensor,
+                  best_l2dist: tf.Tensor, best_x_adv: tf.Tensor, w_start: tf.Tensor, max_iter: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor]:
+        """
+        Internal method to run the optimization steps of one binary search step. The whole loop is compiled
+        into one graph. The forward pass taped for the gradient is reused to track the best adversarial examples.
+
+        ### Parameters:
+        :param x: Tensor with the batched original inputs to be attacked.
+        :param pred: Tensor with the benign predictions of the batched original inputs.
+        :param direction: 1.0 if the adversarial predictions should be above the benign predictions; -1.0 if below.
+        :param change: Minimum change of the predictions.
+        :param const: Tensor with the constant c of every sample.
+        :param best_l2dist: Tensor with the l2 distance of the best adversarial example found so far for every sample.
+        :param best_x_adv: Tensor with the best adversarial examples found so far.
+        :param w_start: Tensor with the starting point of the optimization variable.
+        :param max_iter: Number of optimization steps.
+
+        ### Returns:
+        :return: Updated best_l2dist and best_x_adv, and a boolean tensor marking the samples whose adversarial
+        example of the last step reached the minimum change.
+        """
+        batch_size = tf.shape(x)[0]
+        sample_shape = tf.concat([[-1], tf.ones([tf.rank(x) - 1], dtype=tf.int32)], axis=0)
+
+        # Initialize variable to optimize and the moment estimates of Adam
+        w = w_start; m = tf.zeros_like(x); v = tf.zeros_like(x)
+        success = tf.zeros([batch_size], dtype=tf.bool)
+        
+        for i_iter in tf.range(max_iter):
             
-            for i_iter in range(self.max_iter):
+            # Calculate loss
+            with tf.GradientTape() as tape:
+                tape.watch(w)
                 
-                # Calculate loss
-                with tf.GradientTape() as tape:
-                    tape.watch(w)
-                    
-                    # Generate adversarial examples using w
-                    x_adv = (tf.tanh(w) + 1.0) / 2.0
-                    pred_adv = self.model(x_adv)
-                    
-                    # Calculate distance using the l2 metric
-                    square_diff = tf.square(tf.subtract(x, x_adv))
-                    l2dist = tf.reduce_sum(tf.reduce_sum(square_diff, axis=2), keepdims=(True))
-                    
-                    # Loss depends if adv prediction is meant to be above or below the benign prediction
-                    if above:
-                        f_sum = tf.add(tf.add(pred, self.min_change), tf.negative(pred_adv))
-                    else:
-                        f_sum = tf.add(tf.add(tf.negative(pred), self.min_change), pred_adv)
-                    c_loss = tf.multiply(c_current, tf.maximum(f_sum, tf.zeros(x_adv.shape[0])))
-                    
-                    # Add the two sums from the loss function
-                    loss = tf.add(l2dist, c_loss)
+                # Generate adversarial examples using w
+                x_adv = (tf.tanh(w) + 1.0) / 2.0
+                pred_adv = tf.reshape(self.model(x_adv, training=False), [-1])
                 
-                # Calculate loss gradient w.r.t our optimization variable w 
-                gradients = tape.gradient(loss, w)
+                # Calculate distance of every sample using the l2 metric
+                l2dist = tf.reduce_sum(tf.reshape(tf.square(x_adv - x), [batch_size, -1]), axis=1)
                 
-                # Update w
-                w = tf.subtract(w, tf.multiply(self.learning_rate, gradients))
-                
-                # Calculate l2dist and generate new adversarial predictions
-                x_adv = x_adv.numpy()
-                pred_adv = self.model.predict(x_adv)
-                l2dist = np.sum(np.square(x - x_adv).reshape(x.shape[0], -1), axis=1)
-                
-                # Update adversarial examples if new best is found
-                for e in range(x.shape[0]): 
-                    if above:
-                        if pred_adv[e] >= pred[e] + self.min_change and l2dist[e] <= best_l2dist[e]:
-                            best_x_adv[e] = x_adv[e]
-                            best_l2dist[e] = l2dist[e]
-                    else:
-                        if pred_adv[e] <= pred[e] - self.min_change and l2dist[e] <= best_l2dist[e]:
-                            best_x_adv[e] = x_adv[e]
-                            best_l2dist[e] = l2dist[e]
+                # Loss depends if adv prediction is meant to be above or below the benign prediction
+                f_sum = change + direction * (pred - pred_adv)
+                loss = tf.reduce_sum(l2dist) + tf.reduce_sum(const * tf.maximum(f_sum, 0.0))
             
-            pred_adv = self.model.predict(x_adv)
+            # Calculate loss gradient w.r.t our optimization variable w 
+            gradients = tape.gradient(loss, w)
             
-            # Update constant c using modified binary search
-            for e in range(x.shape[0]):
-                if above:
-                    if pred_adv[e] >= pred[e] + self.min_change:
-                        c_best[e] = c_current[e]
-                        c_current[e] /= 2
-                    else:
-                        if c_best[e] == 0:
-                            c_current[e] *= 10
-                        else:
-                            c_current[e] = (c_current[e] + c_best[e]) / 2
-                else:
-                    if pred_adv[e] <= pred[e] - self.min_change:
-                        c_best[e] = c_current[e]
-                        c_current[e] /= 2
-                    else:
-                        if c_best[e] == 0:
-                            c_current[e] *= 10
-                        else:
-                            c_current[e] = (c_current[e] + c_best[e]) / 2
-        return best_x_adv
+            # Update w
+            if self.optimizer == "sgd":
+                w = w - self.learning_rate * gradients
 
+            else:
+                t = tf.cast(i_iter + 1, tf.float32)
+                m = 0.9 * m + 0.1 * gradients
+                v = 0.999 * v + 0.001 * tf.square(gradients)
+                w = w - self.learning_rate * (m / (1.0 - 0.9 ** t)) / (tf.sqrt(v / (1.0 - 0.999 ** t)) + 1e-8)
+            
+            # Update adversarial examples if new best is found
+            success = direction * (pred_adv - pred) >= change
+            improved = tf.logical_and(success, l2dist <= best_l2dist)
+            best_l2dist = tf.where(improved, l2dist, best_l2dist)
+            best_x_adv = tf.where(tf.reshape(improved, sample_shape), x_adv, best_x_adv)
 
-if __name__ == "__main__":
-    stage, parameters = start()
+        return best_l2dist, best_x_adv, success
+
+
+@registry.stage("attack")
+def attack(parameters: dict) -> None:
+    """
+    Attack stage handler. Generates adversarial examples with the C&W L2 attack
+    at every change budget of the attack and saves them under their budget as they are generated.
 
-    # Execute code block based on passed stage from pipeline
-    if stage == "attack":
-        attack = CarliniL2(parameters["model_path"], parameters["model_test_features"], parameters["attack_params"])
-        result = attack.attack()
-        save.adver_example(parameters["save_path"], parameters["attack_params"]["change"], result)
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+    """
+    carlini = CarliniL2(parameters["model_path"], parameters["model_test_features"], parameters["attack_params"])
+    model_info = [parameters["model_path"], os.path.getmtime(parameters["model_path"]), parameters["attack_params"], carlini.batch_size]
+    save.adver_stream(parameters["save_path"], carlini, inputs=model_info)
+
+    # Validate the adversarial examples generated on a surrogate against the victim
+    if carlini.use_surrogate:
+        first, last = carlini.rows()
+        adversaries = {change: parameters["save_path"] + "/{}.pkl".format(change) for change in carlini.budgets()}
+        transfer = surrogate.report(carlini.victim, carlini.model, carlini.features[first:last], adversaries, carlini.distill_seconds)
+        save.dictionary(os.path.dirname(parameters["model_path"]) + "/stat", surrogate.report_name(parameters["name"], carlini.budgets(), carlini.shard), transfer)
 
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from the pipeline.".format(stage))
+
+if __name__ == "__main__":
+    registry.main()
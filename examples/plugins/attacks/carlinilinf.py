@@ -1,13 +1,25 @@
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+import jespipe.plugin.registry as registry
 import jespipe.plugin.save as save
 import numpy as np
+import surrogate
 import tensorflow as tf
-from jespipe.plugin.attack.attack import Attack
-from jespipe.plugin.start import start
+from jespipe.plugin.attack import autotune
+from jespipe.plugin.attack.attack import StreamingAttack
 from tensorflow.keras.models import load_model
 from tqdm import trange
 
+# Every change budget of an attack is generated in one call
+JESPIPE_MULTI_BUDGET = True
+
+# Large attacks can be split into shards of whole batches across workers
+JESPIPE_SHARDABLE = True
 
-class CarliniLinf(Attack):
+
+class CarliniLinf(StreamingAttack):
     """
     This is a modified version of the L_inf optimized attack of Carlini and Wagner (2016).
     It has been modified to fit time series regression problems.
@@ -23,14 +35,22 @@ class CarliniLinf(Attack):
 
         ### Methods:
         - public
-          - attack (abstract): Launch L_inf attack on the given time series data.
+          - budgets (abstract): List the change budgets generated by the attack.
+          - shape (abstract): Get the shape of the adversarial examples of one change budget.
+          - rows: Get the first row and the row after the last row of the shard.
+          - stream (abstract): Launch L_inf attack on the given time series data batch by batch at every change budget.
         - private
-          - _generate: Internal method to perform the L_inf attack on the given time series data.
-          - _generate_batch: Internal method to generate batched adversarial samples and return them in an array.
+          - _tune: Internal method to tune the batch size on the first rows of the test features.
+          - _batches: Internal method to find the batches of the shard.
+          - _generate: Internal method to perform the L_inf attack on the given time series data batch by batch at every change budget.
+          - _generate_batch: Internal method to generate batched adversarial samples for the current change budget and return them in an array.
+          - _optimize: Internal method to run the optimization steps of one round on the samples still in progress.
         """
-        self.model = load_model(model)
+        self.victim = load_model(model)
+        self.model = self.victim
         self.features = features
-        self.min_change = parameters["change"]
+        self.changes = parameters["changes"] if "changes" in parameters else [parameters["change"]]
+        self.shard = parameters.get("shard", [0, 1])
         self.learning_rate = parameters["learning_rate"]
         self.max_iter = parameters["max_iter"]
         self.batch_size = parameters["batch_size"]
@@ -39,50 +59,147 @@ class CarliniLinf(Attack):
         self.sequence_length = parameters["sequence_length"]
         self.decrease_factor = parameters["decrease_factor"]
         self.verbose = parameters["verbose"]
+        self.warm_start = parameters.get("warm_start", False)
+        self.warm_max_iter = parameters.get("warm_max_iter", self.max_iter)
+        self._round = None
+        self.use_surrogate = parameters.get("surrogate", False)
+        self.distill_seconds = 0.0
+
+        # Run the optimization against a smaller surrogate distilled from the victim
+        if self.use_surrogate:
+            self.model, self.distill_seconds = surrogate.distill(self.victim, surrogate.training_features(model, features), parameters)
+
+        # Shards are made of whole batches, so only attacks without shards tune their batch size
+        self.autotune_max_batch_size = parameters.get("autotune_max_batch_size", 256)
+        self.autotune_max_iter = parameters.get("autotune_max_iter", 10)
+        if parameters.get("autotune_batch_size", False) and self.shard[1] == 1:
+            self.batch_size = self._tune(model)
+
+    def budgets(self) -> List[float]:
+        """
+        List the change budgets generated by the attack.
+
+        ### Returns:
+        :return: List of change budgets.
+        """
+        return list(self.changes)
+
+    def shape(self) -> Tuple[int, ...]:
+        """
+        Get the shape of the adversarial examples of one change budget.
+
+        ### Returns:
+        :return: Shape of the adversarial examples of the shard.
+        """
+        first, last = self.rows()
+        return (last - first,) + tuple(self.features.shape[1:])
+
+    def rows(self) -> Tuple[int, int]:
+        """
+        Get the first row and the row after the last row of the shard.
+        ### Returns:
+        :return: (first, last) rows of the test features attacked by the shard.
+        """
+        first, last = self._batches(self.features.shape[0])
+        return first * self.batch_size, min(last * self.batch_size, self.features.shape[0])
+
+    def stream(self, start: int = 0) -> Iterator[Dict[float, np.ndarray]]:
+        """
+        Launch L_inf attack on the given time series data batch by batch at every change budget.
+
+        ### Parameters:
+        :param start: First row of the shard to generate (default: 0).
+
+        ### Returns:
+        :return: Iterator over dictionaries mapping every change budget to the adversarial examples of the next batch.
+        """
+        return self._generate(self.features, start=start)
 
-    def attack(self) -> np.ndarray:
+    def _tune(self, model: str) -> int:
+        """
+        Internal method to tune the batch size on the first rows of the test features. Every probe runs
+        autotune_max_iter optimization steps of the smallest change budget under the RSS limit of the slot.
+        The best batch size is recorded next to the model, so later attacks on the model skip the probe.
+        ### Parameters:
+        :param model: System file path to trained regressor model.
+        ### Returns:
+        :return: Best batch size.
         """
-        Launch L_inf attack on the given time series data.
+        rows = min(self.autotune_max_batch_size, self.features.shape[0])
+        candidates = sorted(set([2 ** i for i in range(3, 16) if 2 ** i <= rows] + [min(self.batch_size, rows)]))
+        x = np.asarray(self.features[:rows]); pred = self.model.predict(x)
+        self.mean = pred.mean(); self.min_change = min(self.changes)
+
+        # The best batch size depends on the optimized model, the sample shape, and the memory available
+        key = json.dumps({"attack": type(self).__name__, "model_params": int(self.model.count_params()), "shape": list(x.shape[1:]),
+                          "candidates": candidates, "max_iter": self.autotune_max_iter, "rss_limit": autotune.slot_rss_limit()}, sort_keys=True)
+        max_iter = self.max_iter; self.max_iter = self.autotune_max_iter
+        try:
+            return autotune.batch_size(lambda size: self._generate_batch(x[:size], pred[:size]), candidates,
+                                       os.path.dirname(model) + "/autotune-{}.json".format(type(self).__name__), key)
+
+        finally:
+            self.max_iter = max_iter
 
+    def _batches(self, rows: int) -> Tuple[int, int]:
+        """
+        Internal method to find the batches of the shard. Shards are made of whole batches.
+        ### Parameters:
+        :param rows: Number of rows of the test features.
         ### Returns:
-        :return: An array holding the adversarial examples.
+        :return: Index of the first batch of the shard and index of the batch after its last batch.
         """
-        return self._generate(self.features)
+        nb_batches = int(np.ceil(rows / float(self.batch_size)))
+        return nb_batches * self.shard[0] // self.shard[1], nb_batches * (self.shard[0] + 1) // self.shard[1]
 
-    def _generate(self, x: np.ndarray, **kwargs) -> np.ndarray:
+    def _generate(self, x: np.ndarray, **kwargs) -> Iterator[Dict[float, np.ndarray]]:
         """
-        Internal method to perform the L_inf attack on the given time series data.
+        Internal method to perform the L_inf attack on the given time series data batch by batch at every change budget.
+        The benign predictions are computed once and shared by every budget. With warm_start, the budgets
+        of a batch run in ascending order and each one starts from the adversarial examples of the previous budget.
+        Only the batches of the shard are attacked, so shards produce the same examples as a single run.
         ### Parameters:
         :param x: An array with the original inputs to be attacked.
+        - kwargs
+          - start: First row of the shard to generate (default: 0).
         ### Returns:
-        :return: An array holding the adversarial examples.
+        :return: Iterator over dictionaries mapping every change budget to the adversarial examples of the next batch.
         """
+        start = kwargs.get("start", 0)
         pred = self.model.predict(x)
         self.mean = pred.mean()
 
-        # Generate adversarial examples
-        x_adv = np.zeros(x.shape)
-        nb_batches = int(np.ceil(x.shape[0] / float(self.batch_size)))
-        for i in trange(nb_batches, desc="C&W L_inf", disable = not self.verbose):
+        # Generate adversarial examples for every budget one batch at a time
+        first, last = self._batches(x.shape[0])
+        for i in trange(first + start // self.batch_size, last, desc="C&W L_inf", disable = not self.verbose):
             index = i * self.batch_size
-            x_adv[index:index+self.batch_size] = (self._generate_batch(x[index:index+self.batch_size]))
-        print(x_adv.shape)
-        return x_adv
+            warm = dict() if self.warm_start else None
+            batch = dict()
+            for change in (sorted(self.changes) if self.warm_start else self.changes):
+                self.min_change = change
+                batch[change] = self._generate_batch(x[index:index+self.batch_size], pred[index:index+self.batch_size], warm=warm)
+
+            yield batch
     
-    def _generate_batch(self, x: np.ndarray, **kwargs) -> np.ndarray:
+    def _generate_batch(self, x: np.ndarray, pred: np.ndarray, **kwargs) -> np.ndarray:
         """
-        Internal method to generate batched adversarial samples and return them in an array.
+        Internal method to generate batched adversarial samples for the current change budget and return them in an array.
+        Every sample keeps its own tau, constant c, and warm start. Samples drop out of the batch once their tau
+        falls below 1/256 or their constant reaches largest_const, so later rounds only run the samples still in progress.
         ### Parameters:
         :param x: An array with the batched original inputs to be attacked.
+        :param pred: An array with the benign predictions of the batched original inputs.
+        - kwargs
+          - warm: Dictionary holding the warm start of the batch. Filled with the solution of the current
+          budget to seed the next budget (default: None).
         ### Returns:
         :return: An array holding the batched adversarial examples.
         """
-        
-        # Initialize placeholders for best l2 distance and attack found so far
-        best_linf_dist = np.inf * np.ones(x.shape[0])
-        best_x_adv = x.copy()
-        
-        pred = self.model.predict(x)
+        warm = kwargs.get("warm")
+
+        # Initialize placeholders for best linf distance and attack found so far
+        best_linf_dist = np.inf * np.ones(x.shape[0], dtype=np.float32)
+        best_x_adv = x.astype(np.float32)
         
         # Initialize boolean to decide if advesarial examples should predict above or below original
         # Since the adv examples are normalized between [0,1], adv examples that predict values approaching 0 or 1 are difficult to generate, hence the bool
@@ -95,95 +212,136 @@ class CarliniLinf(Attack):
         else:
             if mean - self.min_change < 0.1:
                 above = True
+
+        if self._round is None:
+            sample = tf.TensorSpec(shape=[None] + list(x.shape[1:]), dtype=tf.float32)
+            row = tf.TensorSpec(shape=[None], dtype=tf.float32); scalar = tf.TensorSpec(shape=[], dtype=tf.float32)
+            self._round = tf.function(self._optimize, input_signature=[sample, row, scalar, scalar, row, row, sample, row, sample,
+                                                                       tf.TensorSpec(shape=[], dtype=tf.int32)])
         
-        # Initialize variable to optimize
-        w = tf.Variable(np.zeros(x.shape), trainable=True, dtype=tf.float32)
-        best_w = w
-        x_adv = (tf.tanh(w) + 1.0) / 2.0
-        
-        # Initialize variables to iterate over
-        c_current = self.initial_const
-        tau = np.max(np.abs(x_adv - x))
+        # Initialize variable to optimize at the center of the box and the variables to iterate over for every sample
+        x = x.astype(np.float32); pred = pred.reshape(-1).astype(np.float32)
+        w = np.zeros(x.shape, dtype=np.float32)
+        c_current = np.ones(x.shape[0], dtype=np.float32) * self.initial_const
+        tau = np.max(np.abs(0.5 - x).reshape(x.shape[0], -1), axis=1)
+        direction = tf.constant(1.0 if above else -1.0); change = tf.constant(self.min_change, dtype=tf.float32)
+        max_iter = self.max_iter
+
+        # Seed the samples the previous budget succeeded on with its warm start, constant c, and linf distance,
+        # unless the predictions are now pushed the other way. Other samples start cold
+        if warm and warm["above"] == above:
+            found = warm["found"]
+            w[found] = warm["w"][found]; c_current[found] = np.minimum(warm["const"][found], self.largest_const / 2)
+            tau[found] = np.maximum(warm["linf_dist"][found], 2./256)
+            max_iter = self.warm_max_iter
+
+        active = np.flatnonzero((tau > 1./256) & (c_current < self.largest_const))
+        while active.size > 0:
+            
+            # Using "warm-start", meaning start gradient descent from the best solution of each sample found so far
+            best_w, best_linf_dist[active], best_x_adv[active], found = [tensor.numpy() for tensor in self._round(
+                x[active], pred[active], direction, change, tau[active], c_current[active], w[active], best_linf_dist[active], best_x_adv[active],
+                tf.constant(max_iter))]
+            w[active] = best_w
+
+            # Tighten tau of the samples that found an example; otherwise raise their constant c
+            tau[active] = np.where(found, tau[active] * self.decrease_factor, tau[active])
+            c_current[active] = np.where(found, c_current[active], c_current[active] * 2)
+            active = active[(tau[active] > 1./256) & (c_current[active] < self.largest_const)]
 
-        while tau > 1./256:
+        if warm is not None:
+            warm.update({"above": above, "w": w, "const": c_current, "linf_dist": best_linf_dist, "found": np.isfinite(best_linf_dist)})
             
-            # Using "warm-start", meaning start gradient descent from the solution found on the previous iteration
-            w = best_w
+        return best_x_adv.astype(x.dtype)
+
+    def _optimize(self, x: tf.Tensor, pred: tf.Tensor, direction: tf.Tensor, change: tf.Tensor, tau: tf.Tensor, const: tf.Tensor,
+                  w: tf.Tensor, best_linf_dist: tf.Tensor, best_x_adv: tf.Tensor, max_iter: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+        """
+        Internal method to run the optimization steps of one round on the samples still in progress. Compiled into
+        one graph by _generate_batch. Samples whose gradient vanishes stop moving, and the round ends early once
+        no sample is moving.
+        ### Parameters:
+        :param x: Tensor with the original inputs of the samples in progress.
+        :param pred: Tensor with the benign predictions of the samples in progress.
+        :param direction: 1.0 if the adversarial predictions should be above the benign predictions; -1.0 if below.
+        :param change: Minimum change of the predictions.
+        :param tau: Tensor with the tau of every sample.
+        :param const: Tensor with the constant c of every sample.
+        :param w: Tensor with the warm start of every sample.
+        :param best_linf_dist: Tensor with the linf distance of the best adversarial example found so far for every sample.
+        :param best_x_adv: Tensor with the best adversarial examples found so far.
+        :param max_iter: Number of optimization steps.
+        ### Returns:
+        :return: Warm start for the next round, updated best_linf_dist and best_x_adv, and a boolean tensor
+        marking the samples that found a better adversarial example during the round.
+        """
+        batch_size = tf.shape(x)[0]
+        sample_shape = tf.concat([[-1], tf.ones([tf.rank(x) - 1], dtype=tf.int32)], axis=0)
+        best_w = w
+        found = tf.zeros([batch_size], dtype=tf.bool)
+        moving = tf.ones([batch_size], dtype=tf.bool)
 
-            found = False
+        for i_iter in tf.range(max_iter):
             
-            while c_current < self.largest_const and not found:
+            # Early abort if no sample has gradient updates left
+            if not tf.reduce_any(moving):
+                break
+
+            # Calculate loss
+            with tf.GradientTape() as tape:
+                tape.watch(w)
                 
-                for i_iter in range(self.max_iter):
-    
-                    # Calculate loss
-                    with tf.GradientTape() as tape:
-                        tape.watch(w)
-                        
-                        # Generate adversarial examples using w
-                        x_adv = (tf.tanh(w) + 1.0) / 2.0
-                        pred_adv = self.model(x_adv)
-                        
-                        # Calculate the first loss term using tau
-                        tau_loss = tf.reduce_sum(tf.maximum(0.0, (tf.abs(x_adv - x) - tau)))
-                        
-                        # Loss depends if adv prediction is meant to be above or below the benign prediction
-                        if above:
-                            f_sum = tf.add(tf.add(pred, self.min_change), tf.negative(pred_adv))
-                        else:
-                            f_sum = tf.add(tf.add(tf.negative(pred), self.min_change), pred_adv)
-                        c_loss = tf.multiply(c_current, tf.maximum(f_sum, tf.zeros(x_adv.shape[0])))
-                        
-                        # Add the two sums from the loss function
-                        loss = tf.add(tau_loss, c_loss)
-                    
-                    # Calculate loss gradient w.r.t our optimization variable w 
-                    gradients = tape.gradient(loss, w)
-                    
-                    # Update w
-                    w = tf.subtract(w, tf.multiply(self.learning_rate, gradients))
-                    
-                    # Calculate linf_dist and generate new adversarial predictions
-                    x_adv = x_adv.numpy()
-                    pred_adv = self.model.predict(x_adv)
-                    linf_dist = np.max(np.abs(x_adv - x).reshape(x.shape[0], -1), axis=1)
-                    
-                    # Update adversarial examples if new best is found
-                    for e in range(x.shape[0]): 
-                        if above:
-                            if pred_adv[e] >= pred[e] + self.min_change and linf_dist[e] < best_linf_dist[e]:
-                                best_x_adv[e] = x_adv[e]
-                                best_linf_dist[e] = linf_dist[e]
-                                best_w = w
-                                found = True
-                        else:
-                            if pred_adv[e] <= pred[e] - self.min_change and linf_dist[e] < best_linf_dist[e]:
-                                best_x_adv[e] = x_adv[e]
-                                best_linf_dist[e] = linf_dist[e]
-                                best_w = w
-                                found = True
+                # Generate adversarial examples using w
+                x_adv = (tf.tanh(w) + 1.0) / 2.0
+                pred_adv = tf.reshape(self.model(x_adv, training=False), [-1])
                 
-                    # Early abort if there are no gradient updates
-                    if tf.reduce_sum(gradients) == 0:
-                        break
-                    
-                # Update constant c if no example has been found yet
-                if not found:
-                    c_current *= 2
+                # Calculate the first loss term using the tau of every sample
+                tau_loss = tf.reduce_sum(tf.maximum(0.0, tf.abs(x_adv - x) - tf.reshape(tau, sample_shape)))
+                
+                # Loss depends if adv prediction is meant to be above or below the benign prediction
+                f_sum = change + direction * (pred - pred_adv)
+                loss = tau_loss + tf.reduce_sum(const * tf.maximum(f_sum, 0.0))
+            
+            # Calculate loss gradient w.r.t our optimization variable w 
+            gradients = tape.gradient(loss, w)
             
-            tau *= self.decrease_factor
+            # Update w of the samples that are still moving
+            w = w - self.learning_rate * gradients * tf.reshape(tf.cast(moving, tf.float32), sample_shape)
             
-        return best_x_adv
+            # Update adversarial examples if new best is found
+            linf_dist = tf.reduce_max(tf.reshape(tf.abs(x_adv - x), [batch_size, -1]), axis=1)
+            improved = moving & (direction * (pred_adv - pred) >= change) & (linf_dist < best_linf_dist)
+            best_linf_dist = tf.where(improved, linf_dist, best_linf_dist)
+            best_x_adv = tf.where(tf.reshape(improved, sample_shape), x_adv, best_x_adv)
+            best_w = tf.where(tf.reshape(improved, sample_shape), w, best_w)
+            found = found | improved
 
+            # Samples without gradient updates stop moving for the rest of the round
+            moving = moving & (tf.reduce_max(tf.reshape(tf.abs(gradients), [batch_size, -1]), axis=1) > 0)
 
-if __name__ == "__main__":
-    stage, parameters = start()
+        return best_w, best_linf_dist, best_x_adv, found
+
+
+@registry.stage("attack")
+def attack(parameters: dict) -> None:
+    """
+    Attack stage handler. Generates adversarial examples with the C&W L_inf attack
+    at every change budget of the attack and saves them under their budget as they are generated.
 
-    # Execute code block based on passed stage from Jespipe
-    if stage == "attack":
-        attack = CarliniLinf(parameters["model_path"], parameters["model_test_features"], parameters["attack_params"])
-        result = attack.attack()
-        save.adver_example(parameters["save_path"], parameters["attack_params"]["change"], result)
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+    """
+    carlini = CarliniLinf(parameters["model_path"], parameters["model_test_features"], parameters["attack_params"])
+    model_info = [parameters["model_path"], os.path.getmtime(parameters["model_path"]), parameters["attack_params"], carlini.batch_size]
+    save.adver_stream(parameters["save_path"], carlini, inputs=model_info)
+
+    # Validate the adversarial examples generated on a surrogate against the victim
+    if carlini.use_surrogate:
+        first, last = carlini.rows()
+        adversaries = {change: parameters["save_path"] + "/{}.pkl".format(change) for change in carlini.budgets()}
+        transfer = surrogate.report(carlini.victim, carlini.model, carlini.features[first:last], adversaries, carlini.distill_seconds)
+        save.dictionary(os.path.dirname(parameters["model_path"]) + "/stat", surrogate.report_name(parameters["name"], carlini.budgets(), carlini.shard), transfer)
 
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from the pipeline.".format(stage))
+
+if __name__ == "__main__":
+    registry.main()
@@ -0,0 +1,175 @@
+import os
+import time
+from typing import Dict, List, Tuple
+
+import joblib
+import numpy as np
+import tensorflow as tf
+from jespipe.plugin.train.dataset import window_dataset
+from tensorflow.keras.layers import LSTM, Dense
+from tensorflow.keras.models import Model, Sequential
+from tensorflow.keras.optimizers import Adam
+
+# Batch size used to predict with the victim and the surrogate
+PREDICT_BATCH_SIZE = 1024
+
+
+def training_features(model: str, fallback: np.ndarray) -> np.ndarray:
+    """
+    Load the training split of a victim model. Model plugins save it as train_features.pkl
+    next to the model file. Arrays are memory-mapped instead of read into memory. Models
+    trained before the training split was saved fall back to the given features.
+
+    ### Parameters:
+    :param model: System file path to the trained victim model.
+    :param fallback: Features to distill on if the training split was not saved.
+
+    ### Returns:
+    :return: Features to distill the surrogate on.
+    """
+    train_file = os.path.dirname(model) + "/train_features.pkl"
+    if os.path.isfile(train_file) is False:
+        print("No training split found at {}. Distilling the surrogate on the attacked features instead.".format(train_file))
+        return fallback
+
+    return joblib.load(train_file, mmap_mode="r")
+
+
+def distill(victim: Model, features: np.ndarray, parameters: dict) -> Tuple[Sequential, float]:
+    """
+    Distill a smaller LSTM surrogate from the predictions of a victim model. The surrogate is fitted
+    on a random sample of the windows, and the windows are streamed through
+    jespipe.plugin.train.dataset.window_dataset, so the features are never materialized as a whole.
+
+    ### Parameters:
+    :param victim: Trained victim model.
+    :param features: Features to distill on, usually the training split of the victim, as an array or a window set.
+    :param parameters: Parameter dictionary for the attack.
+    - Surrogate parameters (all optional)
+      - surrogate_layers: Number of stacked LSTM layers (default: 1).
+      - surrogate_units: Units of every LSTM layer (default: 32).
+      - surrogate_epochs: Epochs to fit the surrogate for (default: 5).
+      - surrogate_batch_size: Batch size to fit the surrogate with (default: 256).
+      - surrogate_learning_rate: Learning rate to fit the surrogate with (default: 0.001).
+      - surrogate_samples: Number of windows to distill on, drawn at random. 0 distills on every window (default: 100000).
+      - surrogate_seed: Seed of the window sample and the surrogate's initial weights, so every shard distills the same surrogate (default: 2020).
+
+    ### Returns:
+    :return: (surrogate, seconds)
+    - Positional value of each index in the tuple:
+      - 0: Surrogate fitted to the victim's predictions.
+      - 1: Seconds spent distilling the surrogate.
+    """
+    start = time.perf_counter()
+    samples = parameters.get("surrogate_samples", 100000)
+    seed = parameters.get("surrogate_seed", 2020)
+    layers = parameters.get("surrogate_layers", 1)
+    tf.random.set_seed(seed)
+
+    # Only the sampled windows are copied out of the features
+    if 0 < samples < len(features):
+        features = features[np.sort(np.random.RandomState(seed).choice(len(features), samples, replace=False))]
+
+    surrogate = Sequential()
+    for i in range(layers):
+        surrogate.add(LSTM(input_shape=features.shape[1:], units=parameters.get("surrogate_units", 32), return_sequences=i + 1 < layers))
+
+    surrogate.add(Dense(units=victim.output_shape[-1]))
+    surrogate.compile(loss="mean_squared_error", optimizer=Adam(learning_rate=parameters.get("surrogate_learning_rate", 0.001)))
+
+    # The surrogate learns the victim's function, not the labels
+    inputs = window_dataset(features, np.zeros(len(features)), PREDICT_BATCH_SIZE, shuffle=False).map(lambda x, y: x)
+    targets = victim.predict(inputs)
+    surrogate.fit(window_dataset(features, targets, parameters.get("surrogate_batch_size", 256), seed=seed),
+                  epochs=parameters.get("surrogate_epochs", 5), verbose=0)
+
+    return surrogate, time.perf_counter() - start
+
+
+def gradient_speedup(victim: Model, surrogate: Model, x: np.ndarray, repeats: int = 5) -> float:
+    """
+    Measure how much faster one gradient step of the attack is on the surrogate than on the victim.
+
+    ### Parameters:
+    :param victim: Trained victim model.
+    :param surrogate: Surrogate distilled from the victim.
+    :param x: Batch of inputs to time the gradient on.
+    :param repeats: Number of timed gradient steps per model (default: 5).
+
+    ### Returns:
+    :return: Seconds per gradient step on the victim divided by seconds per gradient step on the surrogate.
+    """
+    x = tf.convert_to_tensor(x, dtype=tf.float32)
+    seconds = list()
+    for model in [victim, surrogate]:
+        @tf.function
+        def step(x: tf.Tensor) -> tf.Tensor:
+            with tf.GradientTape() as tape:
+                tape.watch(x)
+                loss = tf.reduce_sum(model(x, training=False))
+
+            return tape.gradient(loss, x)
+
+        # Trace outside of the timed steps
+        step(x).numpy()
+        start = time.perf_counter()
+        for i in range(repeats):
+            step(x).numpy()
+
+        seconds.append((time.perf_counter() - start) / repeats)
+
+    return seconds[0] / seconds[1]
+
+
+def report(victim: Model, surrogate: Model, x: np.ndarray, adversaries: Dict[float, str], distill_seconds: float) -> dict:
+    """
+    Validate the adversarial examples generated on the surrogate against the victim and report
+    the speedup of the surrogate next to the success rate of the transfer.
+
+    ### Parameters:
+    :param victim: Trained victim model.
+    :param surrogate: Surrogate the adversarial examples were generated on.
+    :param x: Original inputs the adversarial examples were generated from.
+    :param adversaries: Dictionary mapping each change budget to the system file path of its pickled adversarial examples.
+    :param distill_seconds: Seconds spent distilling the surrogate.
+
+    ### Returns:
+    :return: Dictionary holding the distillation cost, the surrogate's fidelity to the victim, the gradient
+    speedup, and for every change budget the share of examples reaching the budget on the victim and on the surrogate.
+    Only the distillation cost is reported if x has no rows.
+    """
+    # Keras cannot predict on an empty shard
+    if len(x) == 0:
+        return {"distill_seconds": distill_seconds, "fidelity_mse": None, "gradient_speedup": None, "budgets": dict()}
+
+    victim_pred = victim.predict(x, batch_size=PREDICT_BATCH_SIZE).reshape(len(x), -1)
+    surrogate_pred = surrogate.predict(x, batch_size=PREDICT_BATCH_SIZE).reshape(len(x), -1)
+
+    budgets = dict()
+    for change, adversary in adversaries.items():
+        x_adv = joblib.load(adversary)
+        victim_change = np.abs(victim.predict(x_adv, batch_size=PREDICT_BATCH_SIZE).reshape(len(x), -1) - victim_pred).max(axis=1)
+        surrogate_change = np.abs(surrogate.predict(x_adv, batch_size=PREDICT_BATCH_SIZE).reshape(len(x), -1) - surrogate_pred).max(axis=1)
+        budgets[str(change)] = {"victim_success_rate": float(np.mean(victim_change >= change)),
+                                "surrogate_success_rate": float(np.mean(surrogate_change >= change))}
+
+    return {"distill_seconds": distill_seconds,
+            "fidelity_mse": float(np.mean(np.square(victim_pred - surrogate_pred))),
+            "gradient_speedup": gradient_speedup(victim, surrogate, x[:64]),
+            "budgets": budgets}
+
+
+def report_name(attack_name: str, changes: List[float], shard: List[int]) -> str:
+    """
+    Name the transfer report of an attack so that every attack call writes its own report.
+
+    ### Parameters:
+    :param attack_name: Name of the attack.
+    :param changes: Change budgets generated by the attack call.
+    :param shard: [index, count] of the shard attacked by the attack call.
+
+    ### Returns:
+    :return: File name of the transfer report without extension.
+    """
+    name = "transfer-{}-{}-{}".format(attack_name, min(changes), max(changes))
+    return name if shard[1] == 1 else name + "-shard-{}".format(shard[0])
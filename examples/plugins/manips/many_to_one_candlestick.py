@@ -1,12 +1,13 @@
-import uuid
 from typing import Tuple
 
+import jespipe.plugin.registry as registry
 import jespipe.plugin.save as save
-import joblib
 import numpy as np
 import pandas as pd
 from jespipe.plugin.manip.manip import Manipulation
-from jespipe.plugin.start import start
+
+# Cells of the dataset read at a time. Chunks always hold whole time intervals
+CHUNK_CELLS = 2**24
 
 
 class CandlestickManip(Manipulation):
@@ -30,18 +31,20 @@ class CandlestickManip(Manipulation):
           - manipulate (abstract): Perform Candlestick trend extraction on passed dataset.
         - private
           - _preproc_candlestick: Internal Candlestick trend extraction preprocessing method for passed dataset.
+          - _candles: Internal method to aggregate whole time intervals into open, close, high, and low values.
         """
-        self.dataset = pd.read_csv(parameters["dataset"], header=None)
+        self.dataset = parameters["dataset"]
         self.manip_tag = parameters["manip_tag"]
         self.manip_params = parameters["manip_params"]
         self.save_path = parameters["save_path"]
         self.tmp_path = parameters["tmp_path"]
 
-    def manipulate(self) -> None:
+    def manipulate(self) -> pd.DataFrame:
         """
-        Perform Candlestick trend extraction technique on passed dataset. 
-        Path to pickled manipulation is printed to stdout in order to be captured by
-        subprocess.getoutput().
+        Perform Candlestick trend extraction technique on passed dataset.
+
+        ### Returns:
+        :return: Manipulated DataFrame with the labels in the last column.
         """
         features, labels = self._preproc_candlestick()
         recomb = pd.concat([pd.DataFrame(features), pd.DataFrame(labels)], axis=1)
@@ -49,66 +52,70 @@ class CandlestickManip(Manipulation):
         # Save copy of current DataFrame for later analysis
         save.dataframe(self.save_path, self.manip_tag, recomb)
 
-        # Save pickle of manipulated DataFrame
-        pickle_path = self.tmp_path + "/" + str(uuid.uuid4()) + ".pkl"
-        joblib.dump(recomb, pickle_path)
-
-        # Print out pickle path to be captured by subprocess.getoutput()
-        print(pickle_path)
+        return recomb
 
     def _preproc_candlestick(self) -> Tuple[np.ndarray, np.ndarray]:
         """
         Internal Candlestick trend extraction preprocessing method for passed dataset.
-        Splits DataFrame into features and labels.
+        Splits DataFrame into features and labels. The dataset is read in chunks of
+        whole time intervals, so memory stays flat however long the series is.
 
         ### Returns:
         :return: Tuple with dataset features at index 0 and labels at index 1.
         """
-        # Features for model training
-        features = np.array(self.dataset)[:, :-1]
+        interval = self.manip_params["time_interval"]
+        columns = pd.read_csv(self.dataset, header=None, nrows=1).shape[1]
+        chunk_rows = max(1, CHUNK_CELLS // (columns * interval)) * interval
 
-        # Labels
-        labels = np.array(self.dataset)[:, -1]
+        new_features = list(); new_labels = list(); rows = 0
+        for chunk in pd.read_csv(self.dataset, header=None, chunksize=chunk_rows):
+            chunk = chunk.to_numpy(dtype=np.float64)
+            count = len(chunk) // interval
+            blocks = chunk[:count * interval].reshape(count, interval, columns)
 
-        new_features = np.zeros((int(features.shape[0] / self.manip_params["time_interval"]), int(features.shape[1] * 4)))
-        new_labels = np.zeros((int(labels.shape[0] / self.manip_params["time_interval"]),))
-        for feature_ind in range(features.shape[1]):
-            new_feature_ind = feature_ind * 4
-            new_row_ind = 0
-            for row_ind in range(0, features.shape[0] - self.manip_params["time_interval"], self.manip_params["time_interval"]):
-                # Find the 'open' value
-                open_value = features[row_ind, feature_ind]
-                new_features[new_row_ind, new_feature_ind] = open_value
+            # Features for model training and the label at the start of every interval
+            new_features.append(self._candles(blocks[:, :, :-1]))
+            new_labels.append(blocks[:, 0, -1])
+            rows += len(chunk)
 
-                # Find the 'close' value
-                end_ind = int(row_ind + (self.manip_params["time_interval"]-1))
-                close_value = features[end_ind, feature_ind]
-                new_features[new_row_ind, new_feature_ind + 1] = close_value
+        new_features = np.concatenate(new_features); new_labels = np.concatenate(new_labels)
+
+        # An interval ending on the last row of the dataset is left as zeros
+        if rows % interval == 0 and len(new_features) > 0:
+            new_features[-1] = 0; new_labels[-1] = 0
+
+        return new_features, new_labels
 
-                # Find the 'high' value
-                high_value = np.max(features[row_ind:end_ind, feature_ind])
-                new_features[new_row_ind, new_feature_ind + 2] = high_value
+    def _candles(self, blocks: np.ndarray) -> np.ndarray:
+        """
+        Internal method to aggregate whole time intervals into open, close, high, and low values.
+        The high and low cover every row of an interval but the last one.
 
-                # Find the 'low' value
-                low_value = np.min(features[row_ind:end_ind, feature_ind])
-                new_features[new_row_ind, new_feature_ind + 3] = low_value
+        ### Parameters:
+        :param blocks: Features of shape (intervals, time_interval, features).
 
-                # Save the label -- to change probably
-                new_labels[new_row_ind] = labels[row_ind]
+        ### Returns:
+        :return: Array of shape (intervals, features * 4) holding the open, close, high,
+        and low values of every feature next to each other.
+        """
+        candles = np.stack([blocks[:, 0], blocks[:, -1], blocks[:, :-1].max(axis=1), blocks[:, :-1].min(axis=1)], axis=2)
+        return candles.reshape(len(blocks), -1)
 
-                # Update row index for new_features
-                new_row_ind += 1
 
-        return new_features, new_labels
+@registry.stage("train")
+def manipulate(parameters: dict) -> pd.DataFrame:
+    """
+    Training stage handler. Returns the manipulated DataFrame so that
+    Jespipe can hand it straight to the training plugin.
 
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
 
-if __name__ == "__main__":
-    stage, parameters = start()
+    ### Returns:
+    :return: Manipulated DataFrame.
+    """
+    return CandlestickManip(parameters).manipulate()
 
-    # Execute code block based on passed stage from Jespipe
-    if stage == "train":
-        candlestick = CandlestickManip(parameters)
-        candlestick.manipulate()
 
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from Jespipe.".format(stage))
+if __name__ == "__main__":
+    registry.main()
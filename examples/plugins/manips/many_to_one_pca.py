@@ -1,13 +1,16 @@
+import os
 import uuid
 from typing import Tuple
 
+import jespipe.plugin.registry as registry
 import jespipe.plugin.save as save
-import joblib
 import numpy as np
 import pandas as pd
 from jespipe.plugin.manip.manip import Manipulation
-from jespipe.plugin.start import start
-from sklearn.decomposition import PCA
+from sklearn.decomposition import PCA, IncrementalPCA
+
+# Rows of the dataset read at a time by the incremental mode
+CHUNK_ROWS = 65536
 
 
 class PCAManip(Manipulation):
@@ -30,32 +33,33 @@ class PCAManip(Manipulation):
         - public
           - manipulate (abstract): Perform PCA dimensionality reduction on passed dataset.
         - private
-          - _preproc_xgb: Internal PCA dimensionality reduction preprocessing method for passed dataset.
+          - _preproc_pca: Internal PCA dimensionality reduction preprocessing method for passed dataset.
+          - _incremental_pca: Internal out-of-core PCA dimensionality reduction method for passed dataset.
         """
-        self.dataset = pd.read_csv(parameters["dataset"], header=None)
+        self.dataset = parameters["dataset"]
         self.manip_tag = parameters["manip_tag"]
         self.manip_params = parameters["manip_params"]
         self.save_path = parameters["save_path"]
         self.tmp_path = parameters["tmp_path"]
 
-    def manipulate(self) -> None:
+    def manipulate(self) -> pd.DataFrame:
         """
-        Perform PCA dimensionality reduction technique on passed dataset. 
-        Path to pickled manipulation is printed to stdout in order to be captured by
-        subprocess.getoutput().
+        Perform PCA dimensionality reduction technique on passed dataset.
+
+        ### Returns:
+        :return: Manipulated DataFrame with the labels in the last column.
         """
+        if self.manip_params.get("incremental", False):
+            # The out-of-core mode saves its copy of the DataFrame chunk by chunk
+            return self._incremental_pca()
+
         features, labels = self._preproc_pca()
         recomb = pd.concat([pd.DataFrame(features), pd.DataFrame(labels)], axis=1)
 
         # Save copy of current DataFrame for later analysis
         save.dataframe(self.save_path, self.manip_tag, recomb)
 
-        # Save pickle of manipulated DataFrame
-        pickle_path = self.tmp_path + "/" + str(uuid.uuid4()) + ".pkl"
-        joblib.dump(recomb, pickle_path)
-
-        # Print out pickle path to be captured by subprocess.getoutput()
-        print(pickle_path)
+        return recomb
 
     def _preproc_pca(self) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -65,24 +69,92 @@ class PCAManip(Manipulation):
         ### Returns:
         :return: Tuple with dataset features at index 0 and labels at index 1.
         """
+        dataset = pd.read_csv(self.dataset, header=None)
+
         # Features for training
-        features = np.array(self.dataset)[:, :-1]
+        features = np.array(dataset)[:, :-1]
 
         # Labels
-        labels = np.array(self.dataset)[:, -1]
+        labels = np.array(dataset)[:, -1]
 
         new_features = PCA(n_components=self.manip_params["n_features"]).fit_transform(features)
 
         return new_features, labels
 
+    def _incremental_pca(self) -> pd.DataFrame:
+        """
+        Internal out-of-core PCA dimensionality reduction method for passed dataset.
+        Fits an incremental PCA on row chunks of the dataset, then transforms the dataset
+        chunk by chunk into a memory-mapped file in tmp_path and the saved CSV copy. Takes
+        two passes over the dataset with at most two chunks in memory at a time. The file is
+        removed before returning; the mapping stays valid until the DataFrame is released.
 
-if __name__ == "__main__":
-    stage, parameters = start()
+        ### Returns:
+        :return: Manipulated DataFrame backed by the memory-mapped file, with the labels in the last column.
+        """
+        n_features = self.manip_params["n_features"]
+        chunk_rows = max(self.manip_params.get("chunk_rows", CHUNK_ROWS), n_features)
+
+        # First pass fits the decomposition. Chunks with fewer rows than components are
+        # carried over into the next chunk, and a short last chunk joins the chunk before it
+        ipca = IncrementalPCA(n_components=n_features)
+        pending = None
+        rows = 0
+        for chunk in pd.read_csv(self.dataset, header=None, chunksize=chunk_rows):
+            features = chunk.to_numpy(dtype=np.float64)[:, :-1]
+            rows += len(features)
+            if pending is not None and (len(pending) < n_features or len(features) < n_features):
+                pending = np.concatenate([pending, features])
+                continue
+
+            if pending is not None:
+                ipca.partial_fit(pending)
+
+            pending = features
+
+        ipca.partial_fit(pending)
+
+        # Second pass transforms every chunk into the memory-mapped file and appends it to the saved copy.
+        # The file name is unique, so runs of the same manip tag on other datasets cannot overwrite it
+        os.makedirs(self.tmp_path, exist_ok=True)
+        os.makedirs(self.save_path, exist_ok=True)
+        npy_file = self.tmp_path + "/{}-{}.npy".format(self.manip_tag, uuid.uuid4())
+        csv_file = self.save_path + "/{}.csv".format(self.manip_tag)
+        fout = np.lib.format.open_memmap(npy_file, mode="w+", dtype=np.float64, shape=(rows, n_features + 1))
+        start = 0
+        for chunk in pd.read_csv(self.dataset, header=None, chunksize=chunk_rows):
+            values = chunk.to_numpy(dtype=np.float64)
+            stop = start + len(values)
+            fout[start:stop, :-1] = ipca.transform(values[:, :-1])
+            fout[start:stop, -1] = values[:, -1]
+            pd.DataFrame(fout[start:stop]).to_csv(csv_file, mode="w" if start == 0 else "a", index=False, header=None)
+            start = stop
+
+        fout.flush()
+        del fout
+
+        # The mapping keeps the data readable after the file is removed, and the disk space
+        # is freed once the DataFrame is no longer used
+        values = np.load(npy_file, mmap_mode="r")
+        os.remove(npy_file)
+
+        return pd.DataFrame(values, copy=False)
+
+
+@registry.stage("train")
+def manipulate(parameters: dict) -> pd.DataFrame:
+    """
+    Training stage handler. Returns the manipulated DataFrame so that
+    Jespipe can hand it straight to the training plugin.
+
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+
+    ### Returns:
+    :return: Manipulated DataFrame.
+    """
+    return PCAManip(parameters).manipulate()
 
-    # Execute code block based on passed stage from Jespipe
-    if stage == "train":
-        pcamanip = PCAManip(parameters)
-        pcamanip.manipulate()
 
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from Jespipe.".format(stage))
+if __name__ == "__main__":
+    registry.main()
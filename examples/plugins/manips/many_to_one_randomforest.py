@@ -1,15 +1,18 @@
-import uuid
+import time
 from typing import Tuple
 
+import jespipe.plugin.manip.ranking as ranking
+import jespipe.plugin.registry as registry
 import jespipe.plugin.save as save
-import joblib
 import numpy as np
 import pandas as pd
 from jespipe.plugin.manip.manip import Manipulation
-from jespipe.plugin.start import start
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.feature_selection import SelectFromModel
 
+# Rows the approximate mode ranks the features on by default
+SAMPLE_ROWS = 100000
+
 
 class RandomForestManip(Manipulation):
     def __init__(self, parameters: dict) -> None:
@@ -32,17 +35,22 @@ class RandomForestManip(Manipulation):
           - manipulate (abstract): Perform vanilla manipulation on passed dataset.
         - private 
           - _preproc_randomforest: Internal vanilla preprocessing method for passed dataset.
+          - _exact_selection: Internal method to select the features with a 100-tree random forest.
+          - _approximate_selection: Internal method to select the features with a random forest
+          grown on a row subsample until the selection is stable.
         """
         self.dataset = pd.read_csv(parameters["dataset"], header=None)
         self.manip_tag = parameters["manip_tag"]
+        self.manip_params = parameters["manip_params"]
         self.save_path = parameters["save_path"]
         self.tmp_path = parameters["tmp_path"]
 
-    def manipulate(self) -> None:
+    def manipulate(self) -> pd.DataFrame:
         """
-        Perform RandomForest feature selection technique on passed dataset. 
-        Path to pickled manipulation is printed to stdout in order to be captured by
-        subprocess.getoutput().
+        Perform RandomForest feature selection technique on passed dataset.
+
+        ### Returns:
+        :return: Manipulated DataFrame with the labels in the last column.
         """
         features, labels = self._preproc_randomforest()
         recomb = pd.concat([pd.DataFrame(features), pd.DataFrame(labels)], axis=1)
@@ -50,12 +58,7 @@ class RandomForestManip(Manipulation):
         # Save copy of current DataFrame for later analysis
         save.dataframe(self.save_path, self.manip_tag, recomb)
 
-        # Save pickle of manipulated DataFrame
-        pickle_path = self.tmp_path + "/" + str(uuid.uuid4()) + ".pkl"
-        joblib.dump(recomb, pickle_path)
-
-        # Print out pickle path to be captured by subprocess.getoutput()
-        print(pickle_path)
+        return recomb
 
     def _preproc_randomforest(self) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -71,24 +74,94 @@ class RandomForestManip(Manipulation):
         # Labels
         labels = np.array(self.dataset)[:, -1]
 
-        sel = SelectFromModel(RandomForestRegressor(n_estimators=100))
-        sel.fit(features, labels.astype('int'))
+        if self.manip_params.get("approximate", False):
+            start = time.perf_counter()
+            features_to_select, trees, rows = self._approximate_selection(features, labels)
+            seconds = time.perf_counter() - start
+
+            # Report how the approximate selection compares with the exact one
+            if self.manip_params.get("compare_exact", False):
+                start = time.perf_counter()
+                report = ranking.compare(features_to_select, self._exact_selection(features, labels))
+                report.update({"trees": trees, "sample_rows": rows, "approximate_seconds": seconds, "exact_seconds": time.perf_counter() - start})
+                save.dictionary(self.save_path, "{}-selection".format(self.manip_tag), report)
+                print("Approximate selection shares {} of {} features with the exact selection (Jaccard {:.2f}).".format(
+                    len(report["shared"]), len(report["exact"]), report["jaccard"]))
 
-        features_to_select = sel.get_support(indices=True)
-        # print('Features to select: ', features_to_select)
+        else:
+            features_to_select = self._exact_selection(features, labels)
 
         new_features = features[:, features_to_select]
 
         return new_features, labels
 
+    def _exact_selection(self, features: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        """
+        Internal method to select the features with a 100-tree random forest fitted on the whole dataset.
 
-if __name__ == "__main__":
-    stage, parameters = start()
+        ### Parameters:
+        :param features: Features of the dataset.
+        :param labels: Labels of the dataset.
+
+        ### Returns:
+        :return: Indices of the features whose importance is at least the mean importance.
+        """
+        sel = SelectFromModel(RandomForestRegressor(n_estimators=100, n_jobs=ranking.slot_threads()))
+        sel.fit(features, labels.astype('int'))
+
+        return sel.get_support(indices=True)
+
+    def _approximate_selection(self, features: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, int, int]:
+        """
+        Internal method to select the features with a random forest grown on a row subsample.
+        Trees are added tree_step at a time until the selected features stay the same for
+        patience steps or max_trees trees are grown. Scikit-learn forests have no histogram
+        tree builder, so the speedup comes from the subsample and the early stop.
+
+        ### Parameters:
+        :param features: Features of the dataset.
+        :param labels: Labels of the dataset.
+
+        ### Returns:
+        :return: (features_to_select, trees, rows)
+        - Positional value of each index in the tuple:
+          - 0: Indices of the features whose importance is at least the mean importance.
+          - 1: Number of trees grown.
+          - 2: Number of rows the trees were grown on.
+        """
+        step = self.manip_params.get("tree_step", 10)
+        feature_sample, label_sample = ranking.subsample(features, labels, self.manip_params.get("sample_rows", SAMPLE_ROWS))
+        label_sample = label_sample.astype('int')
+
+        # warm_start keeps the trees grown by the previous steps
+        regressor = RandomForestRegressor(n_estimators=step, warm_start=True, n_jobs=ranking.slot_threads(), random_state=2020)
+
+        def grow(trees: int) -> np.ndarray:
+            regressor.set_params(n_estimators=trees)
+            regressor.fit(feature_sample, label_sample)
+            return regressor.feature_importances_
 
-    # Execute code block based on passed stage from Jespipe
-    if stage == "train":
-        randomforest = RandomForestManip(parameters)
-        randomforest.manipulate()
+        # Same threshold as SelectFromModel in the exact mode
+        features_to_select, trees = ranking.stable_selection(grow, lambda importance: np.flatnonzero(importance >= importance.mean()),
+                                                             step, self.manip_params.get("max_trees", 100), self.manip_params.get("patience", 2))
 
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from Jespipe.".format(stage))
+        return features_to_select, trees, len(feature_sample)
+
+
+@registry.stage("train")
+def manipulate(parameters: dict) -> pd.DataFrame:
+    """
+    Training stage handler. Returns the manipulated DataFrame so that
+    Jespipe can hand it straight to the training plugin.
+
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+
+    ### Returns:
+    :return: Manipulated DataFrame.
+    """
+    return RandomForestManip(parameters).manipulate()
+
+
+if __name__ == "__main__":
+    registry.main()
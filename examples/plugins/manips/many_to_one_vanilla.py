@@ -1,12 +1,10 @@
-import uuid
 from typing import Tuple
 
+import jespipe.plugin.registry as registry
 import jespipe.plugin.save as save
-import joblib
 import numpy as np
 import pandas as pd
 from jespipe.plugin.manip.manip import Manipulation
-from jespipe.plugin.start import start
 
 
 class VanillaManip(Manipulation):
@@ -36,11 +34,12 @@ class VanillaManip(Manipulation):
         self.save_path = parameters["save_path"]
         self.tmp_path = parameters["tmp_path"]
 
-    def manipulate(self) -> None:
+    def manipulate(self) -> pd.DataFrame:
         """
-        Perform vanilla manipulation on passed dataset. Path to pickled
-        manipulation is printed to stdout in order to be captured by
-        subprocess.getoutput().
+        Perform vanilla manipulation on passed dataset.
+
+        ### Returns:
+        :return: Manipulated DataFrame with the labels in the last column.
         """
         features, labels = self._preproc_vanilla()
         recomb = pd.concat([pd.DataFrame(features), pd.DataFrame(labels)], axis=1)
@@ -48,12 +47,7 @@ class VanillaManip(Manipulation):
         # Save copy of current DataFrame for later analysis
         save.dataframe(self.save_path, self.manip_tag, recomb)
 
-        # Save pickle of manipulated DataFrame
-        pickle_path = self.tmp_path + "/" + str(uuid.uuid4()) + ".pkl"
-        joblib.dump(recomb, pickle_path)
-
-        # Print out pickle path to be captured by subprocess.getoutput()
-        print(pickle_path)
+        return recomb
 
     def _preproc_vanilla(self) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -72,13 +66,20 @@ class VanillaManip(Manipulation):
         return features, labels
 
 
-if __name__ == "__main__":
-    stage, parameters = start()
+@registry.stage("train")
+def manipulate(parameters: dict) -> pd.DataFrame:
+    """
+    Training stage handler. Returns the manipulated DataFrame so that
+    Jespipe can hand it straight to the training plugin.
 
-    # Execute code block based on passed stage from Jespipe
-    if stage == "train":
-        vanilla = VanillaManip(parameters)
-        vanilla.manipulate()
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
 
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from Jespipe.".format(stage))
+    ### Returns:
+    :return: Manipulated DataFrame.
+    """
+    return VanillaManip(parameters).manipulate()
+
+
+if __name__ == "__main__":
+    registry.main()
@@ -1,15 +1,18 @@
-import uuid
+import time
 from typing import Tuple
 
+import jespipe.plugin.manip.ranking as ranking
+import jespipe.plugin.registry as registry
 import jespipe.plugin.save as save
-import joblib
 import numpy as np
 import pandas as pd
 import xgboost as xgb
 from jespipe.plugin.manip.manip import Manipulation
-from jespipe.plugin.start import start
 from sklearn.model_selection import train_test_split
 
+# Rows the approximate mode ranks the features on by default
+SAMPLE_ROWS = 100000
+
 
 class XGBManip(Manipulation):
     def __init__(self, parameters: dict) -> None:
@@ -32,6 +35,9 @@ class XGBManip(Manipulation):
           - manipulate (abstract): Perform XGBoost feature selection on passed dataset.
         - private
           - _preproc_xgb: Internal XGBoost feature selection preprocessing method for passed dataset.
+          - _exact_selection: Internal method to rank the features with a 100-tree XGBoost regressor.
+          - _approximate_selection: Internal method to rank the features with histogram trees
+          grown on a row subsample until the ranking is stable.
         """
         self.dataset = pd.read_csv(parameters["dataset"], header=None)
         self.manip_tag = parameters["manip_tag"]
@@ -39,11 +45,12 @@ class XGBManip(Manipulation):
         self.save_path = parameters["save_path"]
         self.tmp_path = parameters["tmp_path"]
 
-    def manipulate(self) -> None:
+    def manipulate(self) -> pd.DataFrame:
         """
-        Perform XGBoost feature selection technique on passed dataset. 
-        Path to pickled manipulation is printed to stdout in order to be captured by
-        subprocess.getoutput().
+        Perform XGBoost feature selection technique on passed dataset.
+
+        ### Returns:
+        :return: Manipulated DataFrame with the labels in the last column.
         """
         features, labels = self._preproc_xgb()
         recomb = pd.concat([pd.DataFrame(features), pd.DataFrame(labels)], axis=1)
@@ -51,12 +58,7 @@ class XGBManip(Manipulation):
         # Save copy of current DataFrame for later analysis
         save.dataframe(self.save_path, self.manip_tag, recomb)
 
-        # Save pickle of manipulated DataFrame
-        pickle_path = self.tmp_path + "/" + str(uuid.uuid4()) + ".pkl"
-        joblib.dump(recomb, pickle_path)
-
-        # Print out pickle path to be captured by subprocess.getoutput()
-        print(pickle_path)
+        return recomb
 
     def _preproc_xgb(self) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -72,33 +74,113 @@ class XGBManip(Manipulation):
         # Labels
         labels = np.array(self.dataset)[:, -1]
 
+        if self.manip_params.get("approximate", False):
+            start = time.perf_counter()
+            features_to_select, trees, rows = self._approximate_selection(features, labels)
+            seconds = time.perf_counter() - start
+
+            # Report how the approximate selection compares with the exact one
+            if self.manip_params.get("compare_exact", False):
+                start = time.perf_counter()
+                report = ranking.compare(features_to_select, self._exact_selection(features, labels))
+                report.update({"trees": trees, "sample_rows": rows, "approximate_seconds": seconds, "exact_seconds": time.perf_counter() - start})
+                save.dictionary(self.save_path, "{}-selection".format(self.manip_tag), report)
+                print("Approximate selection shares {} of {} features with the exact selection (Jaccard {:.2f}).".format(
+                    len(report["shared"]), len(report["exact"]), report["jaccard"]))
+
+        else:
+            features_to_select = self._exact_selection(features, labels)
+
+        new_features = features[:, features_to_select]
+
+        return new_features, labels
+
+    def _exact_selection(self, features: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        """
+        Internal method to rank the features with a 100-tree XGBoost regressor fitted on a training split.
+
+        ### Parameters:
+        :param features: Features of the dataset.
+        :param labels: Labels of the dataset.
+
+        ### Returns:
+        :return: Indices of the n_features most important features, most important first.
+        """
         feature_train, feature_test, labels_train, labels_test = train_test_split(features, labels)
 
         # Training with best gamma
         regressor = xgb.XGBRegressor(
             n_estimators=100,
             gamma=1.5,
-            max_depth=self.manip_params["n_features"]
+            max_depth=self.manip_params["n_features"],
+            n_jobs=ranking.slot_threads()
         )
 
         regressor.fit(feature_train, labels_train)
 
         feature_importance = regressor.feature_importances_
 
-        features_to_select = feature_importance.argsort()[-self.manip_params["n_features"]:][::-1]
+        return feature_importance.argsort()[-self.manip_params["n_features"]:][::-1]
 
-        new_features = features[:, features_to_select]
+    def _approximate_selection(self, features: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, int, int]:
+        """
+        Internal method to rank the features with histogram trees grown on a row subsample.
+        Trees are boosted tree_step at a time until the n_features most important features
+        stay the same for patience steps or max_trees trees are grown.
 
-        return new_features, labels
+        ### Parameters:
+        :param features: Features of the dataset.
+        :param labels: Labels of the dataset.
 
+        ### Returns:
+        :return: (features_to_select, trees, rows)
+        - Positional value of each index in the tuple:
+          - 0: Indices of the n_features most important features, most important first.
+          - 1: Number of trees grown.
+          - 2: Number of rows the trees were grown on.
+        """
+        n_features = self.manip_params["n_features"]
+        step = self.manip_params.get("tree_step", 10)
+        feature_sample, label_sample = ranking.subsample(features, labels, self.manip_params.get("sample_rows", SAMPLE_ROWS))
 
-if __name__ == "__main__":
-    stage, parameters = start()
+        regressor = xgb.XGBRegressor(
+            n_estimators=step,
+            gamma=1.5,
+            max_depth=n_features,
+            tree_method="hist",
+            n_jobs=ranking.slot_threads(),
+            random_state=2020
+        )
 
-    # Execute code block based on passed stage from Jespipe
-    if stage == "train":
-        xgbmanip = XGBManip(parameters)
-        xgbmanip.manipulate()
+        grown = [0]
 
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from Jespipe.".format(stage))
+        def grow(trees: int) -> np.ndarray:
+            # Continue boosting from the trees grown by the previous steps
+            regressor.set_params(n_estimators=trees - grown[0])
+            regressor.fit(feature_sample, label_sample, xgb_model=regressor.get_booster() if grown[0] > 0 else None)
+            grown[0] = trees
+            return regressor.feature_importances_
+
+        features_to_select, trees = ranking.stable_selection(grow, lambda importance: importance.argsort()[-n_features:][::-1],
+                                                             step, self.manip_params.get("max_trees", 100), self.manip_params.get("patience", 2))
+
+        return features_to_select, trees, len(feature_sample)
+
+
+@registry.stage("train")
+def manipulate(parameters: dict) -> pd.DataFrame:
+    """
+    Training stage handler. Returns the manipulated DataFrame so that
+    Jespipe can hand it straight to the training plugin.
+
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+
+    ### Returns:
+    :return: Manipulated DataFrame.
+    """
+    return XGBManip(parameters).manipulate()
+
+
+if __name__ == "__main__":
+    registry.main()
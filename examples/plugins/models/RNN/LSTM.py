@@ -1,21 +1,31 @@
-from typing import Tuple
-
-import joblib
+import os
+import uuid
+from typing import Iterator, List, Tuple, Union
 
+import jespipe.plugin.registry as registry
 import jespipe.plugin.save as save
+import joblib
 import numpy as np
 import pandas as pd
-from jespipe.plugin.start import start
 from jespipe.plugin.train.build import Build
+from jespipe.plugin.train.dataset import window_dataset
 from jespipe.plugin.train.evaluate import Evaluate
 from jespipe.plugin.train.fit import Fit
 from jespipe.plugin.train.predict import Predict
+from jespipe.plugin.train.window import WindowSet, labels, shuffle_split, spill
 from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.losses import MeanAbsoluteError
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.optimizers import Adam
 
+# Inference runs in larger batches than training, and the adversarial examples of several
+# change budgets are stacked until a forward pass covers at least STACK_ROWS samples
+PREDICT_BATCH_SIZE = 1024
+STACK_ROWS = 65536
+
+# Rows normalized at a time when the manipulated data is streamed from disk
+STREAM_ROWS = 65536
+
 
 class BuildLSTM(Build):
     def __init__(self, parameters: dict) -> None:
@@ -35,7 +45,7 @@ class BuildLSTM(Build):
         self.dataframe = parameters["dataframe"]
         self.model_params = parameters["model_params"]
 
-    def build_model(self) -> Tuple[Sequential, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    def build_model(self) -> Tuple[Sequential, Tuple[WindowSet, np.ndarray, np.ndarray, np.ndarray]]:
         """
         Build LSTM RNN model using uncompromised data.
 
@@ -71,9 +81,11 @@ class BuildLSTM(Build):
         # Return created model and training data and testing data
         return model, (feat_train, label_train, feat_test, label_test)
 
-    def _load_data(self, data: pd.DataFrame, seq_len: int, feature_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    def _load_data(self, data: pd.DataFrame, seq_len: int, feature_count: int) -> Tuple[WindowSet, np.ndarray, np.ndarray, np.ndarray]:
         """
         Internal method for loading/splitting the data into the training and testing data.
+        The windows are strided views of the data that are shuffled and split by index, so
+        the training windows are only copied out one batch at a time during the fit.
         
         ### Parameters:
         :param data: Passed dataset to split into training and testing features and labels.
@@ -83,48 +95,35 @@ class BuildLSTM(Build):
         ### Returns:
         :return: (x_train, y_train, x_test, y_test)
         - Positional value of each index in the tuple:
-          - 0: Training features.
+          - 0: Training features as a window set.
           - 1: Training labels.
           - 2: Test features.
           - 3: Test labels.
         """
-        result = np.zeros((len(data) - seq_len, seq_len, feature_count+1))
+        data = np.ascontiguousarray(data, dtype=np.float64)
 
         # Sequence lengths remain together
         # (i.e, 6 consecutive candles stay together at all times if seq_len=6)
-        for index in range(len(data) - seq_len):
-            result[index] = data[index: index + seq_len]
-
-        # Shuffling with for reproducable results
-        np.random.seed(2020)
-
-        # In-place shuffling for saving space
-        np.random.shuffle(result)
+        # Shuffling with seed 2020 for reproducable results. Train: 85%; Test: 15%
+        train_index, test_index = shuffle_split(len(data) - seq_len, train_size=0.85, seed=2020)
 
-        # Amount of data to train on. Train: 85%; Test: 15%
-        row = len(result) * 0.85
-        train = result[:int(row), :]
-
-        x_train = train[:, :, :-1]
-        y_train = train[:, -1][:, -1]
-        x_test = result[int(row):, :, :-1]
-        y_test = result[int(row):, -1][:, -1]
-
-        x_train = np.reshape(x_train, (x_train.shape[0], x_train.shape[1], feature_count))
-        x_test = np.reshape(x_test, (x_test.shape[0], x_test.shape[1], feature_count))
+        x_train = WindowSet(data, seq_len, train_index, columns=slice(0, feature_count))
+        y_train = labels(data, seq_len, train_index)
+        x_test = np.asarray(WindowSet(data, seq_len, test_index, columns=slice(0, feature_count)))
+        y_test = labels(data, seq_len, test_index)
 
         return x_train, y_train, x_test, y_test
 
 
 class FitLSTM(Fit):
-    def __init__(self, model: Sequential, feat_train: np.ndarray, 
+    def __init__(self, model: Sequential, feat_train: Union[np.ndarray, WindowSet], 
                     label_train: np.ndarray, parameters: dict) -> None:
         """
         Fit class to facilitate fitting Sequential LSTM model to training data.
         
         ### Paramters:
         :param model: Sequential LSTM model to fit to training data.
-        :param feat_train: Training features.
+        :param feat_train: Training features as an array or a window set.
         :param label_train: Training labels.
         :param parameters: Parameter dictionary sent by Jespipe.
         
@@ -140,19 +139,33 @@ class FitLSTM(Fit):
         self.epochs = self.model_params["epochs"]
         self.validation_split = self.model_params["validation_split"]
         self.verbose = self.model_params["verbose"]
+        self.shuffle_buffer = self.model_params.get("shuffle_buffer", 0)
 
     def model_fit(self) -> None:
         """
         Fit Sequential LSTM model using user-specified hyperparameters.
         """
-        self.model.fit(
-            self.feat_train,
-            self.label_train,
-            batch_size=self.batch_size,
-            epochs=self.epochs,
-            validation_split=self.validation_split,
-            verbose=self.verbose
-        )
+        if isinstance(self.feat_train, WindowSet):
+            # Like validation_split, hold out the last samples before shuffling
+            split = int(len(self.feat_train) * (1. - self.validation_split))
+            train = WindowSet(self.feat_train.data, self.feat_train.seq_len, self.feat_train.index[:split], columns=self.feat_train.columns)
+            validation = WindowSet(self.feat_train.data, self.feat_train.seq_len, self.feat_train.index[split:], columns=self.feat_train.columns)
+            self.model.fit(
+                window_dataset(train, self.label_train[:split], self.batch_size, shuffle_buffer=self.shuffle_buffer),
+                validation_data=window_dataset(validation, self.label_train[split:], self.batch_size, shuffle=False) if len(validation) > 0 else None,
+                epochs=self.epochs,
+                verbose=self.verbose
+            )
+
+        else:
+            self.model.fit(
+                self.feat_train,
+                self.label_train,
+                batch_size=self.batch_size,
+                epochs=self.epochs,
+                validation_split=self.validation_split,
+                verbose=self.verbose
+            )
 
 
 class PredictLSTM(Predict):
@@ -194,6 +207,7 @@ class EvaluateLSTM(Evaluate):
         :param model_to_eval: Sequential LSTM model to evaulate.
         - kwargs
           - orig_mean: Normalized mean of the original dataset.
+          - prediction: Prediction of the model on the test features. Predicted by model_evaluate if not given.
 
         ### Methods:
         - public
@@ -204,16 +218,22 @@ class EvaluateLSTM(Evaluate):
           of the Sequential LSTM model's prediction.
           - _eval_rmse: Internal method to evaluate the root 
           mean squared error of the Sequential LSTM model's prediction
+          - _eval_scatter_index: Internal method to evaluate the scatter index
+          of the Sequential LSTM model's prediction.
+          - _eval_mean_absolute_error: Internal method to evaluate the mean absolute error
+          of the Sequential LSTM model's prediction.
         """
         self.feature_test = feature_test
         self.label_test = label_test
         self.model_to_eval = model_to_eval
         self.orig_mean = kwargs.get("orig_mean") if kwargs.get("orig_mean") is not None else None 
+        self.prediction = kwargs.get("prediction")
 
-    def model_evaluate(self) -> Tuple[float, float]:
+    def model_evaluate(self) -> Tuple[float, float, float, float]:
         """
         Evaluate the mean squared error and root mean squared error of 
-        the Sequential LSTM model's prediction.
+        the Sequential LSTM model's prediction. Every metric is computed
+        from the same prediction, so the model runs at most one forward pass.
 
         ### Returns:
         :return: (mse, rmse)
@@ -223,21 +243,26 @@ class EvaluateLSTM(Evaluate):
           - 2: Scatter index of model's prediction.
           - 3: Mean absolute error of model's prediction.
         """
-        mse = self._eval_mse(); rmse = self._eval_rmse(mse)
-        return mse, rmse, self._eval_scatter_index(rmse), self._eval_mean_absolute_error()
+        prediction = self.prediction
+        if prediction is None:
+            prediction = self.model_to_eval.predict(self.feature_test, batch_size=PREDICT_BATCH_SIZE)
 
-    def _eval_mse(self) -> float:
+        error = np.reshape(prediction, (len(prediction), -1)) - np.reshape(np.asarray(self.label_test), (len(prediction), -1))
+        mse = self._eval_mse(error); rmse = self._eval_rmse(mse)
+        return mse, rmse, self._eval_scatter_index(rmse), self._eval_mean_absolute_error(error)
+
+    def _eval_mse(self, error: np.ndarray) -> float:
         """
         Internal method to evaluate the mean squared error 
         of the Sequential LSTM model's prediction.
 
+        ### Parameters:
+        :param error: Difference between the Sequential LSTM model's prediction and the test labels.
+
         ### Returns:
         :return: Mean squared error of the Sequential LSTM model's prediction.
         """
-        score = self.model_to_eval.evaluate(self.feature_test, self.label_test, verbose=0)
-
-        # Index 1 is MSE; index 0 is loss
-        return score[1]
+        return float(np.mean(np.square(error)))
 
     def _eval_rmse(self, mse: float) -> float:
         """
@@ -265,93 +290,214 @@ class EvaluateLSTM(Evaluate):
         """
         return np.divide(rmse, self.orig_mean)
 
-    def _eval_mean_absolute_error(self) -> float:
+    def _eval_mean_absolute_error(self, error: np.ndarray) -> float:
         """
         Internal method to evaluate the mean absolute error
         of the Sequential LSTM model's prediction.
 
+        ### Parameters:
+        :param error: Difference between the Sequential LSTM model's prediction and the test labels.
+
         ### Returns:
         :return: Mean absolute error of the Sequential LSTM model's prediction.
         """
-        mae = MeanAbsoluteError()
-        return mae(self.label_test, self.model_to_eval.predict(self.feature_test)).numpy()
-
-
-if __name__ == "__main__":
-    stage, parameters = start()
-
-    # Execute code block based on passed stage from pipeline
-    if stage == "train":
-        # Normalize data to 0, 1 scale
-        sc = MinMaxScaler(feature_range=(0, 1))
-        parameters.update({"dataframe": pd.DataFrame(sc.fit_transform(parameters["dataframe"]))})
+        return float(np.mean(np.abs(error)))
+
+
+def stacked_predictions(model: Sequential, adversaries: List[str]) -> Iterator[Tuple[str, np.ndarray]]:
+    """
+    Predict the adversarial examples of every change budget with as few forward passes as possible.
+    The adversarial examples of consecutive budgets are stacked until they hold at least STACK_ROWS samples.
+
+    ### Parameters:
+    :param model: Sequential LSTM model to make predictions with.
+    :param adversaries: System file paths to the pickled adversarial examples.
+
+    ### Returns:
+    :return: Iterator over (adversary, prediction) tuples in the order of adversaries.
+    """
+    stack = list()
+    for i, adversary in enumerate(adversaries):
+        stack.append((adversary, joblib.load(adversary)))
+        if i + 1 < len(adversaries) and sum([len(features) for _, features in stack]) < STACK_ROWS:
+            continue
+
+        predictions = model.predict(np.concatenate([features for _, features in stack]), batch_size=PREDICT_BATCH_SIZE)
+        bounds = np.cumsum([len(features) for _, features in stack])[:-1]
+        for (adversary, _), prediction in zip(stack, np.split(predictions, bounds)):
+            yield adversary, prediction
+
+        stack = list()
+
+
+def streamed_scaled_mean(dataset: str) -> float:
+    """
+    Get the mean of a dataset scaled to a 0, 1 range per column, reading STREAM_ROWS rows at a time.
+    Equals the mean of MinMaxScaler().fit_transform on the whole dataset up to the summation order.
+
+    ### Parameters:
+    :param dataset: System file path to the dataset as a .csv file with no header row.
+
+    ### Returns:
+    :return: Mean of the scaled dataset.
+    """
+    sc = MinMaxScaler(feature_range=(0, 1))
+    for chunk in pd.read_csv(dataset, header=None, chunksize=STREAM_ROWS):
+        sc.partial_fit(chunk)
+
+    total = 0.0
+    cells = 0
+    for chunk in pd.read_csv(dataset, header=None, chunksize=STREAM_ROWS):
+        scaled = sc.transform(chunk)
+        total += float(np.sum(scaled))
+        cells += scaled.size
+
+    return total / cells
+
+
+def fit_and_evaluate(parameters: dict, original_mean: float) -> None:
+    """
+    Build, fit, and evaluate the LSTM model on the normalized data and save it with its baseline statistics.
+
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe with the normalized data under "dataframe".
+    :param original_mean: Mean of the original dataset scaled to a 0, 1 range.
+    """
+    # Build the LSTM model
+    build_lstm = BuildLSTM(parameters)
+    model, data = build_lstm.build_model()
+
+    # Fit the LSTM model on the training data
+    fit_lstm = FitLSTM(model, data[0], data[1], parameters)
+    fit_lstm.model_fit()
+
+    # Save data to the model_save_path
+    save.dictionary(parameters["save_path"], "model_parameters", parameters["model_params"])
+    save.dictionary(parameters["save_path"], "{}_manipulation_parameters".format(parameters["manip_info"][0]), parameters["manip_params"])
+    save.features(parameters["save_path"], data[2]); save.labels(parameters["save_path"], data[3])
+    save.windows(parameters["save_path"], "train_features", data[0])
+    save.compress_dataframe(parameters["save_path"] + "/data", "baseline-data-normalized", parameters["dataframe"])
+    with open(parameters["save_path"] + "/model_summary.txt", "wt") as fout: fit_lstm.model.summary(print_fn=lambda x: fout.write(x + "\n"))
+    fit_lstm.model.save(parameters["save_path"] + "/{}-{}-{}.h5".format(parameters["model_name"], parameters["manip_info"][0], 
+                        parameters["manip_info"][1]), include_optimizer=True)
+
+    # Make a prediction on test set
+    predict_lstm = PredictLSTM(fit_lstm.model, data[2])
+    prediction = predict_lstm.model_predict()
+
+    # Save base prediction for later analysis if desired
+    save.compress_dataframe(parameters["save_path"] + "/data", "baseline-prediction", pd.DataFrame(prediction))
+
+    # Evaluate model performance on prediction
+    evaluate_lstm = EvaluateLSTM(data[2], data[3], fit_lstm.model, orig_mean=original_mean, prediction=prediction)
+    mse, rmse, scatter_index, mae = evaluate_lstm.model_evaluate()
+    
+    # Create dictionary for logging mse and rmse and then save as a pickle to be loaded back into memory during the attacks
+    # 0.0 marks 0.0 pertubation bugdet -> baseline performance
+    log_dict = {"0.0": {"mse": mse, "rmse": rmse, "scatter_index": scatter_index, "mae": mae}}
+    rmse_log_dict = {"0.0": {"rmse": rmse}}
+    mae_log_dict = {"0.0": {"mae": mae}}
+
+    save.pickle_object(parameters["log_path"], "mse-rmse-si-mae", log_dict)
+    save.pickle_object(parameters["log_path"], "rmse", rmse_log_dict)
+    save.pickle_object(parameters["log_path"], "mae", mae_log_dict)
+
+
+@registry.stage("train")
+def train(parameters: dict) -> None:
+    """
+    Training stage handler. Normalizes the manipulated data, then builds, fits,
+    and evaluates the LSTM model and saves it with its baseline statistics.
+    With the "streaming" model parameter, the manipulated and original datasets are
+    normalized chunk by chunk into a memory-mapped .npy file in the data directory of
+    the model, which training reads its windows from and which is removed once the
+    model is saved. The test split is still held in memory, because it is saved for
+    the attacks. Either way, train_features.pkl holds the training windows as an array.
+
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+    """
+    # Normalize data to 0, 1 scale
+    sc = MinMaxScaler(feature_range=(0, 1))
+    data_file = None
+    try:
+        if parameters["model_params"].get("streaming", False):
+            # Fit the scaler chunk by chunk and spill the normalized data to disk. Training windows
+            # are then read from the memory-mapped copy, so the data does not have to fit in memory
+            dataframe = parameters["dataframe"]
+            for start in range(0, len(dataframe), STREAM_ROWS):
+                sc.partial_fit(dataframe.iloc[start:start + STREAM_ROWS])
+
+            # Concurrent trainings on one node each spill to a file of their own
+            os.makedirs(parameters["save_path"] + "/data", exist_ok=True)
+            data_file = parameters["save_path"] + "/data/normalized-{}.npy".format(uuid.uuid4())
+            normalized = spill(dataframe, data_file, transform=sc.transform, chunk_rows=STREAM_ROWS)
+            parameters.update({"dataframe": pd.DataFrame(normalized, copy=False)})
+
+            # Create saved copy of the original dataset mean
+            original_mean = streamed_scaled_mean(parameters["original_dataset"])
+
+        else:
+            parameters.update({"dataframe": pd.DataFrame(sc.fit_transform(parameters["dataframe"]))})
+
+            # Create saved copy of the original dataset mean
+            scaled_data = sc.fit_transform(pd.read_csv(parameters["original_dataset"], header=None))
+            original_mean = np.mean(scaled_data)
 
-        # Create saved copy of the original dataset mean
-        scaled_data = sc.fit_transform(pd.read_csv(parameters["original_dataset"], header=None))
-        original_mean = np.mean(scaled_data)
         save.pickle_object(parameters["log_path"], "original_mean", original_mean)
+        fit_and_evaluate(parameters, original_mean)
+
+    finally:
+        # The memory-mapped copy of the normalized data is only needed while training
+        if data_file is not None and os.path.isfile(data_file):
+            os.remove(data_file)
+
+
+@registry.stage("attack")
+def attack(parameters: dict) -> dict:
+    """
+    Attack stage handler. Evaluates the trained LSTM model on every adversarial
+    example generated by an attack and saves the statistics for each change budget.
+    With "merge_log", the statistics are added to the logs saved for the attack by an
+    earlier call instead of to the baseline statistics, e.g. by the rounds of a search.
+
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+
+    ### Returns:
+    :return: Dictionary mapping each evaluated change budget to its mse, rmse, scatter_index, and mae.
+    """
+    # Load in model to evaluate
+    model = load_model(parameters["model_path"])
+
+    # Load mse-rmse.pkl file to access dictionary
+    suffix = "-{}".format(parameters["attack_name"])
+    if parameters.get("merge_log", False) is False or os.path.isfile(parameters["log_path"] + "/mse-rmse-si-mae{}.pkl".format(suffix)) is False:
+        suffix = ""
+
+    log_dict = joblib.load(parameters["log_path"] + "/mse-rmse-si-mae{}.pkl".format(suffix))
+    rmse_log_dict = joblib.load(parameters["log_path"] + "/rmse{}.pkl".format(suffix))
+    mae_log_dict = joblib.load(parameters["log_path"] + "/mae{}.pkl".format(suffix))
+    original_mean = joblib.load(parameters["log_path"] + "/original_mean.pkl")
+
+    # Loop through each of the adversarial examples, predicted in stacks of several change budgets
+    results = dict()
+    for adversary, prediction in stacked_predictions(model, parameters["adver_features"]):
+        evaluate_lstm = EvaluateLSTM(None, parameters["model_labels"], model, orig_mean=original_mean, prediction=prediction)
+        mse, rmse, scatter_index, mae = evaluate_lstm.model_evaluate()
+        perturb_budget = adversary.split("/"); perturb_budget = perturb_budget[-1].split(".pkl"); perturb_budget = perturb_budget[0]
+        results[perturb_budget] = {"mse": mse, "rmse": rmse, "scatter_index": scatter_index, "mae": mae}
+        log_dict.update({perturb_budget: results[perturb_budget]})
+        rmse_log_dict.update({perturb_budget: {"rmse": rmse}})
+        mae_log_dict.update({perturb_budget: {"mae": mae}})
 
-        # Build the LSTM model
-        build_lstm = BuildLSTM(parameters)
-        model, data = build_lstm.build_model()
-
-        # Fit the LSTM model on the training data
-        fit_lstm = FitLSTM(model, data[0], data[1], parameters)
-        fit_lstm.model_fit()
-
-        # Save data to the model_save_path
-        save.dictionary(parameters["save_path"], "model_parameters", parameters["model_params"])
-        save.dictionary(parameters["save_path"], "{}_manipulation_parameters".format(parameters["manip_info"][0]), parameters["manip_params"])
-        save.features(parameters["save_path"], data[2]); save.labels(parameters["save_path"], data[3])
-        save.compress_dataframe(parameters["save_path"] + "/data", "baseline-data-normalized", parameters["dataframe"])
-        with open(parameters["save_path"] + "/model_summary.txt", "wt") as fout: fit_lstm.model.summary(print_fn=lambda x: fout.write(x + "\n"))
-        fit_lstm.model.save(parameters["save_path"] + "/{}-{}-{}.h5".format(parameters["model_name"], parameters["manip_info"][0], 
-                            parameters["manip_info"][1]), include_optimizer=True)
+    # Once looping through all the adversarial examples has completed, dump updated log dict
+    save.pickle_object(parameters["log_path"], "mse-rmse-si-mae-{}".format(parameters["attack_name"]), log_dict)
+    save.pickle_object(parameters["log_path"], "rmse-{}".format(parameters["attack_name"]), rmse_log_dict)
+    save.pickle_object(parameters["log_path"], "mae-{}".format(parameters["attack_name"]), mae_log_dict)
 
-        # Make a prediction on test set
-        predict_lstm = PredictLSTM(fit_lstm.model, data[2])
-        prediction = predict_lstm.model_predict()
+    return results
 
-        # Save base prediction for later analysis if desired
-        save.compress_dataframe(parameters["save_path"] + "/data", "baseline-prediction", pd.DataFrame(prediction))
 
-        # Evaluate model performance on prediction
-        evaluate_lstm = EvaluateLSTM(data[2], data[3], fit_lstm.model, orig_mean=original_mean)
-        mse, rmse, scatter_index, mae = evaluate_lstm.model_evaluate()
-        
-        # Create dictionary for logging mse and rmse and then save as a pickle to be loaded back into memory during the attacks
-        # 0.0 marks 0.0 pertubation bugdet -> baseline performance
-        log_dict = {"0.0": {"mse": mse, "rmse": rmse, "scatter_index": scatter_index, "mae": mae}}
-        rmse_log_dict = {"0.0": {"rmse": rmse}}
-        mae_log_dict = {"0.0": {"mae": mae}}
-
-        save.pickle_object(parameters["log_path"], "mse-rmse-si-mae", log_dict)
-        save.pickle_object(parameters["log_path"], "rmse", rmse_log_dict)
-        save.pickle_object(parameters["log_path"], "mae", mae_log_dict)
-
-    elif stage == "attack":
-        # Load in model to evaluate
-        model = load_model(parameters["model_path"])
-
-        # Load mse-rmse.pkl file to access dictionary
-        log_dict = joblib.load(parameters["log_path"] + "/mse-rmse-si-mae.pkl")
-        rmse_log_dict = joblib.load(parameters["log_path"] + "/rmse.pkl")
-        mae_log_dict = joblib.load(parameters["log_path"] + "/mae.pkl")
-        original_mean = joblib.load(parameters["log_path"] + "/original_mean.pkl")
-
-        # Loop through each of the adversarial examples
-        for adversary in parameters["adver_features"]:
-            evaluate_lstm = EvaluateLSTM(joblib.load(adversary), parameters["model_labels"], model, orig_mean=original_mean)
-            mse, rmse, scatter_index, mae = evaluate_lstm.model_evaluate()
-            perturb_budget = adversary.split("/"); perturb_budget = perturb_budget[-1].split(".pkl"); perturb_budget = perturb_budget[0]
-            log_dict.update({perturb_budget: {"mse": mse, "rmse": rmse, "scatter_index": scatter_index, "mae": mae}})
-            rmse_log_dict.update({perturb_budget: {"rmse": rmse}})
-            mae_log_dict.update({perturb_budget: {"mae": mae}})
-
-        # Once looping through all the adversarial examples has completed, dump updated log dict
-        save.pickle_object(parameters["log_path"], "mse-rmse-si-mae-{}".format(parameters["attack_name"]), log_dict)
-        save.pickle_object(parameters["log_path"], "rmse-{}".format(parameters["attack_name"]), rmse_log_dict)
-        save.pickle_object(parameters["log_path"], "mae-{}".format(parameters["attack_name"]), mae_log_dict)
-
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from the pipeline.".format(stage))
+if __name__ == "__main__":
+    registry.main()
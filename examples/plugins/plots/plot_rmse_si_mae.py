@@ -6,7 +6,7 @@ from typing import List, Tuple
 import joblib
 import matplotlib.pyplot as plt
 import numpy as np
-from jespipe.plugin.start import start
+import jespipe.plugin.registry as registry
 from jespipe.plugin.clean.plotter import Plot
 
 
@@ -324,13 +324,18 @@ class RmseSiMae(Plot):
 
         return d
 
-if __name__ == "__main__":
-    stage, parameters = start()
 
-    # Execute code block based on passed stage from Jespipe
-    if stage == "clean":
-        plotter = RmseSiMae(parameters)
-        plotter.plot()
+@registry.stage("clean")
+def plot(parameters: dict) -> None:
+    """
+    Clean stage handler. Plots RMSE, MAE, and Scatter Index over the change budget.
+
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+    """
+    plotter = RmseSiMae(parameters)
+    plotter.plot()
 
-    else:
-        raise ValueError("Received invalid stage {}. Please only pass valid stages from Jespipe.".format(stage))
+
+if __name__ == "__main__":
+    registry.main()
@@ -1,7 +1,65 @@
 from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
 
 
 class Attack(ABC):
     @abstractmethod
     def attack(self):
         pass
+
+
+class StreamingAttack(Attack):
+    """
+    Attack that generates its adversarial examples batch by batch. Hand the attack to
+    jespipe.plugin.save.adver_stream to write the batches to disk as they are generated
+    with bounded memory and resume a killed attack from its last completed batch.
+    """
+    @abstractmethod
+    def budgets(self) -> List[float]:
+        """
+        Abstract method for listing the change budgets generated by the attack.
+
+        ### Returns:
+        :return: List of change budgets.
+        """
+        pass
+
+    @abstractmethod
+    def shape(self) -> Tuple[int, ...]:
+        """
+        Abstract method for getting the shape of the adversarial examples of one change budget.
+
+        ### Returns:
+        :return: Shape of the adversarial examples.
+        """
+        pass
+
+    @abstractmethod
+    def stream(self, start: int = 0) -> Iterator[Dict[float, np.ndarray]]:
+        """
+        Abstract method for generating the adversarial examples batch by batch in row order.
+
+        ### Parameters:
+        :param start: First row to generate. Always the first row of a batch yielded by an earlier call (default: 0).
+
+        ### Returns:
+        :return: Iterator over dictionaries mapping every change budget to the adversarial examples of the next batch.
+        """
+        pass
+
+    def attack(self) -> Dict[float, np.ndarray]:
+        """
+        Generate every batch and hold the adversarial examples in memory.
+
+        ### Returns:
+        :return: Dictionary mapping each change budget to an array holding the adversarial examples.
+        """
+        parts = {change: list() for change in self.budgets()}
+        for batch in self.stream():
+            for change, x_adv in batch.items():
+                parts[change].append(x_adv)
+
+        return {change: np.concatenate(part) if part != [] else np.zeros(self.shape(), dtype=np.float32)
+                for change, part in parts.items()}
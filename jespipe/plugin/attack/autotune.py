@@ -0,0 +1,111 @@
+import json
+import os
+import resource
+import time
+from typing import Callable, List
+
+
+def slot_rss_limit() -> int:
+    """
+    Get the resident set size a plugin may use. Jespipe sets it per slot from the
+    "rss_limit_gb" setting of the "workers" block of the configuration file.
+
+    ### Returns:
+    :return: Limit in bytes, or 0 if there is no limit.
+    """
+    return int(os.environ.get("JESPIPE_SLOT_RSS_BYTES", "0"))
+
+
+def batch_size(probe: Callable[[int], None], candidates: List[int], record_file: str, key: str, rss_limit: int = None) -> int:
+    """
+    Pick the batch size with the highest throughput that stays under the RSS limit. Candidates are
+    probed in ascending order until one exceeds the limit, runs out of memory, or stops improving the
+    throughput. The result is recorded under key in record_file, so later runs skip the probe.
+
+    ### Parameters:
+    :param probe: Function running a short attack on the first rows of the test features with the given batch size.
+    :param candidates: Batch sizes to probe.
+    :param record_file: System file path to the JSON file recording tuned batch sizes.
+    :param key: Key of the probe in record_file. Should cover everything the best batch size depends on.
+    :param rss_limit: Limit in bytes on the resident set size during a probe (default: slot_rss_limit()).
+
+    ### Returns:
+    :return: Best batch size.
+    """
+    try:
+        fin = open(record_file, "rt"); record = json.loads(fin.read()); fin.close()
+
+    except (OSError, ValueError):
+        record = dict()
+
+    if key in record:
+        return record[key]["batch_size"]
+
+    rss_limit = slot_rss_limit() if rss_limit is None else rss_limit
+    candidates = sorted(candidates)
+    best = candidates[0]; best_rate = 0.0
+    probes = dict()
+    for size in candidates:
+        _reset_peak_rss()
+        try:
+            # The first call traces the graph for the batch size and is not timed
+            probe(size)
+            start = time.perf_counter(); probe(size); seconds = time.perf_counter() - start
+
+        except Exception as e:
+            if isinstance(e, MemoryError) or type(e).__name__ == "ResourceExhaustedError":
+                print("Batch size {} ran out of memory.".format(size))
+                break
+
+            raise
+
+        peak = _peak_rss()
+        rate = size / seconds
+        probes[str(size)] = {"samples_per_second": rate, "peak_rss_bytes": peak}
+        print("Batch size {}: {:.2f} samples/s with a peak RSS of {:.2f} GiB.".format(size, rate, peak / 2**30))
+        if rss_limit > 0 and peak > rss_limit:
+            break
+
+        if rate <= best_rate:
+            break
+
+        best = size; best_rate = rate
+
+    record[key] = {"batch_size": best, "probes": probes}
+    os.makedirs(os.path.dirname(os.path.abspath(record_file)), exist_ok=True)
+    fout = open(record_file + ".part", "wt"); fout.write(json.dumps(record, indent=4)); fout.close()
+    os.replace(record_file + ".part", record_file)
+
+    return best
+
+
+def _reset_peak_rss() -> None:
+    """
+    Internal function to reset the peak resident set size of the process. Only supported on Linux;
+    elsewhere the peak keeps covering earlier probes and the limit is checked conservatively.
+    """
+    try:
+        fout = open("/proc/self/clear_refs", "wt"); fout.write("5"); fout.close()
+
+    except OSError:
+        pass
+
+
+def _peak_rss() -> int:
+    """
+    Internal function to get the peak resident set size of the process.
+
+    ### Returns:
+    :return: Peak resident set size in bytes.
+    """
+    try:
+        fin = open("/proc/self/status", "rt"); lines = fin.readlines(); fin.close()
+        for line in lines:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+
+    except OSError:
+        pass
+
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,163 @@
+import logging
+import os
+import shutil
+import uuid
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+_KEY = "jespipe_handoff"
+
+logger = logging.getLogger(__name__)
+
+
+def _plain(values: Any) -> bool:
+    """Internal function to check if values are a numpy array that can be saved to a .npy file without pickling."""
+    return isinstance(values, np.ndarray) and values.dtype.hasobject is False
+
+
+def share(object: Any, directory: str) -> Any:
+    """
+    Write a numeric numpy array or pandas DataFrame to .npy files and return a small
+    descriptor in its place. Plugins map the files back in with resolve instead of
+    unpickling a full copy. DataFrames are written one .npy file per column, so every
+    column keeps its dtype, and the descriptor holds the column labels and the index.
+    Other objects, frames with columns or an index that only pickling can represent
+    exactly, and existing descriptors are returned unchanged. So is the object if the
+    files cannot be written, e.g. because the directory ran out of space.
+
+    ### Parameters:
+    :param object: Object to share.
+    :param directory: Directory to write the .npy files to. Should be node-local storage such as /dev/shm.
+
+    ### Returns:
+    :return: Descriptor of the shared object, or the object itself if it cannot be shared.
+    """
+    if isinstance(object, pd.DataFrame):
+        # Extension dtypes such as categories or nullable integers only round-trip through pickling
+        arrays = [object.iloc[:, i].to_numpy() for i in range(object.shape[1])]
+        if object.shape[1] == 0 or all([_plain(values) and values.dtype == dtype for values, dtype in zip(arrays, object.dtypes)]) is False:
+            return object
+
+        descriptor = {_KEY: "dataframe", "columns": object.columns, "dtypes": list(object.dtypes), "index": None}
+        if isinstance(object.index, pd.RangeIndex):
+            descriptor["index"] = object.index
+
+        elif isinstance(object.index, pd.MultiIndex) is False and _plain(object.index.to_numpy()) and object.index.to_numpy().dtype == object.index.dtype:
+            arrays.append(object.index.to_numpy())
+            descriptor["index_name"] = object.index.name; descriptor["index_freq"] = getattr(object.index, "freq", None)
+
+        else:
+            return object
+
+    elif _plain(object):
+        arrays = None
+        descriptor = {_KEY: "ndarray"}
+
+    else:
+        return object
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        if arrays is None:
+            descriptor["path"] = directory + "/" + str(uuid.uuid4()) + ".npy"
+            np.save(descriptor["path"], object)
+
+        else:
+            # Columns, and the index if it is not a range, are saved as 0.npy, 1.npy, ... in a directory of their own
+            descriptor["path"] = directory + "/" + str(uuid.uuid4())
+            os.makedirs(descriptor["path"])
+            for i, values in enumerate(arrays):
+                np.save(descriptor["path"] + "/{}.npy".format(i), values)
+
+    except OSError as e:
+        logger.warning("WARNING: Could not share object through {}. Passing it by pickle instead. Received error {}.".format(directory, e))
+        remove(descriptor)
+        return object
+
+    return descriptor
+
+
+def is_descriptor(object: Any) -> bool:
+    """
+    Check if an object is a descriptor created by share.
+
+    ### Parameters:
+    :param object: Object to check.
+
+    ### Returns:
+    :return: True if the object is a descriptor; False if otherwise.
+    """
+    return isinstance(object, dict) and _KEY in object
+
+
+def nbytes(descriptor: dict) -> int:
+    """
+    Get the number of bytes the files of a descriptor take up.
+
+    ### Parameters:
+    :param descriptor: Descriptor created by share.
+
+    ### Returns:
+    :return: Combined size of the descriptor's files in bytes.
+    """
+    if os.path.isdir(descriptor["path"]):
+        return sum([os.path.getsize(descriptor["path"] + "/" + name) for name in os.listdir(descriptor["path"])])
+
+    return os.path.getsize(descriptor["path"])
+
+
+def remove(descriptor: dict) -> None:
+    """
+    Remove the files of a descriptor. Plugins that still map them keep their pages until they unmap them.
+
+    ### Parameters:
+    :param descriptor: Descriptor created by share.
+    """
+    if "path" not in descriptor:
+        return
+
+    if os.path.isdir(descriptor["path"]):
+        shutil.rmtree(descriptor["path"], ignore_errors=True)
+
+    elif os.path.isfile(descriptor["path"]):
+        os.remove(descriptor["path"])
+
+
+def resolve(parameters: dict) -> dict:
+    """
+    Replace the descriptors in a parameter dictionary with the objects they describe.
+    Arrays are memory-mapped copy-on-write, so plugins can modify them without touching
+    the shared file and only the pages they read are loaded.
+
+    ### Parameters:
+    :param parameters: Parameter dictionary sent by Jespipe.
+
+    ### Returns:
+    :return: Parameter dictionary with every descriptor resolved.
+    """
+    for key, value in parameters.items():
+        if is_descriptor(value) is False:
+            continue
+
+        if value[_KEY] == "ndarray":
+            parameters[key] = np.load(value["path"], mmap_mode="c")
+            continue
+
+        count = len(value["dtypes"])
+        columns = {i: np.load(value["path"] + "/{}.npy".format(i), mmap_mode="c") for i in range(count)}
+        if value["index"] is not None:
+            index = value["index"]
+
+        else:
+            index = pd.Index(np.load(value["path"] + "/{}.npy".format(count), mmap_mode="c"), name=value["index_name"])
+            if value["index_freq"] is not None:
+                index = type(index)(index, freq=value["index_freq"])
+
+        # Positional keys keep duplicate column labels apart until the real labels are set
+        dataframe = pd.DataFrame(columns, index=index, copy=False)
+        dataframe.columns = value["columns"]
+        parameters[key] = dataframe
+
+    return parameters
@@ -0,0 +1,190 @@
+import os
+import runpy
+import sys
+import tempfile
+import traceback
+from multiprocessing.connection import Connection
+from typing import Any, List, Tuple, Union
+
+import joblib
+
+from . import handoff, registry
+
+
+def call(steps: List[Tuple[str, str, str, Union[str, None], Union[str, None]]], log_file: str) -> int:
+    """
+    Run a chain of plugin calls inside the current interpreter. Plugins that register
+    stage handlers with jespipe.plugin.registry are called directly with the parameter
+    dictionary; other plugins run exactly as if they were launched with
+    `python plugin_file stage parameters`. Modules imported by an earlier call stay
+    cached, so heavy imports such as tensorflow are only paid for once per host.
+
+    ### Parameters:
+    :param steps: List of (plugin_file, stage, parameters, inject, keep) tuples where parameters is the
+    system file path to the pickled parameter dictionary. When inject is not None, the result of
+    the previous step is stored under that key of the parameter dictionary, e.g. a manipulated
+    DataFrame handed straight to the training plugin. When keep is not None, the result of the
+    step is also pickled to that system file path. Results without a keep path are discarded.
+    :param log_file: System file path to the file the plugins' stdout and stderr are appended to.
+
+    ### Returns:
+    :return: Exit status of the chain. The chain stops at the first failing step.
+    """
+    sys.stdout.flush(); sys.stderr.flush()
+    saved_fds = (os.dup(1), os.dup(2))
+    fout = open(log_file, "at")
+    os.dup2(fout.fileno(), 1); os.dup2(fout.fileno(), 2)
+
+    try:
+        result = None
+        for plugin_file, stage, parameters, inject, keep in steps:
+            result = _step(plugin_file, stage, parameters, inject, result)
+            if keep is not None:
+                joblib.dump(result, keep)
+
+        status = 0
+
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            status = e.code or 0
+
+        else:
+            print(e.code, file=sys.stderr); status = 1
+
+    except BaseException:
+        traceback.print_exc(); status = 1
+
+    finally:
+        # Release models built by the plugins so they do not pile up across calls
+        if "tensorflow" in sys.modules:
+            sys.modules["tensorflow"].keras.backend.clear_session()
+
+        sys.stdout.flush(); sys.stderr.flush()
+        os.dup2(saved_fds[0], 1); os.dup2(saved_fds[1], 2)
+        os.close(saved_fds[0]); os.close(saved_fds[1])
+        fout.close()
+
+    return status
+
+
+def _step(plugin_file: str, stage: str, parameters: str, inject: Union[str, None], previous: Any) -> Any:
+    """
+    Internal function to run one plugin call of a chain. Script plugins hand their result
+    back by printing the path to a pickle. The pickle is loaded and, if it was written next
+    to the parameter pickle, removed. Their output is passed on to the log.
+
+    ### Parameters:
+    :param plugin_file: System file path to the plugin.
+    :param stage: Stage to pass to the plugin.
+    :param parameters: System file path to the pickled parameter dictionary.
+    :param inject: Key to store the result of the previous step under, or None.
+    :param previous: Result of the previous step.
+
+    ### Returns:
+    :return: Result of the step.
+    """
+    func = registry.handler(plugin_file, stage)
+    if func is not None:
+        params = handoff.resolve(joblib.load(parameters))
+        if inject is not None:
+            params[inject] = previous
+
+        return func(params)
+
+    if inject is not None:
+        params = joblib.load(parameters); params[inject] = previous
+        joblib.dump(params, parameters)
+
+    sys.stdout.flush()
+    saved_fd = os.dup(1)
+    output = tempfile.TemporaryFile(mode="w+t")
+    os.dup2(output.fileno(), 1)
+
+    saved_argv = sys.argv; saved_path = list(sys.path)
+    sys.argv = [plugin_file, stage, parameters]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(plugin_file)))
+
+    try:
+        runpy.run_path(plugin_file, run_name="__main__")
+
+    finally:
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+        sys.stdout.flush()
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+        output.seek(0)
+        lines = output.read()
+        output.close()
+        sys.stdout.write(lines)
+
+    pickle_path = result_pickle(lines)
+    if pickle_path is None:
+        return None
+
+    result = joblib.load(pickle_path)
+    if scratch(pickle_path, parameters):
+        os.remove(pickle_path)
+
+    return result
+
+
+def result_pickle(output: str) -> Union[str, None]:
+    """
+    Get the pickle a script plugin handed its result back with from the plugin's stdout.
+
+    ### Parameters:
+    :param output: Everything the plugin printed to stdout.
+
+    ### Returns:
+    :return: System file path to the pickle printed on the last line, or None if the plugin did not print one.
+    """
+    path = output.strip().split("\n")[-1]
+    return path if path.endswith(".pkl") and os.path.isfile(path) else None
+
+
+def scratch(pickle_path: str, parameters: str) -> bool:
+    """
+    Check if a result pickle was written next to the parameter pickle of the call, like
+    registry.main does, and can be removed once it has been read.
+
+    ### Parameters:
+    :param pickle_path: System file path to the result pickle.
+    :param parameters: System file path to the pickled parameter dictionary of the call.
+
+    ### Returns:
+    :return: True if the result pickle is a scratch file of the call; False if otherwise.
+    """
+    return os.path.dirname(os.path.abspath(pickle_path)) == os.path.dirname(os.path.abspath(parameters))
+
+
+def serve(request_fd: int, reply_fd: int) -> None:
+    """
+    Serve plugin calls sent by a worker node until the worker sends None or closes the pipe.
+    Requests are (steps, log_file) tuples as taken by call and every request is
+    answered with the exit status of the chain.
+
+    ### Parameters:
+    :param request_fd: File descriptor of the pipe requests are read from.
+    :param reply_fd: File descriptor of the pipe exit statuses are written to.
+    """
+    requests = Connection(request_fd, writable=False)
+    replies = Connection(reply_fd, readable=False)
+
+    while True:
+        try:
+            request = requests.recv()
+
+        except EOFError:
+            break
+
+        if request is None:
+            break
+
+        replies.send(call(*request))
+
+    requests.close(); replies.close()
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]), int(sys.argv[2]))
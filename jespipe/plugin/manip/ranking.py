@@ -0,0 +1,86 @@
+import os
+from typing import Callable, Tuple
+
+import numpy as np
+
+
+def slot_threads() -> int:
+    """
+    Get the number of threads a plugin may use. Jespipe sets it per slot from the
+    "threads_per_slot" setting of the "workers" block of the configuration file.
+
+    ### Returns:
+    :return: Number of threads, or -1 to use every core if the plugin runs outside of Jespipe.
+    """
+    return int(os.environ.get("JESPIPE_SLOT_THREADS", "0")) or -1
+
+
+def subsample(features: np.ndarray, labels: np.ndarray, rows: int, seed: int = 2020) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draw a random subsample of rows without replacement. Rows keep their order.
+
+    ### Parameters:
+    :param features: Features to subsample.
+    :param labels: Labels to subsample.
+    :param rows: Number of rows to draw. Datasets with no more rows are returned whole.
+    :param seed: Seed of the draw (default: 2020).
+
+    ### Returns:
+    :return: (features, labels)
+    - Positional value of each index in the tuple:
+      - 0: Subsampled features.
+      - 1: Subsampled labels.
+    """
+    if rows <= 0 or len(features) <= rows:
+        return features, labels
+
+    index = np.sort(np.random.RandomState(seed).choice(len(features), rows, replace=False))
+    return features[index], labels[index]
+
+
+def stable_selection(grow: Callable[[int], np.ndarray], select: Callable[[np.ndarray], np.ndarray],
+                     step: int, max_trees: int, patience: int = 2) -> Tuple[np.ndarray, int]:
+    """
+    Grow a tree ensemble step trees at a time until the features it selects stay the same
+    for patience consecutive steps or the ensemble holds max_trees trees.
+
+    ### Parameters:
+    :param grow: Function growing the ensemble to the given number of trees and returning its feature importances.
+    :param select: Function mapping feature importances to the indices of the selected features.
+    :param step: Number of trees added per step.
+    :param max_trees: Largest number of trees to grow.
+    :param patience: Number of consecutive steps the selection has to stay the same for (default: 2).
+
+    ### Returns:
+    :return: (selected, trees)
+    - Positional value of each index in the tuple:
+      - 0: Indices of the features selected by the last step.
+      - 1: Number of trees grown.
+    """
+    selected = None; stable = 0; trees = 0
+    while trees < max_trees:
+        trees = min(trees + step, max_trees)
+        current = select(grow(trees))
+        stable = stable + 1 if selected is not None and set(current) == set(selected) else 0
+        selected = current
+        if stable >= patience:
+            break
+
+    return selected, trees
+
+
+def compare(approximate: np.ndarray, exact: np.ndarray) -> dict:
+    """
+    Compare the features selected by an approximate mode with those selected by the exact mode.
+
+    ### Parameters:
+    :param approximate: Indices of the features selected by the approximate mode.
+    :param exact: Indices of the features selected by the exact mode.
+
+    ### Returns:
+    :return: Dictionary holding both selections, the features they share, and their Jaccard similarity.
+    """
+    approximate = set([int(i) for i in approximate]); exact = set([int(i) for i in exact])
+    union = approximate | exact
+    return {"approximate": sorted(approximate), "exact": sorted(exact), "shared": sorted(approximate & exact),
+            "jaccard": len(approximate & exact) / len(union) if len(union) > 0 else 1.0}
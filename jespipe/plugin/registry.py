@@ -0,0 +1,138 @@
+import ast
+import importlib.util
+import os
+import sys
+import uuid
+from typing import Any, Callable, Dict, Union
+
+import joblib
+
+from .start import start
+
+_modules = dict()
+
+
+def stage(name: str) -> Callable:
+    """
+    Register a function as the handler of a Jespipe stage. The handler is called with
+    the parameter dictionary sent by Jespipe. A manipulation handler returns the manipulated
+    DataFrame so that it can be handed straight to the training plugin.
+
+    ### Parameters:
+    :param name: Stage handled by the function. Supported stages are train|attack|clean.
+
+    ### Returns:
+    :return: Decorator registering the function.
+    """
+    def register(func: Callable) -> Callable:
+        func.jespipe_stage = name
+        return func
+
+    return register
+
+
+def handlers(module: Any) -> Dict[str, Callable]:
+    """
+    Find the stage handlers registered in a plugin module.
+
+    ### Parameters:
+    :param module: Plugin module to search.
+
+    ### Returns:
+    :return: Dictionary mapping each stage to its handler.
+    """
+    found = dict()
+    for value in vars(module).values():
+        if callable(value) and hasattr(value, "jespipe_stage"):
+            found[value.jespipe_stage] = value
+
+    return found
+
+
+def load(plugin_file: str) -> Any:
+    """
+    Import a plugin module without running its __main__ block. Every plugin is
+    only imported once per process.
+
+    ### Parameters:
+    :param plugin_file: System file path to the plugin.
+
+    ### Returns:
+    :return: Plugin module.
+    """
+    plugin_file = os.path.abspath(plugin_file)
+    if plugin_file in _modules:
+        return _modules[plugin_file]
+
+    # Plugins may import modules sitting next to them like they would as a script
+    spec = importlib.util.spec_from_file_location("jespipe_plugin_{}".format(len(_modules)), plugin_file)
+    module = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, os.path.dirname(plugin_file))
+    try:
+        spec.loader.exec_module(module)
+
+    finally:
+        sys.path.remove(os.path.dirname(plugin_file))
+
+    _modules[plugin_file] = module
+    return module
+
+
+def registers(plugin_file: str) -> bool:
+    """
+    Check if a plugin registers stage handlers. The plugin is parsed, not imported,
+    so script plugins doing their work at module level are not run by the check.
+
+    ### Parameters:
+    :param plugin_file: System file path to the plugin.
+
+    ### Returns:
+    :return: True if a module-level function is decorated with stage(...); False if otherwise.
+    """
+    fin = open(plugin_file, "rt"); tree = ast.parse(fin.read()); fin.close()
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            for decorator in node.decorator_list:
+                if isinstance(decorator, ast.Call) and ((isinstance(decorator.func, ast.Name) and decorator.func.id == "stage") or
+                                                        (isinstance(decorator.func, ast.Attribute) and decorator.func.attr == "stage")):
+                    return True
+
+    return False
+
+
+def handler(plugin_file: str, stage: str) -> Union[Callable, None]:
+    """
+    Get the handler a plugin registered for a stage.
+
+    ### Parameters:
+    :param plugin_file: System file path to the plugin.
+    :param stage: Stage to get the handler for.
+
+    ### Returns:
+    :return: Stage handler, or None if the plugin did not register one.
+    """
+    plugin_file = os.path.abspath(plugin_file)
+    if plugin_file not in _modules and registers(plugin_file) is False:
+        return None
+
+    return handlers(load(plugin_file)).get(stage)
+
+
+def main() -> None:
+    """
+    Run the handler registered for the stage passed on the command line. Meant to be
+    called from the __main__ block of a plugin that registers its stages. A value returned
+    by the handler is pickled next to the parameter pickle and the path to it is printed
+    to stdout in order to be captured by Jespipe.
+    """
+    stage, parameters = start()
+
+    func = handlers(sys.modules["__main__"]).get(stage)
+    if func is None:
+        raise ValueError("Received invalid stage {}. Please only pass valid stages from Jespipe.".format(stage))
+
+    result = func(parameters)
+    if result is not None:
+        pickle_path = os.path.dirname(os.path.abspath(sys.argv[2])) + "/" + str(uuid.uuid4()) + ".pkl"
+        joblib.dump(result, pickle_path)
+        print(pickle_path)
@@ -1,10 +1,16 @@
+import hashlib
 import json
 import os
+import shutil
+import uuid
 from typing import Any
 
 import joblib
+import numpy as np
 import pandas as pd
 
+from .attack.attack import StreamingAttack
+
 
 def features(file_path: str, object: Any) -> None:
     """
@@ -51,6 +57,38 @@ def pickle_object(file_path: str, name: str, object: Any) -> None:
     joblib.dump(object, file_path + "/{}.pkl".format(name))
 
 
+def windows(file_path: str, name: str, window_set: Any, chunk_windows: int = 4096) -> None:
+    """
+    Save the windows of a window set as a pickled array, exactly like pickle_object saves the
+    materialized windows. The windows are copied to a .npy file next to the pickle chunk by chunk
+    and pickled from the memory-mapped file, so at most chunk_windows windows are held in memory.
+
+    ### Parameters:
+    :param file_path: System location to save pickle file.
+    :param name: File name to use for the pickle file.
+    :param window_set: Window set created by jespipe.plugin.train.window.WindowSet.
+    :param chunk_windows: Number of windows copied at a time (default: 4096).
+    """
+    if os.path.exists(file_path) is False:
+        os.makedirs(file_path)
+
+    npy_file = file_path + "/.{}-{}.npy".format(name, uuid.uuid4())
+    try:
+        fout = np.lib.format.open_memmap(npy_file, mode="w+", dtype=window_set.data.dtype, shape=window_set.shape)
+        for start in range(0, len(window_set), chunk_windows):
+            fout[start:start + chunk_windows] = window_set[start:start + chunk_windows]
+
+        fout.flush()
+        del fout
+
+        # joblib writes arrays in fixed-size buffers, so only the pages being written are resident
+        pickle_object(file_path, name, np.asarray(np.load(npy_file, mmap_mode="r")))
+
+    finally:
+        if os.path.isfile(npy_file):
+            os.remove(npy_file)
+
+
 def adver_example(file_path: str, min_change: float, object: Any) -> None:
     """
     Save a generated adversarial example as a pickle.
@@ -67,6 +105,62 @@ def adver_example(file_path: str, min_change: float, object: Any) -> None:
     joblib.dump(object, file_path + "/{}.pkl".format(min_change))
 
 
+def adver_stream(file_path: str, attack: StreamingAttack, inputs: Any = None) -> None:
+    """
+    Save the adversarial examples of a streaming attack as they are generated. Batches are
+    written to one .npy file per change budget next to file_path, and the number of rows
+    completed is checkpointed after every batch. Calling adver_stream again after the attack
+    was killed resumes from the last completed batch. Once every row is written, each budget
+    is saved exactly like adver_example and the partial files are removed.
+
+    ### Parameters:
+    :param file_path: System location to save the adversarial example pickle files to.
+    :param attack: Streaming attack generating the adversarial examples.
+    :param inputs: JSON serializable inputs the adversarial examples depend on besides the budgets and shape,
+    such as the model file and the attack parameters. Checkpoints of other inputs are never resumed (default: None).
+    """
+    changes = attack.budgets(); shape = tuple(attack.shape())
+
+    # Checkpoints are only resumed by the same budgets, shape, and inputs
+    meta = json.dumps({"changes": [str(change) for change in changes], "shape": list(shape), "inputs": inputs}, sort_keys=True, default=str)
+    partial_path = file_path.rstrip("/") + ".partial/" + hashlib.sha1(meta.encode()).hexdigest()[:16]
+    progress_file = partial_path + "/progress.json"
+    os.makedirs(partial_path, exist_ok=True)
+
+    try:
+        fin = open(progress_file, "rt"); rows = int(json.loads(fin.read())["rows"]); fin.close()
+
+    except (OSError, ValueError, KeyError):
+        rows = 0
+
+    arrays = dict()
+    if rows > 0:
+        arrays = {change: np.lib.format.open_memmap(partial_path + "/{}.npy".format(change), mode="r+") for change in changes}
+
+    for batch in attack.stream(rows):
+        # The arrays take the dtype of the first batch
+        if arrays == dict():
+            arrays = {change: np.lib.format.open_memmap(partial_path + "/{}.npy".format(change), mode="w+",
+                                                        dtype=batch[change].dtype, shape=shape) for change in changes}
+
+        size = next(iter(batch.values())).shape[0]
+        for change in changes:
+            arrays[change][rows:rows+size] = batch[change]; arrays[change].flush()
+
+        rows += size
+        fout = open(progress_file + ".part", "wt"); fout.write(json.dumps({"rows": rows})); fout.close()
+        os.replace(progress_file + ".part", progress_file)
+
+    if rows != shape[0]:
+        raise ValueError("Streaming attack stopped after {} of {} rows.".format(rows, shape[0]))
+
+    for change in changes:
+        adver_example(file_path, change, np.asarray(arrays[change]) if change in arrays else np.zeros(shape, dtype=np.float32))
+
+    del arrays
+    shutil.rmtree(partial_path, ignore_errors=True)
+
+
 def compress_dataframe(file_path: str, name: str, dataset: pd.DataFrame) -> None:
     """
     Save a pandas DataFrame as a compressed .csv.gz file. Uses gzip compression
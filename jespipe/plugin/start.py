@@ -1,6 +1,8 @@
 import argparse
 import joblib
 
+from .handoff import resolve
+
 
 def start():
     """Pull two parameters from stdin; stage and parameters."""
@@ -9,8 +11,8 @@ def start():
     parser.add_argument("parameters", type=str)
     args = parser.parse_args()
 
-    # Load pickled parameter dictionary
-    params = joblib.load(args.parameters)
+    # Load pickled parameter dictionary and map in arrays shared through node-local storage
+    params = resolve(joblib.load(args.parameters))
 
     # Return tuple in the following format: (stage, parameters)
     return args.stage, params
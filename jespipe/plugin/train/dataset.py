@@ -0,0 +1,48 @@
+from typing import Any
+
+import numpy as np
+import tensorflow as tf
+
+from .window import WindowSet
+
+
+def window_dataset(features: WindowSet, labels: np.ndarray, batch_size: int, shuffle: bool = True,
+                   shuffle_buffer: int = 0, seed: int = 2020, dtype: Any = np.float32) -> tf.data.Dataset:
+    """
+    Build a tf.data dataset that windows the array of a window set on the fly. Only window
+    positions pass through the shuffle buffer; every batch of windows is then gathered from the
+    array by a parallel map and prefetched, so reading the next batches overlaps with training on
+    the current one. If the array is memory-mapped, only the pages of the batches in flight are resident.
+
+    ### Parameters:
+    :param features: Features as a window set.
+    :param labels: Labels of the windows in the set.
+    :param batch_size: Number of windows per batch.
+    :param shuffle: Shuffle the windows again at the start of every epoch (default: True).
+    :param shuffle_buffer: Number of window positions in the shuffle buffer. 0 shuffles every window of the set (default: 0).
+    :param seed: Seed of the shuffles (default: 2020).
+    :param dtype: Data type of the batches (default: np.float32).
+
+    ### Returns:
+    :return: Dataset of (features, labels) batches.
+    """
+    labels = np.asarray(labels)
+    x_shape = (None,) + tuple(features.shape[1:]); y_shape = (None,) + labels.shape[1:]
+    tf_dtype = tf.as_dtype(dtype)
+
+    def gather(batch: np.ndarray) -> tuple:
+        return features[batch].astype(dtype, copy=False), labels[batch].astype(dtype, copy=False)
+
+    def load(batch: tf.Tensor) -> tuple:
+        x, y = tf.numpy_function(gather, [batch], (tf_dtype, tf_dtype))
+        x.set_shape(x_shape); y.set_shape(y_shape)
+        return x, y
+
+    # Dataset.range keeps the positions out of the graph, unlike a constant holding every position
+    dataset = tf.data.Dataset.range(len(features))
+    if shuffle:
+        dataset = dataset.shuffle(shuffle_buffer if shuffle_buffer > 0 else max(1, len(features)),
+                                  seed=seed, reshuffle_each_iteration=True)
+
+    dataset = dataset.batch(batch_size).map(load, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
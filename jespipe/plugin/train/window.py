@@ -0,0 +1,148 @@
+from typing import Any, Callable, Tuple
+
+import numpy as np
+
+
+def windows(data: np.ndarray, seq_len: int) -> np.ndarray:
+    """
+    Get every sequence window of a 2-D array as a read-only strided view. No data is copied.
+
+    ### Parameters:
+    :param data: 2-D array of shape (rows, columns).
+    :param seq_len: Number of consecutive rows in a window.
+
+    ### Returns:
+    :return: View of shape (rows - seq_len + 1, seq_len, columns) where window i holds rows i to i + seq_len - 1.
+    """
+    data = np.asarray(data)
+    count = max(0, data.shape[0] - seq_len + 1)
+    return np.lib.stride_tricks.as_strided(data, shape=(count, seq_len) + data.shape[1:],
+                                           strides=(data.strides[0],) + data.strides, writeable=False)
+
+
+def spill(data: np.ndarray, file_path: str, transform: Callable[[np.ndarray], np.ndarray] = None, chunk_rows: int = 65536) -> np.ndarray:
+    """
+    Copy a 2-D array to a .npy file chunk by chunk and map the file back in read-only, so
+    windows can be taken from arrays larger than memory. At most one chunk is resident at a time.
+
+    ### Parameters:
+    :param data: 2-D array to copy. Memory-mapped arrays and DataFrames are read chunk by chunk.
+    :param file_path: System file path to the .npy file to write.
+    :param transform: Function applied to every chunk before it is written, e.g. the transform of a fitted scaler (default: None).
+    :param chunk_rows: Number of rows per chunk (default: 65536).
+
+    ### Returns:
+    :return: Read-only memory-mapped array holding the copied data.
+    """
+    fout = np.lib.format.open_memmap(file_path, mode="w+", dtype=np.float64, shape=tuple(data.shape))
+    for start in range(0, data.shape[0], chunk_rows):
+        # DataFrames are sliced by position so that only the chunk is converted to an array
+        chunk = data.iloc[start:start + chunk_rows] if hasattr(data, "iloc") else data[start:start + chunk_rows]
+        chunk = np.asarray(chunk, dtype=np.float64)
+        fout[start:start + chunk_rows] = chunk if transform is None else transform(chunk)
+
+    fout.flush()
+    del fout
+    return np.load(file_path, mmap_mode="r")
+
+
+def shuffle_split(count: int, train_size: float = 0.85, seed: int = 2020) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Shuffle and split window indices instead of the windows themselves. The permutation is the
+    same one np.random.seed(seed) followed by np.random.shuffle produces on an array of count rows.
+
+    ### Parameters:
+    :param count: Number of windows.
+    :param train_size: Fraction of the windows used for training (default: 0.85).
+    :param seed: Seed of the shuffle (default: 2020).
+
+    ### Returns:
+    :return: (train_index, test_index)
+    - Positional value of each index in the tuple:
+      - 0: Indices of the training windows.
+      - 1: Indices of the test windows.
+    """
+    index = np.arange(count)
+    np.random.RandomState(seed).shuffle(index)
+    split = int(count * train_size)
+    return index[:split], index[split:]
+
+
+def labels(data: np.ndarray, seq_len: int, index: np.ndarray, column: int = -1) -> np.ndarray:
+    """
+    Get the label of every window, taken from a column of the last row of the window.
+
+    ### Parameters:
+    :param data: 2-D array the windows are taken from.
+    :param seq_len: Number of consecutive rows in a window.
+    :param index: Indices of the windows.
+    :param column: Column holding the label (default: -1).
+
+    ### Returns:
+    :return: Array holding the label of every window in the order of index.
+    """
+    return np.asarray(data)[np.asarray(index) + seq_len - 1, column]
+
+
+class WindowSet:
+    def __init__(self, data: np.ndarray, seq_len: int, index: np.ndarray, columns: slice = slice(None)) -> None:
+        """
+        Window set class to facilitate handing a subset of the sequence windows of an array to a model
+        without materializing them. Only the array and the window indices are held in memory, and
+        windows are copied out one batch at a time. Pickling a window set stores the array once
+        instead of every window.
+
+        ### Parameters:
+        :param data: 2-D array the windows are taken from.
+        :param seq_len: Number of consecutive rows in a window.
+        :param index: Indices of the windows in the set.
+        :param columns: Columns of the array to keep in every window (default: every column).
+
+        ### Methods:
+        - public
+          - shape: Shape of the set as if it were materialized.
+          - batch: Materialize some windows of the set.
+        """
+        self.data = np.asarray(data)
+        self.seq_len = seq_len
+        self.index = np.asarray(index)
+        self.columns = columns
+
+    def __len__(self) -> int:
+        """Number of windows in the set."""
+        return len(self.index)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        """Materialize the windows selected by an integer, slice, or index array into the set."""
+        index = self.index[key]
+        if np.ndim(index) == 0:
+            return self.batch(np.asarray([index]))[0]
+
+        return self.batch(index)
+
+    def __array__(self, dtype: Any = None) -> np.ndarray:
+        """Materialize every window of the set, e.g. for np.asarray."""
+        result = self.batch(self.index)
+        return result if dtype is None else result.astype(dtype, copy=False)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """
+        Shape of the set as if it were materialized.
+
+        ### Returns:
+        :return: (windows, seq_len, columns)
+        """
+        return (len(self.index), self.seq_len, len(range(self.data.shape[1])[self.columns]))
+
+    def batch(self, index: np.ndarray) -> np.ndarray:
+        """
+        Materialize some windows of the set.
+
+        ### Parameters:
+        :param index: Indices of the windows to materialize, as indices into the array the windows are taken from.
+
+        ### Returns:
+        :return: Array of shape (len(index), seq_len, columns).
+        """
+        return windows(self.data, self.seq_len)[index][:, :, self.columns]
@@ -1,6 +1,5 @@
 import copy
 import json
-import logging
 import os
 import re
 import shutil
@@ -10,14 +9,11 @@ import time
 import warnings
 from decimal import Decimal
 
-import joblib
 from mpi4py import MPI
-from tqdm import tqdm
 
 import utils.filesystem.getpaths as gp
-from utils.workerops.paramfactory import (attack_factory, attack_train_factory,
-                                          clean_factory, manip_factory,
-                                          train_factory)
+from utils.workerops import scattershot as sst
+from utils.workerops.worker import Worker
 
 # Deactivate warnings from Python unless requested at command line
 if not sys.warnoptions:
@@ -39,16 +35,21 @@ if rank == 0:
     # Imports only necessary for manager node
     import argparse
 
+    import joblib
     from colorama import Fore, Style, init
 
     from utils.appinfo.licenseinfo import licenseinfo
     from utils.appinfo.versioninfo import versioninfo
+    from utils.filesystem import checksum
     from utils.managerops import xml2dict as x2d
     from utils.managerops.compress import Compression
+    from utils.managerops.costmodel import CostModel
+    from utils.managerops.manifest import RunManifest
+    from utils.managerops.taskgraph import TaskGraph
     from utils.managerops.unwrap import unwrap_attack, unwrap_train
     from utils.workeradmin import greenlight as gl
-    from utils.workeradmin import skip
-    from utils.workerops import scattershot as sst
+    from utils.workerops.manipcache import from_config
+    from utils.workerops.pluginhost import shardable
 
 
     # Initialize colorama and define lambda functions
@@ -71,6 +72,7 @@ if rank == 0:
     parser.add_argument("--license", action="store_true", default=False, help="Print Jespipe licensing info.")
     parser.add_argument("-s", "--silent", action="store_true", default=False, help="Silence all output from Jespipe.")
     parser.add_argument("-np", "--noprogress", action="store_true", default=False, help="Activate or deactivate progress bars (default: False).")
+    parser.add_argument("-f", "--fresh", action="store_true", default=False, help="Rerun every directive even if its outputs are up to date (default: False).")
     parser.add_argument("-V", "--version", action="store_true", default=False, help="Print Jespipe version info.")
     parser.add_argument("xml_control_file", nargs="?", default=None)
     args = parser.parse_args()
@@ -157,16 +159,23 @@ if rank == 0:
     # Create directory for processes to write temporary files to
     os.makedirs("data/.tmp", exist_ok=True)
 
-    # Begin execution the stages for the pipeline. Inform workers they are ready to start!
-    gl.killmsg(comm, size, False)
-    print_good("Preprocessing stage complete!")
+    # Load runtime history of previous directives to place the longest tasks first
+    cost_model = CostModel(ROOT_PATH + "/data/.logs/task-history.json")
 
-    # TRAIN: launch training stage of the pipeline
-    if train_control is not None:
-        print_status("Launching training stage.")
+    # Directives from every stage go into one task graph. Each directive only waits on the
+    # directives that produce its own inputs, so the stages overlap instead of running back to back.
+    task_graph = TaskGraph()
+    train_nodes = dict()
+
+    # Fingerprints of the inputs of previous runs let directives whose outputs are still valid be skipped
+    manifest = RunManifest(ROOT_PATH + "/data/.logs/run-manifest.json")
+    fingerprints = dict()
+    model_fingerprints = dict()
+    up_to_date = set()
 
-        # Broadcast out to workers that we are now operating on the training stage
-        skip.skip_train(comm, size, False)
+    # TRAIN: stage training directives of the pipeline
+    if train_control is not None:
+        print_status("Staging training directives.")
 
         print_info("Unwrapping train control dictionary.")
         train_macro_list = unwrap_train(train_control)
@@ -218,43 +227,71 @@ if rank == 0:
         # Create directives for the worker nodes
         print_info("Generating directive list for worker nodes.")
         train_directive_list = sst.generate_train(train_macro_list)
-        sliced_directive_list = sst.slice(train_directive_list, size)
-
-        # Broadcast that everything is good to go for the training stage
-        gl.killmsg(comm, size, False)
-
-        print_info("Sending tasks to workers.")
-        # Send greenlight to workers and then follow up with tasks
-        node_rank = sst.delegate(comm, size, sliced_directive_list)
-
-        print_info("Blocking until all workers complete training tasks.")
-        print_dim_info("Warning: This procedure may take a few minutes to a couple hours to complete depending " +
-            "on the complexity of your data, architecture of your model(s), number of models to train, etc.")
-        
-        # Block until manager hears back from all workers
-        node_status = list()
-        for node in tqdm(node_rank, desc="Model training task completion progress", disable=args.noprogress):
-            node_status.append(comm.recv(source=node, tag=node))
 
-        print_good("Training stage complete!")
+        # Fingerprint the inputs of every model directory. A directory is only retrained if the
+        # inputs of one of its models changed since its last successful training or its model is missing
+        train_keys = dict()
+        for directive in train_directive_list:
+            if directive[7] is not None:
+                model_root = ROOT_PATH + "/data/" + directive[0] + "/models/" + directive[7]
+                manip_digest = checksum.filedigest(directive[8]) if directive[8] is not None else None
+                fingerprints[manifest.key("train", directive)] = manifest.fingerprint([checksum.filedigest(directive[1]), checksum.filedigest(directive[5]),
+                                                                                       directive[3], directive[4], directive[6], manip_digest, directive[9]])
+                train_keys.setdefault(model_root, []).append(manifest.key("train", directive))
+
+        for model_root, keys in train_keys.items():
+            # Ordered by key like RunManifest.family, so attack-only runs rebuild the same list
+            model_fingerprints[model_root] = [fingerprints[key] for key in sorted(keys)]
+            if args.fresh is False and gp.getmodels(model_root, format=".h5") != [] and \
+                    all([manifest.valid(key, fingerprints[key], [model_root]) for key in keys]):
+                up_to_date.add(model_root)
+
+        train_directive_list = [directive for directive in train_directive_list if directive[7] is None or
+                                ROOT_PATH + "/data/" + directive[0] + "/models/" + directive[7] not in up_to_date]
+        print_info("Skipping {} model directories whose models are up to date.".format(len(up_to_date)))
+
+        # Key each manipulation by its content so models trained on the same manipulated dataset share one result
+        manip_cache = from_config(config, ROOT_PATH)
+        manip_keys = [manip_cache.key(directive[1], directive[8], directive[9]) if directive[8] is not None else None
+                        for directive in train_directive_list]
+        manip_nodes = dict()
+
+        for directive, key in zip(train_directive_list, manip_keys):
+            directive = directive + (key,)
+
+            # Manipulations shared by several models run once ahead of training unless they are already cached
+            upstream = list()
+            if key is not None and manip_keys.count(key) > 1 and manip_cache.has(key) is False:
+                if key not in manip_nodes:
+                    manip_nodes[key] = task_graph.add(("manip", directive))
+
+                upstream.append(manip_nodes[key])
+
+            node = task_graph.add(("train", directive), upstream)
+
+            # Track which directives produce each model directory so attacks can wait on them
+            if directive[7] is not None:
+                model_root = ROOT_PATH + "/data/" + directive[0] + "/models/" + directive[7]
+                train_nodes.setdefault(model_root, []).append(node)
+                manifest.schedule(manifest.key("train", directive), fingerprints[manifest.key("train", directive)])
+
+                # Create model directory up front so later stages can resolve it before training completes
+                os.makedirs(model_root, exist_ok=True)
+
+        print_good("Training directives staged!")
 
     else:
         print_status("Skipping training stage.")
-        # Broadcast out to workers that manager is skipping the training stage
-        skip.skip_train(comm, size, True)
 
-    # ATTACK: launch attack stage of the pipeline
+    # ATTACK: stage attack directives of the pipeline
     if attack_control is not None:
-        print_status("Launching attack stage.")
-
-        # Broadcast out to workers that we are now operating on the attack stage
-        skip.skip_attack(comm, size, False)
+        print_status("Staging attack directives.")
 
         attack_macro_list = unwrap_attack(attack_control)
 
         # Loop through attack_macro_list:
         # - Convert relative paths to absolute paths
-        # - Verify that trained models exist (use autodetection)
+        # - Verify that trained models exist or are being trained (use autodetection)
         # - Verify that mentioned dataset and plugins exist
         print_info("Converting relative file paths to absolute paths.")
         print_info("Checking that file paths to dataset(s) and plugin(s) are valid.")
@@ -290,23 +327,26 @@ if rank == 0:
                             gl.killmsg(comm, size, True)
                             raise FileNotFoundError(Fore.RED + "The model plugin {} is not found. Please verify that you are using the correct file path.".format(attack[1][param]["model_plugin"]))
 
-            # Check if models exist
-            if os.path.exists("data/" + macro[0] + "/models") is False:
-                gl.killmsg(comm, size, True)
-                raise FileNotFoundError(Fore.RED + "Model(s) not found. Please verify that models are stored in data/{}/models.".format(macro[0]))
-
-            # If models do exist, autodetect the .h5 files and add to macro list
+            # Autodetect the .h5 files of models that are not retrained in this run
             print_info("Auto-detecting models for dataset {}.".format(macro[0]))
-            model_list = gp.getmodels(ROOT_PATH + "/data/" + macro[0] + "/models", format=".h5")
-
-            # Loop through the model list and pull the model names
-            model_names = list()
-            for model in model_list:
+            model_list = list()
+            for model in gp.getmodels(ROOT_PATH + "/data/" + macro[0] + "/models", format=".h5"):
                 tmp = model.split("/models/"); tmp = tmp[-1].split("/")
                 model_name = tmp[0]
-                model_names.append(model_name)
+                model_root = os.path.dirname(model)
+                if model_root not in train_nodes:
+                    model_list.append((model, model_name, model_root))
+
+            # Add models being trained in this run. Their .h5 file is resolved by the worker once training completes
+            for model_root in train_nodes:
+                if model_root.startswith(ROOT_PATH + "/data/" + macro[0] + "/models/"):
+                    model_list.append((None, os.path.basename(model_root), model_root))
+
+            # Check if models exist
+            if model_list == []:
+                gl.killmsg(comm, size, True)
+                raise FileNotFoundError(Fore.RED + "Model(s) not found. Please verify that models are stored in data/{}/models.".format(macro[0]))
 
-            model_list = list(zip(model_list, model_names))
             macro.append(model_list)
 
             attack_macro_list[i] = tuple(macro)
@@ -319,7 +359,11 @@ if rank == 0:
         attack_directive_list = sst.generate_attack(attack_macro_list)
         
         # Loop through directive list and generate more directives based on the change step
-        adver_example_directive_list = list()
+        skipped_attacks = 0
+
+        # Attacks that support it can be split into at most attack_shards row shards of the test features; 0 turns sharding off
+        attack_shards = int(config.get("workers", dict()).get("attack_shards", 0))
+
         for directive in attack_directive_list:
             max_change = Decimal(str(directive[6]["max_change"]))
             min_change = Decimal(str(directive[6]["min_change"]))
@@ -333,98 +377,143 @@ if rank == 0:
             # Convert decimal values back to float values                
             change_values = [float(i) for i in tmp_list]
 
-            # Expand directive list using change values
+            # Attacks on a model inherit the fingerprint of its training. Models trained outside of
+            # the manifest are identified by the content of their model file instead
+            if directive[9] not in model_fingerprints:
+                model_fingerprints[directive[9]] = manifest.family("train|" + directive[0] + "|" + directive[8] + "|")
+                if model_fingerprints[directive[9]] == [] and directive[7] is not None:
+                    model_fingerprints[directive[9]] = [checksum.filedigest(directive[7])]
+
+            attack_inputs = [model_fingerprints[directive[9]], checksum.filedigest(directive[1]), checksum.filedigest(directive[4]), directive[2]]
+            adver_path = ROOT_PATH + "/data/" + directive[0] + "/adver_examples/" + directive[3] + "/" + directive[8]
+
+            # One attack directive covers every change budget of an (attack, model) pair so the
+            # attack plugin loads the model and computes the benign predictions once
+            attack_direct = copy.deepcopy(directive); attack_direct = list(attack_direct)
+            del attack_direct[6]["max_change"]; del attack_direct[6]["min_change"]; del attack_direct[6]["change_step"]
+
+            # Adaptive attacks search the budget grid in one task that alternates between attacking and
+            # evaluating the model, so only the budgets needed to resolve the metric curve are generated
+            if "adaptive_tolerance" in attack_direct[6]:
+                attack_direct[6].update({"changes": change_values})
+                key = manifest.key("search", attack_direct)
+                fingerprint = manifest.fingerprint(attack_inputs + [checksum.filedigest(directive[5]), attack_direct[6]])
+                if args.fresh is False and directive[9] not in train_nodes and \
+                        manifest.valid(key, fingerprint, [directive[9] + "/stat"]):
+                    skipped_attacks += 1
+                    continue
+
+                manifest.schedule(key, fingerprint)
+                task_graph.add(("search", tuple(attack_direct)), train_nodes.get(directive[9], []))
+                continue
+
+            # Skip budgets whose adversarial examples were generated from the same model and attack
+            changes = list()
+            adver_fingerprints = list()
             for change in change_values:
-                tmp_direct = copy.deepcopy(directive); tmp_direct = list(tmp_direct)
-                del tmp_direct[6]["max_change"]; del tmp_direct[6]["min_change"]; del tmp_direct[6]["change_step"]
-                tmp_direct[6].update({"change": change})
-                adver_example_directive_list.append(tuple(tmp_direct))
-
-        sliced_directive_list = sst.slice(adver_example_directive_list, size)
-        
-        # Broadcast that everything is good to go to the worker nodes
-        gl.killmsg(comm, size, False)
+                key = manifest.key("attack", attack_direct, change)
+                fingerprint = manifest.fingerprint(attack_inputs + [dict(attack_direct[6], change=change)])
+                adver_fingerprints.append(fingerprint)
+                if args.fresh is False and directive[9] not in train_nodes and \
+                        manifest.valid(key, fingerprint, [adver_path + "/{}.pkl".format(change)]):
+                    continue
+
+                manifest.schedule(key, fingerprint)
+                changes.append(change)
+
+            # Attacks wait on the training of their model
+            adver_nodes = list()
+            if changes != []:
+                attack_direct[6].update({"changes": changes})
+                # Shards are made of whole batches, so an attack never gets more shards than batches. The batches
+                # are only known once the test features exist, so models trained in this run are not sharded
+                shard_count = 1
+                if attack_shards > 1 and directive[9] not in train_nodes and "batch_size" in attack_direct[6] and shardable(directive[4]):
+                    feature_file = gp.gettestfeat(directive[9], feature_file="test_features.pkl")
+                    if feature_file is not None:
+                        rows = len(joblib.load(feature_file, mmap_mode="r"))
+                        shard_count = min(attack_shards, -(-rows // attack_direct[6]["batch_size"]))
+
+                if shard_count > 1:
+                    # Every shard runs on its own worker and the merge concatenates them back in shard order
+                    shard_nodes = [task_graph.add(("attack", tuple(attack_direct) + ((i, shard_count),)), train_nodes.get(directive[9], []))
+                                   for i in range(shard_count)]
+                    adver_nodes.append(task_graph.add(("merge", tuple(attack_direct) + (shard_count,)), shard_nodes))
 
-        print_info("Sending adversarial example generation tasks to workers.")
-        # Follow greenlight up with task list
-        node_rank = sst.delegate(comm, size, sliced_directive_list)
-
-        print_info("Blocking until all workers complete adversarial example generation tasks.")
-        print_dim_info("Warning: This procedure may take a few minutes to a couple hours to complete depending " +
-            "on the complexity of your attack, batch size of your attack, number of attacks, etc.")
-        
-        # Block until manager hears back from all workers
-        node_status = list()
-        for node in tqdm(node_rank, desc="Adversarial example generation task completion progress", disable=args.noprogress):
-            node_status.append(comm.recv(source=node, tag=node))
+                else:
+                    adver_nodes.append(task_graph.add(("attack", tuple(attack_direct)), train_nodes.get(directive[9], [])))
 
-        print_info("Generating model evaluation directive list for worker nodes.")
-        sliced_directive_list = sst.slice(attack_directive_list, size)
-        print_info("Sending model evaluation directive list to worker nodes.")
-        node_rank = sst.delegate(comm, size, sliced_directive_list)
+            # Each evaluation waits on every adversarial example generated for its model
+            key = manifest.key("evaluate", directive)
+            fingerprint = manifest.fingerprint([model_fingerprints[directive[9]], checksum.filedigest(directive[5]), adver_fingerprints])
+            if args.fresh is False and adver_nodes == [] and directive[9] not in train_nodes and \
+                    manifest.valid(key, fingerprint, [directive[9] + "/stat"]):
+                skipped_attacks += 1
+                continue
 
-        print_info("Blocking until all workers complete model evaluation tasks.")
-        print_dim_info("Warning: This procedure may take a few minutes to a couple hours to complete depending " +
-            "on the number of models, size of adversarial examples, number of adversarial examples, etc.")
+            manifest.schedule(key, fingerprint)
+            task_graph.add(("evaluate", directive), adver_nodes)
 
-        # Block until manager hears back from all workers
-        node_status = list()
-        for node in tqdm(node_rank, desc="Model evaluation task completion progress", disable=args.noprogress):
-            node_status.append(comm.recv(source=node, tag=node))
+        print_info("Skipping {} attacks whose adversarial examples and evaluations are up to date.".format(skipped_attacks))
 
-        print_good("Attack stage complete!")
+        print_good("Attack directives staged!")
 
     else:
         print_status("Skipping attack stage.")
-        # Broadcast out to workers that manager is skipping the attack stage
-        skip.skip_attack(comm, size, True)
 
-    # CLEAN: launch cleaning stage of the pipeline
+    # CLEAN: stage plotting directives of the pipeline
+    if clean_control is not None and clean_control["plot"] is not None:
+        print_status("Staging cleaning directives.")
+
+        print_info("Checking that file paths to plugin(s) are valid.")
+        # Loop through plot keys and convert relative paths to absolute paths
+        for key in clean_control["plot"]:
+            if os.path.isabs(clean_control["plot"][key]["plugin"]) is False:
+                clean_control["plot"][key]["plugin"] = os.path.abspath(clean_control["plot"][key]["plugin"])
+
+            # Check if path to the plugin is valid
+            if os.path.isfile(clean_control["plot"][key]["plugin"]) is False:
+                gl.killmsg(comm, size, True)
+                raise FileNotFoundError(Fore.RED + "The plugin {} is not found. Please verify that you are using the correct file path.".format(
+                    clean_control["plot"][key]["plugin"]))
+
+        # Create plot directory to save plots
+        print_info("Creating directory to save plots.")
+        os.makedirs("data/plots", exist_ok=True)
+
+        print_info("Generating directive list for worker nodes.")
+        # Plots read the logs of every trained and evaluated model, so they wait on every other directive
+        upstream = list(range(len(task_graph)))
+        clean_directive_list = sst.generate_clean(clean_control["plot"], ROOT_PATH + "/data/plots", ROOT_PATH + "/data")
+        for directive in clean_directive_list:
+            task_graph.add(("clean", directive), upstream)
+
+        print_good("Cleaning directives staged!")
+
+    # Begin execution of the pipeline. Inform workers they are ready to start!
+    gl.killmsg(comm, size, False)
+    print_good("Preprocessing stage complete!")
+
+    print_status("Launching pipeline.")
+    print_info("Serving tasks to workers on request as soon as their upstream tasks complete.")
+    print_dim_info("Warning: This procedure may take a few minutes to several hours to complete depending " +
+        "on the complexity of your data, number of models to train, number of attacks, number of plots, etc.")
+
+    # Block until every directive has been pulled and completed by the workers
+    task_graph.prioritize(lambda payload: cost_model.predict(payload[0], payload[1]))
+    manifest.save()
+    sst.dispatch(comm, size, task_graph, desc="Pipeline task completion progress", disable=args.noprogress,
+                    callback=lambda payload, seconds: cost_model.record(payload[0], payload[1], seconds),
+                    success=lambda payload: manifest.complete(payload[0], payload[1]),
+                    skip=lambda payload, skipped: print_bad("Skipping {} directives downstream of failed {} directive: {}".format(
+                        len(skipped), payload[0], ", ".join([directive[0] for directive in skipped]))))
+    cost_model.save()
+    print_good("Pipeline tasks complete!")
+
+    # CLEAN: tidy up the data directory once every directive has completed
     if clean_control is not None:
         print_status("Launching cleaning stage.")
 
-        # Broadcast out to workers that we are now operating on the cleaning stage
-        skip.skip_clean(comm, size, False)
-
-        if clean_control["plot"] is not None:
-            print_info("Checking that file paths to plugin(s) are valid.")
-            # Loop through plot keys and convert relative paths to absolute paths
-            for key in clean_control["plot"]:
-                if os.path.isabs(clean_control["plot"][key]["plugin"]) is False:
-                    clean_control["plot"][key]["plugin"] = os.path.abspath(clean_control["plot"][key]["plugin"])
-
-                # Check if path to the plugin is valid
-                if os.path.isfile(clean_control["plot"][key]["plugin"]) is False:
-                    raise FileNotFoundError(Fore.RED + "The plugin {} is not found. Please verify that you are using the correct file path.".format(
-                        clean_control["plot"][key]["plugin"]))
-
-            # Create plot directory to save plots
-            print_info("Creating directory to save plots.")
-            os.makedirs("data/plots", exist_ok=True)
-
-            print_info("Generating directive list for worker nodes.")
-            # Generate and slice directive list that will be sent out to the workers
-            clean_directive_list = sst.generate_clean(clean_control["plot"], ROOT_PATH + "/data/plots", ROOT_PATH + "/data")
-            sliced_directive_list = sst.slice(clean_directive_list, size)
-            
-            # Send greenlight to workers
-            gl.killmsg(comm, size, False)
-
-            print_info("Sending tasks to workers.")
-            # Delegate tasks out to the available workers in the COMM_WORLD
-            node_rank = sst.delegate(comm, size, sliced_directive_list)
-
-            print_info("Blocking until all workers complete plotting tasks.")
-            print_dim_info("Warning: This procedure may take some time to complete depending on how many plots are being generated, " +
-                "complexity of the data being anaylzed, format of the plot, etc.")
-            # Block until hearing back from all the worker nodes
-            node_status = list()
-            for node in tqdm(node_rank, desc="Data plotting task completion progress", disable=args.noprogress):
-                node_status.append(comm.recv(source=node, tag=node))
-
-        else:
-            gl.killmsg(comm, size, True)
-
         if clean_control["clean_tmp"] == 1:
             print_info("Deleting data/.tmp directory.")
             shutil.rmtree("data/.tmp", ignore_errors=True)
@@ -484,8 +573,6 @@ if rank == 0:
 
     else:
         print_status("Skipping cleaning stage.")
-        # Broadcast out to workers that manager is skipping the cleaning stage
-        skip.skip_clean(comm, size, True)
 
     print_good("Jespipe has completed!")
 
@@ -493,1586 +580,7 @@ if rank == 0:
         # Reset stdout and stderr back to their original values
         sys.stdout = stdout_bak; sys.stderr = stderr_bak
 
-elif rank == 1:
-    greenlight = comm.recv(source=0, tag=1)
-    if greenlight != 1:
-        exit(127)
-
-    # After getting greenlight, create logger for node
-    os.makedirs("data/.logs/worker-1", exist_ok=True)
-    logger = logging.getLogger("worker-1-logger")
-    f_handler = logging.FileHandler("data/.logs/worker-1/{}.log".format(TIME))
-    logger.addHandler(f_handler)
-    logger.warning("INFO: Received greenlight message {} from manager node. Begin execution.".format(greenlight))
-
-    # TRAINING STAGE
-    skip_stage_training = comm.recv(source=0, tag=1)
-
-    if skip_stage_training != 1:
-        logger.warning("INFO: Waiting for greenlight to start training stage.")
-        
-        training_greenlight = comm.recv(source=0, tag=1)
-        if training_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for training stage. Aborting execution.".format(training_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model training stage.".format(training_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=1)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-        
-        # Check if task list sent is empty. If so, return message to the manager
-        if task_list != []:
-            # Loop through each of the tasks and perform necessary data manipulations
-            for task in task_list:
-                logger.warning("INFO: Beginning training of model {} using directive list {}.".format(task[2], task))
-
-                # Check if task[6], task[7], task[8], or task[9] is None
-                # If so, skip execution and tell user they need to mention something.
-                if task[6] is None or task[7] is None or task[8] is None or task[9] is None:
-                    logger.warning("ERROR: Skipping model {} because no manipulation was specified " +
-                                    "Please use the tag <vanilla tag='default1' /> or something similiar " +
-                                    "in your control file.")
-                    pass
-
-                else:
-                    manip_save_path = ROOT_PATH + "/data/" + task[0] + "/maniped_data"
-                    if os.path.exists(manip_save_path) is False:
-                        os.makedirs(manip_save_path, exist_ok=True)
-
-                    logger.warning("INFO: Using {} on dataset {} with parameters {}.".format(task[6], task[0], task[9]))
-
-                    # Perform data manipulation using manipulation plugin
-                    param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, ROOT_PATH + "/data/.tmp", ROOT_PATH)
-                    maniped_pickle = subprocess.getoutput("{} {} {} {}".format(PYTHON_PATH, task[8], "train", param_dict))
-
-                    # Created special directory for each individual manipulation
-                    save_path = ROOT_PATH + "/data/" + task[0] + "/models/" + task[7]
-                    if os.path.exists(save_path):
-                        shutil.rmtree(save_path, ignore_errors=True)
-
-                    os.makedirs(save_path, exist_ok=True)
-
-                    # Create dictionary that will be passed to the training plugin
-                    param_dict = train_factory(task[0], task[1], task[2], joblib.load(maniped_pickle), task[4], task[9], save_path, task[6], task[7], ROOT_PATH)
-
-                    # Spawn plugin execution and block until the training section of the plugin has completed
-                    logger.warning("INFO: Training model...")
-                    file_output = "data/.logs/worker-1/{}-{}-{}-{}.log".format(TIME, task[2], task[6], task[7])
-                    logger.warning("INFO: Saving output of {} for model {} to logfile {}.".format(task[5], task[2], file_output))
-
-                    # Open a file that the training plugin can use for stdout and stderr
-                    fout = open(file_output, "wt")
-
-                    try:
-                        subprocess.run([PYTHON_PATH, task[5], "train", param_dict], stdout=fout, stderr=fout)
-
-                    except subprocess.SubprocessError:
-                        logger.warning("ERROR: Build for model {} failed. Please review logfile {} for error diagnostics.".format(task[2], file_output))
-
-                    # Close the file the plugin is using to log stdout and stderr
-                    fout.close()
-
-            comm.send(1, dest=0, tag=1)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=1)
-
-    else:
-        logger.warning("WARNING: Skipping training stage of pipeline.")
-
-    # ATTACK STAGE
-    skip_stage_attack = comm.recv(source=0, tag=1)
-
-    if skip_stage_attack != 1:
-        logger.warning("INFO: Waiting for greenlight to start attack stage.")
-        
-        attack_greenlight = comm.recv(source=0, tag=1)
-        if attack_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for attack stage. Aborting execution.".format(attack_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model attack stage.".format(attack_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=1)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Generate adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning adversarial attack on model {} with attack {}".format(task[7], task[2]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Get change value
-                change = task[6]["change"]
-
-                logger.warning("INFO: Generating adversial example with minimum change set to {}.".format(change))
-
-                # Open file that the attack plugin can use as a log file
-                file_output = "data/.logs/worker-1/{}-attack-{}-{}-{}-{}.log".format(TIME, task[2], task[3], model_name, change)
-                logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
-                fout = open(file_output, "wt")
-
-                test_features = gp.gettestfeat(task[9], feature_file="test_features.pkl")
-                attack_param = attack_factory(task[3], task[7], task[8], joblib.load(test_features), task[6], 
-                                                ROOT_PATH + "/data/" + task[0] + "/adver_examples", ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[4], "attack", attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Attack on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the attack plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=1)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=1)
-
-        # Receive second task list from manager
-        task_list = comm.recv(source=0, tag=1)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Evaluate model using adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning evaluation of model {} using adversarial examples.".format(task[7]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Open file that the training plugin can use as a log file during evaluation
-                file_output = "data/.logs/worker-1/{}-eval-{}-{}-{}.log".format(TIME, task[2], task[3], model_name)
-                logger.warning("INFO: Saving output of {} evaluation logfile {}.".format(task[7], file_output))
-                fout = open(file_output, "wt")
-
-                adver_examples = gp.getfiles(ROOT_PATH + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8])
-                test_labels = gp.gettestlabel(task[9], label_file="test_labels.pkl")
-                train_attack_param = attack_train_factory(adver_examples, task[3], joblib.load(test_labels), 
-                                                            task[9] + "/stat", task[7], ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[5], "attack", train_attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Evaluation for model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the training plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=1)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=1)
-
-    else:
-        logger.warning("WARNING: Skipping attack stage of pipeline.")
-
-    # CLEANING STAGE
-    skip_clean_stage = comm.recv(source=0, tag=1)
-
-    if skip_clean_stage != 1:
-        logger.warning("INFO: Waiting for greenlight to start cleaning stage.")
-
-        cleaning_greenlight = comm.recv(source=0, tag=1)
-        if cleaning_greenlight != 1:
-            # 0 message means worker is not needed any more
-            logger.warning("WARNING: Received greenlight message {} for cleaning stage. Aborting execution.".format(cleaning_greenlight))
-            exit(0)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of cleaning stage.".format(cleaning_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=1)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            logger.warning("INFO: Beginning cleaning stage plotting.")
-
-            for task in task_list:
-                logger.warning("INFO: Generating plot {}.".format(task[2]))
-                file_output = "data/.logs/worker-1/{}-plot-{}.log".format(TIME, task[2])
-                logger.warning("INFO: Saving output of plotting plugin to logfile {}.".format(file_output))
-                fout = open(file_output, "wt")
-
-                clean_param = clean_factory(task[1], task[2], task[3], ROOT_PATH)
-
-                try:
-                    subprocess.run([PYTHON_PATH, task[0], "clean", clean_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Plotting failed. Please review logfile {} for error diagnostics.".format(file_output))
-
-                fout.close()
-
-            comm.send(1, dest=0, tag=1)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=1)
-
-    else:
-        logger.warning("WARNING: Skipping clean stage of pipeline.")
-
-elif rank == 2:
-    greenlight = comm.recv(source=0, tag=2)
-    if greenlight != 1:
-        exit(127)
-
-    # After getting greenlight, create logger for node
-    os.makedirs("data/.logs/worker-2", exist_ok=True)
-    logger = logging.getLogger("worker-2-logger")
-    f_handler = logging.FileHandler("data/.logs/worker-2/{}.log".format(TIME))
-    logger.addHandler(f_handler)
-    logger.warning("INFO: Received greenlight message {} from manager node. Begin execution.".format(greenlight))
-
-    # TRAINING STAGE
-    skip_stage_training = comm.recv(source=0, tag=2)
-
-    if skip_stage_training != 1:
-        logger.warning("INFO: Waiting for greenlight to start training stage.")
-        
-        training_greenlight = comm.recv(source=0, tag=2)
-        if training_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for training stage. Aborting execution.".format(training_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model training stage.".format(training_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=2)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            for task in task_list:
-                logger.warning("INFO: Beginning training of model {} using directive list {}.".format(task[2], task))
-
-                # Check if task[6], task[7], task[8], or task[9] is None
-                # If so, skip execution and tell user they need to mention something.
-                if task[6] is None or task[7] is None or task[8] is None or task[9] is None:
-                    logger.warning("ERROR: Skipping model {} because no manipulation was specified " +
-                                    "Please use the tag <vanilla tag='default1' /> or something similiar " +
-                                    "in your control file.")
-                    pass
-
-                else:
-                    manip_save_path = ROOT_PATH + "/data/" + task[0] + "/maniped_data"
-                    if os.path.exists(manip_save_path) is False:
-                        os.makedirs(manip_save_path, exist_ok=True)
-
-                    logger.warning("INFO: Using {} on dataset {} with parameters {}.".format(task[6], task[0], task[9]))
-
-                    # Perform data manipulation using manipulation plugin
-                    param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, ROOT_PATH + "/data/.tmp", ROOT_PATH)
-                    maniped_pickle = subprocess.getoutput("{} {} {} {}".format(PYTHON_PATH, task[8], "train", param_dict))
-
-                    # Created special directory for each individual manipulation
-                    save_path = ROOT_PATH + "/data/" + task[0] + "/models/" + task[7]
-                    if os.path.exists(save_path):
-                        shutil.rmtree(save_path, ignore_errors=True)
-
-                    os.makedirs(save_path, exist_ok=True)
-
-                    # Create dictionary that will be passed to the training plugin
-                    param_dict = train_factory(task[0], task[1], task[2], joblib.load(maniped_pickle), task[4], task[8], save_path, task[6], task[7], ROOT_PATH)
-
-                    # Spawn plugin execution and block until the training section of the plugin has completed
-                    logger.warning("INFO: Training model...")
-                    file_output = "data/.logs/worker-2/{}-{}-{}-{}.log".format(TIME, task[2], task[6], task[7])
-                    logger.warning("INFO: Saving output of {} for model {} to logfile {}.".format(task[5], task[2], file_output))
-
-                    # Open a file that the training plugin can use for stdout and stderr
-                    fout = open(file_output, "wt")
-
-                    try:
-                        subprocess.run([PYTHON_PATH, task[5], "train", param_dict], stdout=fout, stderr=fout)
-
-                    except subprocess.SubprocessError:
-                        logger.warning("ERROR: Build for model {} failed. Please review logfile {} for error diagnostics.".format(task[2], file_output))
-
-                    # Close the file the training plugin is using to log stdout and stderr
-                    fout.close()
-
-            comm.send(1, dest=0, tag=2)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=2)
-
-    else:
-        logger.warning("WARNING: Skipping training stage of pipeline.")
-
-    # ATTACK STAGE
-    skip_stage_attack = comm.recv(source=0, tag=2)
-
-    if skip_stage_attack != 1:
-        logger.warning("INFO: Waiting for greenlight to start attack stage.")
-        
-        attack_greenlight = comm.recv(source=0, tag=2)
-        if attack_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for attack stage. Aborting execution.".format(attack_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model attack stage.".format(attack_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=2)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Generate adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning adversarial attack on model {} with attack {}".format(task[7], task[2]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Get change value
-                change = task[6]["change"]
-
-                logger.warning("INFO: Generating adversial example with minimum change set to {}.".format(change))
-
-                # Open file that the attack plugin can use as a log file
-                file_output = "data/.logs/worker-2/{}-attack-{}-{}-{}-{}.log".format(TIME, task[2], task[3], model_name, change)
-                logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
-                fout = open(file_output, "wt")
-
-                test_features = gp.gettestfeat(task[9], feature_file="test_features.pkl")
-                attack_param = attack_factory(task[3], task[7], task[8], joblib.load(test_features), task[6], 
-                                                ROOT_PATH + "/data/" + task[0] + "/adver_examples", ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[4], "attack", attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Attack on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the attack plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=2)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=2)
-
-        # Receive second task list from manager
-        task_list = comm.recv(source=0, tag=2)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Evaluate model using adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning evaluation of model {} using adversarial examples.".format(task[7]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Open file that the training plugin can use as a log file during evaluation
-                file_output = "data/.logs/worker-2/{}-eval-{}-{}-{}.log".format(TIME, task[2], task[3], model_name)
-                logger.warning("INFO: Saving output of {} evaluation logfile {}.".format(task[7], file_output))
-                fout = open(file_output, "wt")
-
-                adver_examples = gp.getfiles(ROOT_PATH + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8])
-                test_labels = gp.gettestlabel(task[9], label_file="test_labels.pkl")
-                train_attack_param = attack_train_factory(adver_examples, task[3], joblib.load(test_labels), 
-                                                            task[9] + "/stat", task[7], ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[5], "attack", train_attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Evaluation for model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the training plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=2)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=2)
-
-    else:
-        logger.warning("WARNING: Skipping attack stage of pipeline.")
-
-    # CLEANING STAGE
-    skip_clean_stage = comm.recv(source=0, tag=2)
-
-    if skip_clean_stage != 1:
-        logger.warning("INFO: Waiting for greenlight to start cleaning stage.")
-
-        cleaning_greenlight = comm.recv(source=0, tag=2)
-        if cleaning_greenlight != 1:
-            # 0 message means worker is not needed any more
-            logger.warning("WARNING: Received greenlight message {} for cleaning stage. Aborting execution.".format(cleaning_greenlight))
-            exit(0)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of cleaning stage.".format(cleaning_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=2)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            logger.warning("INFO: Beginning cleaning stage plotting.")
-
-            for task in task_list:
-                logger.warning("INFO: Generating plot {}.".format(task[2]))
-                file_output = "data/.logs/worker-2/{}-plot-{}.log".format(TIME, task[2])
-                logger.warning("INFO: Saving output of plotting plugin to logfile {}.".format(file_output))
-                fout = open(file_output, "wt")
-
-                clean_param = clean_factory(task[1], task[2], task[3], ROOT_PATH)
-
-                try:
-                    subprocess.run([PYTHON_PATH, task[0], "clean", clean_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Plotting failed. Please review logfile {} for error diagnostics.".format(file_output))
-
-                fout.close()
-
-            comm.send(1, dest=0, tag=2)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=2)
-
-    else:
-        logger.warning("WARNING: Skipping cleaning stage of pipeline.")
-
-elif rank == 3:
-    greenlight = comm.recv(source=0, tag=3)
-    if greenlight != 1:
-        exit(127)
-
-    # After getting greenlight, create logger for node
-    os.makedirs("data/.logs/worker-3", exist_ok=True)
-    logger = logging.getLogger("worker-3-logger")
-    f_handler = logging.FileHandler("data/.logs/worker-3/{}.log".format(TIME), mode="w")
-    logger.addHandler(f_handler)
-    logger.warning("INFO: Received greenlight message {} from manager node. Begin execution.".format(greenlight))
-
-    # TRAINING STAGE
-    skip_stage_training = comm.recv(source=0, tag=3)
-
-    if skip_stage_training != 1:
-        logger.warning("INFO: Waiting for greenlight to start training stage.")
-        
-        training_greenlight = comm.recv(source=0, tag=3)
-        if training_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for training stage. Aborting execution.".format(training_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model training stage.".format(training_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=3)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            for task in task_list:
-                logger.warning("INFO: Beginning training of model {} using directive list {}.".format(task[2], task))
-
-                # Check if task[6], task[7], task[8], or task[9] is None
-                # If so, skip execution and tell user they need to mention something.
-                if task[6] is None or task[7] is None or task[8] is None or task[9] is None:
-                    logger.warning("ERROR: Skipping model {} because no manipulation was specified " +
-                                    "Please use the tag <vanilla tag='default1' /> or something similiar " +
-                                    "in your control file.")
-                    pass
-
-                else:
-                    manip_save_path = ROOT_PATH + "/data/" + task[0] + "/maniped_data"
-                    if os.path.exists(manip_save_path) is False:
-                        os.makedirs(manip_save_path, exist_ok=True)
-
-                    logger.warning("INFO: Using {} on dataset {} with parameters {}.".format(task[6], task[0], task[9]))
-
-                    # Perform data manipulation using manipulation plugin
-                    param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, ROOT_PATH + "/data/.tmp", ROOT_PATH)
-                    maniped_pickle = subprocess.getoutput("{} {} {} {}".format(PYTHON_PATH, task[8], "train", param_dict))
-
-                    # Created special directory for each individual manipulation
-                    save_path = ROOT_PATH + "/data/" + task[0] + "/models/" + task[7]
-                    if os.path.exists(save_path):
-                        shutil.rmtree(save_path, ignore_errors=True)
-
-                    os.makedirs(save_path, exist_ok=True)
-
-                    # Create dictionary that will be passed to the training plugin
-                    param_dict = train_factory(task[0], task[1], task[2], joblib.load(maniped_pickle), task[4], task[8], save_path, task[6], task[7], ROOT_PATH)
-
-                    # Spawn plugin execution and block until the training section of the plugin has completed
-                    logger.warning("INFO: Training model...")
-                    file_output = "data/.logs/worker-3/{}-{}-{}-{}.log".format(TIME, task[2], task[6], task[7])
-                    logger.warning("INFO: Saving output of {} for model {} to logfile {}.".format(task[5], task[2], file_output))
-
-                    # Open a file that the training plugin can use for stdout and stderr
-                    fout = open(file_output, "wt")
-
-                    try:
-                        subprocess.run([PYTHON_PATH, task[5], "train", param_dict], stdout=fout, stderr=fout)
-
-                    except subprocess.SubprocessError:
-                        logger.warning("ERROR: Build for model {} failed. Please review logfile {} for error diagnostics.".format(task[2], file_output))
-
-                    # Close the file the training plugin is using to log stdout and stderr
-                    fout.close()
-
-            comm.send(1, dest=0, tag=3)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=3)
-
-    else:
-        logger.warning("WARNING: Skipping training stage of pipeline.")
-
-    # ATTACK STAGE
-    skip_stage_attack = comm.recv(source=0, tag=3)
-
-    if skip_stage_attack != 1:
-        logger.warning("INFO: Waiting for greenlight to start attack stage.")
-        
-        attack_greenlight = comm.recv(source=0, tag=3)
-        if attack_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for attack stage. Aborting execution.".format(attack_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model attack stage.".format(attack_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=3)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Generate adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning adversarial attack on model {} with attack {}".format(task[7], task[2]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Get change value
-                change = task[6]["change"]
-
-                logger.warning("INFO: Generating adversial example with minimum change set to {}.".format(change))
-
-                # Open file that the attack plugin can use as a log file
-                file_output = "data/.logs/worker-3/{}-attack-{}-{}-{}-{}.log".format(TIME, task[2], task[3], model_name, change)
-                logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
-                fout = open(file_output, "wt")
-
-                test_features = gp.gettestfeat(task[9], feature_file="test_features.pkl")
-                attack_param = attack_factory(task[3], task[7], task[8], joblib.load(test_features), task[6], 
-                                                ROOT_PATH + "/data/" + task[0] + "/adver_examples", ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[4], "attack", attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Attack on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the attack plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=3)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=3)
-
-        # Receive second task list from manager
-        task_list = comm.recv(source=0, tag=3)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Evaluate model using adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning evaluation of model {} using adversarial examples.".format(task[7]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Open file that the training plugin can use as a log file during evaluation
-                file_output = "data/.logs/worker-3/{}-eval-{}-{}-{}.log".format(TIME, task[2], task[3], model_name)
-                logger.warning("INFO: Saving output of {} evaluation logfile {}.".format(task[7], file_output))
-                fout = open(file_output, "wt")
-
-                adver_examples = gp.getfiles(ROOT_PATH + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8])
-                test_labels = gp.gettestlabel(task[9], label_file="test_labels.pkl")
-                train_attack_param = attack_train_factory(adver_examples, task[3], joblib.load(test_labels), 
-                                                            task[9] + "/stat", task[7], ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[5], "attack", train_attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Evaluation for model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the training plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=3)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=3)
-
-    else:
-        logger.warning("WARNING: Skipping attack stage of pipeline.")
-
-    # CLEANING STAGE
-    skip_clean_stage = comm.recv(source=0, tag=3)
-
-    if skip_clean_stage != 1:
-        logger.warning("INFO: Waiting for greenlight to start cleaning stage.")
-
-        cleaning_greenlight = comm.recv(source=0, tag=3)
-        if cleaning_greenlight != 1:
-            # 0 message means worker is not needed any more
-            logger.warning("WARNING: Received greenlight message {} for cleaning stage. Aborting execution.".format(cleaning_greenlight))
-            exit(0)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of cleaning stage.".format(cleaning_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=3)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            logger.warning("INFO: Beginning cleaning stage plotting.")
-
-            for task in task_list:
-                logger.warning("INFO: Generating plot {}.".format(task[2]))
-                file_output = "data/.logs/worker-3/{}-plot-{}.log".format(TIME, task[2])
-                logger.warning("INFO: Saving output of plotting plugin to logfile {}.".format(file_output))
-                fout = open(file_output, "wt")
-
-                clean_param = clean_factory(task[1], task[2], task[3], ROOT_PATH)
-
-                try:
-                    subprocess.run([PYTHON_PATH, task[0], "clean", clean_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Plotting failed. Please review logfile {} for error diagnostics.".format(file_output))
-
-                fout.close()
-
-            comm.send(1, dest=0, tag=3)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=3)
-
-    else:
-        logger.warning("WARNING: Skipping cleaning stage of pipeline.")
-
-elif rank == 4:
-    greenlight = comm.recv(source=0, tag=4)
-    if greenlight != 1:
-        exit(127)
-
-    # After getting greenlight, create logger for node
-    os.makedirs("data/.logs/worker-4", exist_ok=True)
-    logger = logging.getLogger("worker-4-logger")
-    f_handler = logging.FileHandler("data/.logs/worker-4/{}.log".format(TIME), mode="w")
-    logger.addHandler(f_handler)
-    logger.warning("INFO: Received greenlight message {} from manager node. Begin execution.".format(greenlight))
-
-    # TRAINING STAGE
-    skip_stage_training = comm.recv(source=0, tag=4)
-
-    if skip_stage_training != 1:
-        logger.warning("INFO: Waiting for greenlight to start training stage.")
-        
-        training_greenlight = comm.recv(source=0, tag=4)
-        if training_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for training stage. Aborting execution.".format(training_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model training stage.".format(training_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=4)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            for task in task_list:
-                logger.warning("INFO: Beginning training of model {} using directive list {}.".format(task[2], task))
-
-                # Check if task[6], task[7], task[8], or task[9] is None
-                # If so, skip execution and tell user they need to mention something.
-                if task[6] is None or task[7] is None or task[8] is None or task[9] is None:
-                    logger.warning("ERROR: Skipping model {} because no manipulation was specified " +
-                                    "Please use the tag <vanilla tag='default1' /> or something similiar " +
-                                    "in your control file.")
-                    pass
-
-                else:
-                    manip_save_path = ROOT_PATH + "/data/" + task[0] + "/maniped_data"
-                    if os.path.exists(manip_save_path) is False:
-                        os.makedirs(manip_save_path, exist_ok=True)
-
-                    logger.warning("INFO: Using {} on dataset {} with parameters {}.".format(task[6], task[0], task[9]))
-
-                    # Perform data manipulation using manipulation plugin
-                    param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, ROOT_PATH + "/data/.tmp", ROOT_PATH)
-                    maniped_pickle = subprocess.getoutput("{} {} {} {}".format(PYTHON_PATH, task[8], "train", param_dict))
-
-                    # Created special directory for each individual manipulation
-                    save_path = ROOT_PATH + "/data/" + task[0] + "/models/" + task[7]
-                    if os.path.exists(save_path):
-                        shutil.rmtree(save_path, ignore_errors=True)
-
-                    os.makedirs(save_path, exist_ok=True)
-
-                    # Create dictionary that will be passed to the training plugin
-                    param_dict = train_factory(task[0], task[1], task[2], joblib.load(maniped_pickle), task[4], task[8], save_path, task[6], task[7], ROOT_PATH)
-
-                    # Spawn plugin execution and block until the training section of the plugin has completed
-                    logger.warning("INFO: Training model...")
-                    file_output = "data/.logs/worker-4/{}-{}-{}-{}.log".format(TIME, task[2], task[6], task[7])
-                    logger.warning("INFO: Saving output of {} for model {} to logfile {}.".format(task[5], task[2], file_output))
-
-                    # Open a file that the training plugin can use for stdout and stderr
-                    fout = open(file_output, "wt")
-
-                    try:
-                        subprocess.run([PYTHON_PATH, task[5], "train", param_dict], stdout=fout, stderr=fout)
-
-                    except subprocess.SubprocessError:
-                        logger.warning("ERROR: Build for model {} failed. Please review the above output for error diagnostics.".format(task[2]))
-
-                    # Close the file the training plugin is using to log stdout and stderr
-                    fout.close()
-
-            comm.send(1, dest=0, tag=4)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=4)
-
-    else:
-        logger.warning("WARNING: Skipping training stage of pipeline.")
-
-    # ATTACK STAGE
-    skip_stage_attack = comm.recv(source=0, tag=4)
-
-    if skip_stage_attack != 1:
-        logger.warning("INFO: Waiting for greenlight to start attack stage.")
-        
-        attack_greenlight = comm.recv(source=0, tag=4)
-        if attack_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for attack stage. Aborting execution.".format(attack_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model attack stage.".format(attack_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=4)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Generate adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning adversarial attack on model {} with attack {}".format(task[7], task[2]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Get change value
-                change = task[6]["change"]
-
-                logger.warning("INFO: Generating adversial example with minimum change set to {}.".format(change))
-
-                # Open file that the attack plugin can use as a log file
-                file_output = "data/.logs/worker-4/{}-attack-{}-{}-{}-{}.log".format(TIME, task[2], task[3], model_name, change)
-                logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
-                fout = open(file_output, "wt")
-
-                test_features = gp.gettestfeat(task[9], feature_file="test_features.pkl")
-                attack_param = attack_factory(task[3], task[7], task[8], joblib.load(test_features), task[6], 
-                                                ROOT_PATH + "/data/" + task[0] + "/adver_examples", ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[4], "attack", attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Attack on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the attack plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=4)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=4)
-
-        # Receive second task list from manager
-        task_list = comm.recv(source=0, tag=4)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Evaluate model using adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning evaluation of model {} using adversarial examples.".format(task[7]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Open file that the training plugin can use as a log file during evaluation
-                file_output = "data/.logs/worker-4/{}-eval-{}-{}-{}.log".format(TIME, task[2], task[3], model_name)
-                logger.warning("INFO: Saving output of {} evaluation logfile {}.".format(task[7], file_output))
-                fout = open(file_output, "wt")
-
-                adver_examples = gp.getfiles(ROOT_PATH + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8])
-                test_labels = gp.gettestlabel(task[9], label_file="test_labels.pkl")
-                train_attack_param = attack_train_factory(adver_examples, task[3], joblib.load(test_labels), 
-                                                            task[9] + "/stat", task[7], ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[5], "attack", train_attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Evaluation for model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the training plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=4)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=4)
-
-    else:
-        logger.warning("WARNING: Skipping attack stage of pipeline.")
-
-    # CLEANING STAGE
-    skip_clean_stage = comm.recv(source=0, tag=4)
-
-    if skip_clean_stage != 1:
-        logger.warning("INFO: Waiting for greenlight to start cleaning stage.")
-
-        cleaning_greenlight = comm.recv(source=0, tag=4)
-        if cleaning_greenlight != 1:
-            # 0 message means worker is not needed any more
-            logger.warning("WARNING: Received greenlight message {} for cleaning stage. Aborting execution.".format(cleaning_greenlight))
-            exit(0)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of cleaning stage.".format(cleaning_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=4)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            logger.warning("INFO: Beginning cleaning stage plotting.")
-
-            for task in task_list:
-                logger.warning("INFO: Generating plot {}.".format(task[2]))
-                file_output = "data/.logs/worker-4/{}-plot-{}.log".format(TIME, task[2])
-                logger.warning("INFO: Saving output of plotting plugin to logfile {}.".format(file_output))
-                fout = open(file_output, "wt")
-
-                clean_param = clean_factory(task[1], task[2], task[3], ROOT_PATH)
-
-                try:
-                    subprocess.run([PYTHON_PATH, task[0], "clean", clean_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Plotting failed. Please review logfile {} for error diagnostics.".format(file_output))
-
-                fout.close()
-
-            comm.send(1, dest=0, tag=4)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=4)
-
-    else:
-        logger.warning("WARNING: Skipping cleaning stage of pipeline.")
-
-elif rank == 5:
-    greenlight = comm.recv(source=0, tag=5)
-    if greenlight != 1:
-        exit(127)
-
-    # After getting greenlight, create logger for node
-    os.makedirs("data/.logs/worker-5", exist_ok=True)
-    logger = logging.getLogger("worker-5-logger")
-    f_handler = logging.FileHandler("data/.logs/worker-5/{}.log".format(TIME), mode="w")
-    logger.addHandler(f_handler)
-    logger.warning("INFO: Received greenlight message {} from manager node. Begin execution.".format(greenlight))
-
-    # TRAINING STAGE
-    skip_stage_training = comm.recv(source=0, tag=5)
-
-    if skip_stage_training != 1:
-        logger.warning("INFO: Waiting for greenlight to start training stage.")
-        
-        training_greenlight = comm.recv(source=0, tag=5)
-        if training_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for training stage. Aborting execution.".format(training_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model training stage.".format(training_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=5)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            for task in task_list:
-                logger.warning("INFO: Beginning training of model {} using directive list {}.".format(task[2], task))
-
-                # Check if task[6], task[7], task[8], or task[9] is None
-                # If so, skip execution and tell user they need to mention something.
-                if task[6] is None or task[7] is None or task[8] is None or task[9] is None:
-                    logger.warning("ERROR: Skipping model {} because no manipulation was specified " +
-                                    "Please use the tag <vanilla tag='default1' /> or something similiar " +
-                                    "in your control file.")
-                    pass
-
-                else:
-                    manip_save_path = ROOT_PATH + "/data/" + task[0] + "/maniped_data"
-                    if os.path.exists(manip_save_path) is False:
-                        os.makedirs(manip_save_path, exist_ok=True)
-
-                    logger.warning("INFO: Using {} on dataset {} with parameters {}.".format(task[6], task[0], task[9]))
-
-                    # Perform data manipulation using manipulation plugin
-                    param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, ROOT_PATH + "/data/.tmp", ROOT_PATH)
-                    maniped_pickle = subprocess.getoutput("{} {} {} {}".format(PYTHON_PATH, task[8], "train", param_dict))
-
-                    # Created special directory for each individual manipulation
-                    save_path = ROOT_PATH + "/data/" + task[0] + "/models/" + task[7]
-                    if os.path.exists(save_path):
-                        shutil.rmtree(save_path, ignore_errors=True)
-
-                    os.makedirs(save_path, exist_ok=True)
-
-                    # Create dictionary that will be passed to the training plugin
-                    param_dict = train_factory(task[0], task[1], task[2], joblib.load(maniped_pickle), task[4], task[8], save_path, task[6], task[7], ROOT_PATH)
-
-                    # Spawn plugin execution and block until the training section of the plugin has completed
-                    logger.warning("INFO: Training model...")
-                    file_output = "data/.logs/worker-5/{}-{}-{}-{}.log".format(TIME, task[2], task[6], task[7])
-                    logger.warning("INFO: Saving output of {} for model {} to logfile {}.".format(task[5], task[2], file_output))
-
-                    # Open a file that the training plugin can use for stdout and stderr
-                    fout = open(file_output, "wt")
-
-                    try:
-                        subprocess.run([PYTHON_PATH, task[5], "train", param_dict], stdout=fout, stderr=fout)
-
-                    except subprocess.SubprocessError:
-                        logger.warning("ERROR: Build for model {} failed. Please review logfile {} for error diagnostics.".format(task[2], file_output))
-
-                    # Close the file the training plugin is using to log stdout and stderr
-                    fout.close()
-
-            comm.send(1, dest=0, tag=5)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=5)
-
-    else:
-        logger.warning("WARNING: Skipping training stage of pipeline.")
-
-    # ATTACK STAGE
-    skip_stage_attack = comm.recv(source=0, tag=5)
-
-    if skip_stage_attack != 1:
-        logger.warning("INFO: Waiting for greenlight to start attack stage.")
-        
-        attack_greenlight = comm.recv(source=0, tag=5)
-        if attack_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for attack stage. Aborting execution.".format(attack_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model attack stage.".format(attack_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=5)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Generate adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning adversarial attack on model {} with attack {}".format(task[7], task[2]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Get change value
-                change = task[6]["change"]
-
-                logger.warning("INFO: Generating adversial example with minimum change set to {}.".format(change))
-
-                # Open file that the attack plugin can use as a log file
-                file_output = "data/.logs/worker-5/{}-attack-{}-{}-{}-{}.log".format(TIME, task[2], task[3], model_name, change)
-                logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
-                fout = open(file_output, "wt")
-
-                test_features = gp.gettestfeat(task[9], feature_file="test_features.pkl")
-                attack_param = attack_factory(task[3], task[7], task[8], joblib.load(test_features), task[6], 
-                                                ROOT_PATH + "/data/" + task[0] + "/adver_examples", ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[4], "attack", attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Attack on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the attack plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=5)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=5)
-
-        # Receive second task list from manager
-        task_list = comm.recv(source=0, tag=5)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Evaluate model using adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning evaluation of model {} using adversarial examples.".format(task[7]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Open file that the training plugin can use as a log file during evaluation
-                file_output = "data/.logs/worker-5/{}-eval-{}-{}-{}.log".format(TIME, task[2], task[3], model_name)
-                logger.warning("INFO: Saving output of {} evaluation logfile {}.".format(task[7], file_output))
-                fout = open(file_output, "wt")
-
-                adver_examples = gp.getfiles(ROOT_PATH + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8])
-                test_labels = gp.gettestlabel(task[9], label_file="test_labels.pkl")
-                train_attack_param = attack_train_factory(adver_examples, task[3], joblib.load(test_labels), 
-                                                            task[9] + "/stat", task[7], ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[5], "attack", train_attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Evaluation for model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the training plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=5)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=5)
-
-    else:
-        logger.warning("WARNING: Skipping attack stage of pipeline.")
-
-    # CLEANING STAGE
-    skip_clean_stage = comm.recv(source=0, tag=5)
-
-    if skip_clean_stage != 1:
-        logger.warning("INFO: Waiting for greenlight to start cleaning stage.")
-
-        cleaning_greenlight = comm.recv(source=0, tag=5)
-        if cleaning_greenlight != 1:
-            # 0 message means worker is not needed any more
-            logger.warning("WARNING: Received greenlight message {} for cleaning stage. Aborting execution.".format(cleaning_greenlight))
-            exit(0)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of cleaning stage.".format(cleaning_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=5)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            logger.warning("INFO: Beginning cleaning stage plotting.")
-
-            for task in task_list:
-                logger.warning("INFO: Generating plot {}.".format(task[2]))
-                file_output = "data/.logs/worker-5/{}-plot-{}.log".format(TIME, task[2])
-                logger.warning("INFO: Saving output of plotting plugin to logfile {}.".format(file_output))
-                fout = open(file_output, "wt")
-
-                clean_param = clean_factory(task[1], task[2], task[3], ROOT_PATH)
-
-                try:
-                    subprocess.run([PYTHON_PATH, task[0], "clean", clean_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Plotting failed. Please review logfile {} for error diagnostics.".format(file_output))
-
-                fout.close()
-
-            comm.send(1, dest=0, tag=5)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=5)
-
-    else:
-        logger.warning("WARNING: Skipping cleaning stage of pipeline.")
-
-elif rank == 6:
-    greenlight = comm.recv(source=0, tag=6)
-    if greenlight != 1:
-        exit(127)
-
-    # After getting greenlight, create logger for node
-    os.makedirs("data/.logs/worker-6", exist_ok=True)
-    logger = logging.getLogger("worker-6-logger")
-    f_handler = logging.FileHandler("data/.logs/worker-6/{}.log".format(TIME), mode="w")
-    logger.addHandler(f_handler)
-    logger.warning("INFO: Received greenlight message {} from manager node. Begin execution.".format(greenlight))
-    
-    # TRAINING STAGE
-    skip_stage_training = comm.recv(source=0, tag=6)
-
-    if skip_stage_training != 1:
-        logger.warning("INFO: Waiting for greenlight to start training stage.")
-        
-        training_greenlight = comm.recv(source=0, tag=6)
-        if training_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for training stage. Aborting execution.".format(training_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model training stage.".format(training_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=6)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            for task in task_list:
-                logger.warning("INFO: Beginning training of model {} using directive list {}.".format(task[2], task))
-
-                # Check if task[6], task[7], task[8], or task[9] is None
-                # If so, skip execution and tell user they need to mention something.
-                if task[6] is None or task[7] is None or task[8] is None or task[9] is None:
-                    logger.warning("ERROR: Skipping model {} because no manipulation was specified " +
-                                    "Please use the tag <vanilla tag='default1' /> or something similiar " +
-                                    "in your control file.")
-                    pass
-
-                else:
-                    manip_save_path = ROOT_PATH + "/data/" + task[0] + "/maniped_data"
-                    if os.path.exists(manip_save_path) is False:
-                        os.makedirs(manip_save_path, exist_ok=True)
-
-                    logger.warning("INFO: Using {} on dataset {} with parameters {}.".format(task[6], task[0], task[9]))
-
-                    # Perform data manipulation using manipulation plugin
-                    param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, ROOT_PATH + "/data/.tmp", ROOT_PATH)
-                    maniped_pickle = subprocess.getoutput("{} {} {} {}".format(PYTHON_PATH, task[8], "train", param_dict))
-
-                    # Created special directory for each individual manipulation
-                    save_path = ROOT_PATH + "/data/" + task[0] + "/models/" + task[7]
-                    if os.path.exists(save_path):
-                        shutil.rmtree(save_path, ignore_errors=True)
-
-                    os.makedirs(save_path, exist_ok=True)
-
-                    # Create dictionary that will be passed to the training plugin
-                    param_dict = train_factory(task[0], task[1], task[2], joblib.load(maniped_pickle), task[4], task[8], save_path, task[6], task[7], ROOT_PATH)
-
-                    # Spawn plugin execution and block until the training section of the plugin has completed
-                    logger.warning("INFO: Training model...")
-                    file_output = "data/.logs/worker-6/{}-{}-{}-{}.log".format(TIME, task[2], task[6], task[7])
-                    logger.warning("INFO: Saving output of {} for model {} to logfile {}.".format(task[5], task[2], file_output))
-
-                    # Open a file that the training plugin can use for stdout and stderr
-                    fout = open(file_output, "wt")
-
-                    try:
-                        subprocess.run([PYTHON_PATH, task[5], "train", param_dict], stdout=fout, stderr=fout)
-
-                    except subprocess.SubprocessError:
-                        logger.warning("ERROR: Build for model {} failed. Please review logfile {} for error diagnostics.".format(task[2], file_output))
-
-                    # Close the file the training plugin is using to log stdout and stderr
-                    fout.close()
-
-            comm.send(1, dest=0, tag=6)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=6)
-
-    else:
-        logger.warning("WARNING: Skipping training stage of pipeline.")
-
-    # ATTACK STAGE
-    skip_stage_attack = comm.recv(source=0, tag=6)
-
-    if skip_stage_attack != 1:
-        logger.warning("INFO: Waiting for greenlight to start attack stage.")
-        
-        attack_greenlight = comm.recv(source=0, tag=6)
-        if attack_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for attack stage. Aborting execution.".format(attack_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model attack stage.".format(attack_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=6)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Generate adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning adversarial attack on model {} with attack {}".format(task[7], task[2]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Get change value
-                change = task[6]["change"]
-
-                logger.warning("INFO: Generating adversial example with minimum change set to {}.".format(change))
-
-                # Open file that the attack plugin can use as a log file
-                file_output = "data/.logs/worker-6/{}-attack-{}-{}-{}-{}.log".format(TIME, task[2], task[3], model_name, change)
-                logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
-                fout = open(file_output, "wt")
-
-                test_features = gp.gettestfeat(task[9], feature_file="test_features.pkl")
-                attack_param = attack_factory(task[3], task[7], task[8], joblib.load(test_features), task[6], 
-                                                ROOT_PATH + "/data/" + task[0] + "/adver_examples", ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[4], "attack", attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Attack on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the attack plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=6)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=6)
-
-        # Receive second task list from manager
-        task_list = comm.recv(source=0, tag=6)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Evaluate model using adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning evaluation of model {} using adversarial examples.".format(task[7]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Open file that the training plugin can use as a log file during evaluation
-                file_output = "data/.logs/worker-6/{}-eval-{}-{}-{}.log".format(TIME, task[2], task[3], model_name)
-                logger.warning("INFO: Saving output of {} evaluation logfile {}.".format(task[7], file_output))
-                fout = open(file_output, "wt")
-
-                adver_examples = gp.getfiles(ROOT_PATH + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8])
-                test_labels = gp.gettestlabel(task[9], label_file="test_labels.pkl")
-                train_attack_param = attack_train_factory(adver_examples, task[3], joblib.load(test_labels), 
-                                                            task[9] + "/stat", task[7], ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[5], "attack", train_attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Evaluation for model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the training plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=6)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=6)
-
-    else:
-        logger.warning("WARNING: Skipping attack stage of pipeline.")
-
-    # CLEANING STAGE
-    skip_clean_stage = comm.recv(source=0, tag=6)
-
-    if skip_clean_stage != 1:
-        logger.warning("INFO: Waiting for greenlight to start cleaning stage.")
-
-        cleaning_greenlight = comm.recv(source=0, tag=6)
-        if cleaning_greenlight != 1:
-            # 0 message means worker is not needed any more
-            logger.warning("WARNING: Received greenlight message {} for cleaning stage. Aborting execution.".format(cleaning_greenlight))
-            exit(0)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of cleaning stage.".format(cleaning_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=6)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            logger.warning("INFO: Beginning cleaning stage plotting.")
-
-            for task in task_list:
-                logger.warning("INFO: Generating plot {}.".format(task[2]))
-                file_output = "data/.logs/worker-6/{}-plot-{}.log".format(TIME, task[2])
-                logger.warning("INFO: Saving output of plotting plugin to logfile {}.".format(file_output))
-                fout = open(file_output, "wt")
-
-                clean_param = clean_factory(task[1], task[2], task[3], ROOT_PATH)
-
-                try:
-                    subprocess.run([PYTHON_PATH, task[0], "clean", clean_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Plotting failed. Please review logfile {} for error diagnostics.".format(file_output))
-
-                fout.close()
-
-            comm.send(1, dest=0, tag=6)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=6)
-
-    else:
-        logger.warning("WARNING: Skipping cleaning stage of pipeline.")
-
-elif rank == 7:
-    greenlight = comm.recv(source=0, tag=7)
-    if greenlight != 1:
-        exit(127)
-
-    # After getting greenlight, create logger for node
-    os.makedirs("data/.logs/worker-7", exist_ok=True)
-    logger = logging.getLogger("worker-7-logger")
-    f_handler = logging.FileHandler("data/.logs/worker-7/{}.log".format(TIME), mode="w")
-    logger.addHandler(f_handler)
-    logger.warning("INFO: Received greenlight message {} from manager node. Begin execution.".format(greenlight))
-
-    # TRAINING warning
-    skip_stage_training = comm.recv(source=0, tag=7)
-
-    if skip_stage_training != 1:
-        logger.warning("INFO: Waiting for greenlight to start training stage.")
-        
-        training_greenlight = comm.recv(source=0, tag=7)
-        if training_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for training stage. Aborting execution.".format(training_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model training stage.".format(training_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=7)
-        logger.warning("Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            for task in task_list:
-                logger.warning("INFO: Beginning training of model {} using directive list {}.".format(task[2], task))
-
-                # Check if task[6], task[7], task[8], or task[9] is None
-                # If so, skip execution and tell user they need to mention something.
-                if task[6] is None or task[7] is None or task[8] is None or task[9] is None:
-                    logger.warning("ERROR: Skipping model {} because no manipulation was specified " +
-                                    "Please use the tag <vanilla tag='default1' /> or something similiar " +
-                                    "in your control file.")
-                    pass
-
-                else:
-                    manip_save_path = ROOT_PATH + "/data/" + task[0] + "/maniped_data"
-                    if os.path.exists(manip_save_path) is False:
-                        os.makedirs(manip_save_path, exist_ok=True)
-
-                    logger.warning("INFO: Using {} on dataset {} with parameters {}.".format(task[6], task[0], task[9]))
-
-                    # Perform data manipulation using manipulation plugin
-                    param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, ROOT_PATH + "/data/.tmp", ROOT_PATH)
-                    maniped_pickle = subprocess.getoutput("{} {} {} {}".format(PYTHON_PATH, task[8], "train", param_dict))
-
-                    # Created special directory for each individual manipulation
-                    save_path = ROOT_PATH + "/data/" + task[0] + "/models/" + task[7]
-                    if os.path.exists(save_path):
-                        shutil.rmtree(save_path, ignore_errors=True)
-
-                    os.makedirs(save_path, exist_ok=True)
-
-                    # Create dictionary that will be passed to the training plugin
-                    param_dict = train_factory(task[0], task[1], task[2], joblib.load(maniped_pickle), task[4], task[8], save_path, task[6], task[7], ROOT_PATH)
-
-                    # Spawn plugin execution and block until the training section of the plugin has completed
-                    logger.warning("INFO: Training model...")
-                    file_output = "data/.logs/worker-7/{}-{}-{}-{}.log".format(TIME, task[2], task[6], task[7])
-                    logger.warning("INFO: Saving output of {} for model {} to logfile {}.".format(task[5], task[2], file_output))
-
-                    # Open a file that the training plugin can use for stdout and stderr
-                    fout = open(file_output, "wt")
-
-                    try:
-                        subprocess.run([PYTHON_PATH, task[5], "train", param_dict], stdout=fout, stderr=fout)
-
-                    except subprocess.SubprocessError:
-                        logger.warning("ERROR: Build for model {} failed. Please review logfile {} for error diagnostics.".format(task[2], file_output))
-
-                    # Close the file the training plugin is using to log stdout and stderr
-                    fout.close()
-
-            comm.send(1, dest=0, tag=7)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=7)
-
-    else:
-        logger.warning("WARNING: Skipping training stage of pipeline.")
-
-    # ATTACK STAGE
-    skip_stage_attack = comm.recv(source=0, tag=7)
-
-    if skip_stage_attack != 1:
-        logger.warning("INFO: Waiting for greenlight to start attack stage.")
-        
-        attack_greenlight = comm.recv(source=0, tag=7)
-        if attack_greenlight != 1:
-            logger.warning("ERROR: Received greenlight message {} for attack stage. Aborting execution.".format(attack_greenlight))
-            exit(127)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of model attack stage.".format(attack_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=7)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Generate adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning adversarial attack on model {} with attack {}".format(task[7], task[2]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Get change value
-                change = task[6]["change"]
-
-                logger.warning("INFO: Generating adversial example with minimum change set to {}.".format(change))
-
-                # Open file that the attack plugin can use as a log file
-                file_output = "data/.logs/worker-7/{}-attack-{}-{}-{}-{}.log".format(TIME, task[2], task[3], model_name, change)
-                logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
-                fout = open(file_output, "wt")
-
-                test_features = gp.gettestfeat(task[9], feature_file="test_features.pkl")
-                attack_param = attack_factory(task[3], task[7], task[8], joblib.load(test_features), task[6], 
-                                                ROOT_PATH + "/data/" + task[0] + "/adver_examples", ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[4], "attack", attack_param], stdout=fout, stderr=fout)
-                
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Attack on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the attack plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=7)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=7)
-
-        # Receive second task list from manager
-        task_list = comm.recv(source=0, tag=7)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            # Evaluate model using adversarial examples
-            for task in task_list:
-                logger.warning("INFO: Beginning evaluation of model {} using adversarial examples.".format(task[7]))
-
-                # Get model name
-                model_name = task[7].split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
-
-                # Open file that the training plugin can use as a log file during evaluation
-                file_output = "data/.logs/worker-7/{}-eval-{}-{}-{}.log".format(TIME, task[2], task[3], model_name)
-                logger.warning("INFO: Saving output of {} evaluation logfile {}.".format(task[7], file_output))
-                fout = open(file_output, "wt")
-
-                adver_examples = gp.getfiles(ROOT_PATH + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8])
-                test_labels = gp.gettestlabel(task[9], label_file="test_labels.pkl")
-                train_attack_param = attack_train_factory(adver_examples, task[3], joblib.load(test_labels), 
-                                                            task[9] + "/stat", task[7], ROOT_PATH)
-                try:
-                    subprocess.run([PYTHON_PATH, task[5], "attack", train_attack_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Evaluation for model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
-
-                # Close the training plugin log file
-                fout.close()
-
-            comm.send(1, dest=0, tag=7)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=7)
-
-    else:
-        logger.warning("WARNING: Skipping attack stage of pipeline.")
-
-    # CLEANING STAGE
-    skip_clean_stage = comm.recv(source=0, tag=7)
-
-    if skip_clean_stage != 1:
-        logger.warning("INFO: Waiting for greenlight to start cleaning stage.")
-
-        cleaning_greenlight = comm.recv(source=0, tag=7)
-        if cleaning_greenlight != 1:
-            # 0 message means worker is not needed any more
-            logger.warning("WARNING: Received greenlight message {} for cleaning stage. Aborting execution.".format(cleaning_greenlight))
-            exit(0)
-
-        logger.warning("INFO: Received greenlight {}. Beginning execution of cleaning stage.".format(cleaning_greenlight))
-
-        # Receive task from manager
-        task_list = comm.recv(source=0, tag=7)
-        logger.warning("INFO: Received task list {} from manager.".format(task_list))
-
-        if task_list != []:
-            logger.warning("INFO: Beginning cleaning stage plotting.")
-
-            for task in task_list:
-                logger.warning("INFO: Generating plot {}.".format(task[2]))
-                file_output = "data/.logs/worker-7/{}-plot-{}.log".format(TIME, task[2])
-                logger.warning("INFO: Saving output of plotting plugin to logfile {}.".format(file_output))
-                fout = open(file_output, "wt")
-
-                clean_param = clean_factory(task[1], task[2], task[3], ROOT_PATH)
-
-                try:
-                    subprocess.run([PYTHON_PATH, task[0], "clean", clean_param], stdout=fout, stderr=fout)
-
-                except subprocess.SubprocessError:
-                    logger.warning("ERROR: Plotting failed. Please review logfile {} for error diagnostics.".format(file_output))
-
-                fout.close()
-
-            comm.send(1, dest=0, tag=7)
-
-        else:
-            logger.warning("WARNING: Received empty task list. Returning status 1 to manager.")
-            comm.send(1, dest=0, tag=7)
-
-    else:
-        logger.warning("WARNING: Skipping cleaning stage of pipeline.")
+else:
+    # Every other rank in the MPI.COMM_WORLD runs the same worker runtime
+    worker = Worker(comm, rank, ROOT_PATH, PYTHON_PATH, TIME, CONFIG_FILE)
+    worker.run()
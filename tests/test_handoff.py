@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from jespipe.plugin import handoff
+
+
+@pytest.mark.parametrize("dataframe", [
+    pd.DataFrame({"int": [1, 2, 3], "float": [1.5, 2.5, 3.5], "bool": [True, False, True]}),
+    pd.DataFrame(np.arange(6.0).reshape(3, 2), index=[10, 20, 30]),
+    pd.DataFrame({"a": [1.0, 2.0]}, index=pd.date_range("2021", periods=2, name="when")),
+    pd.DataFrame([[1, 2], [3, 4]], columns=["x", "x"]),
+], ids=["mixed-dtypes", "integer-index", "datetime-index", "duplicate-columns"])
+def test_dataframe_round_trip(tmp_path, dataframe):
+    descriptor = handoff.share(dataframe, str(tmp_path))
+    assert handoff.is_descriptor(descriptor)
+
+    resolved = handoff.resolve({"dataframe": descriptor})["dataframe"]
+    pd.testing.assert_frame_equal(resolved.copy(), dataframe)
+
+    handoff.remove(descriptor)
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize("dataframe", [
+    pd.DataFrame({"text": ["a", "b"]}),
+    pd.DataFrame({"nullable": pd.array([1, None], dtype="Int64")}),
+    pd.DataFrame({"a": [1.0, 2.0]}, index=["r1", "r2"]),
+], ids=["object-column", "extension-dtype", "object-index"])
+def test_inexact_dataframe_is_not_shared(tmp_path, dataframe):
+    assert handoff.share(dataframe, str(tmp_path)) is dataframe
+
+
+def test_unwritable_directory_falls_back_to_object(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    array = np.arange(5)
+    assert handoff.share(array, str(blocker / "handoff")) is array
@@ -0,0 +1,35 @@
+from utils.managerops.taskgraph import TaskGraph
+
+
+def _chain() -> TaskGraph:
+    # train -> attack -> evaluate, plus a second train feeding evaluate
+    graph = TaskGraph()
+    train = graph.add("train")
+    other = graph.add("train-other")
+    attack = graph.add("attack", depends_on=[train])
+    graph.add("evaluate", depends_on=[attack, other])
+    graph.add("clean", depends_on=[other])
+    return graph
+
+
+def test_fail_skips_every_transitive_dependent():
+    graph = _chain()
+    assert graph.take(2) == [0, 1]
+
+    assert graph.fail(0) == [2, 3]
+    assert graph.done() is False
+
+    # A skipped task is never released by its other upstream tasks
+    graph.complete(1)
+    assert graph.take(5) == [4]
+    graph.complete(4)
+    assert graph.done() is True
+
+
+def test_fail_counts_shared_dependents_once():
+    graph = _chain()
+    graph.take(2)
+    assert graph.fail(0) == [2, 3]
+    assert graph.fail(1) == [4]
+    assert graph.completed == len(graph)
+    assert graph.has_ready() is False
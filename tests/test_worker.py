@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from utils.workerops.worker import Worker
+
+MANIP_PLUGIN = """
+import os
+import sys
+import uuid
+
+import joblib
+import pandas as pd
+
+params = joblib.load(sys.argv[2])
+pickle_path = params["tmp_path"] + "/" + str(uuid.uuid4()) + ".pkl"
+joblib.dump(pd.DataFrame({"feature": [1.0, 2.0, 3.0], "label": [0.0, 1.0, 0.0]}), pickle_path)
+print(pickle_path)
+"""
+
+TRAIN_PLUGIN = """
+import sys
+
+import joblib
+
+params = joblib.load(sys.argv[2])
+assert len(params["dataframe"]) == 3
+"""
+
+
+@pytest.fixture(params=[False, True], ids=["subprocess", "plugin-host"])
+def worker(request, tmp_path, monkeypatch):
+    # Plugin hosts import jespipe from the repository instead of an installed copy
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/.tmp")
+    os.makedirs("data/.logs/worker-1")
+    open("dataset.csv", "wt").write("1.0,0.0\n2.0,1.0\n3.0,0.0\n")
+    open("manip.py", "wt").write(MANIP_PLUGIN)
+    open("train.py", "wt").write(TRAIN_PLUGIN)
+    open("config.json", "wt").write(json.dumps({"workers": {"plugin_host": request.param, "handoff_path": ""},
+                                                "cache": {"manip_path": "data/.cache/manips"}}))
+
+    worker = Worker(None, 1, str(tmp_path), sys.executable, "test", "config.json")
+    worker.logger = logging.getLogger("test-worker")
+    yield worker
+
+    while worker.hosts.empty() is False:
+        worker.hosts.get().close()
+
+
+def _task(worker: Worker) -> tuple:
+    task = ("dataset", worker.root_path + "/dataset.csv", "model", "algorithm", dict(), worker.root_path + "/train.py",
+            "manip", "tag", worker.root_path + "/manip.py", {"placeholder": 1})
+    return task + (worker.manip_cache.key(task[1], task[8], task[9]),)
+
+
+def test_train_cache_miss_leaves_no_tmp_files(worker):
+    task = _task(worker)
+    assert worker._train(task) is True
+    assert os.listdir(worker.root_path + "/data/.tmp") == []
+    assert worker.manip_cache.has(task[10])
+
+
+def test_manip_then_train_leaves_no_tmp_files(worker):
+    task = _task(worker)
+    assert worker._manip(task) is True
+    assert worker._train(task) is True
+    assert os.listdir(worker.root_path + "/data/.tmp") == []
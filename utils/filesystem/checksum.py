@@ -0,0 +1,29 @@
+import hashlib
+import os
+
+_digests = dict()
+
+
+def filedigest(file_path: str) -> str:
+    """
+    Hash the content of a file. Digests are remembered for as long as the
+    file keeps its size and modification time, so large datasets and plugins
+    referenced by many directives are only read once.
+
+    ### Parameters:
+    :param file_path: System file path to the file to hash.
+
+    ### Returns:
+    :return: Hexadecimal SHA-256 digest of the file.
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+    if key not in _digests:
+        h = hashlib.sha256()
+        with open(file_path, "rb") as fin:
+            for block in iter(lambda: fin.read(1 << 20), b""):
+                h.update(block)
+
+        _digests[key] = h.hexdigest()
+
+    return _digests[key]
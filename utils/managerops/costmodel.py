@@ -0,0 +1,136 @@
+import json
+import os
+from typing import List, Union
+
+
+class CostModel:
+    def __init__(self, history_file: str, smoothing: float = 0.5) -> None:
+        """
+        Cost model class to facilitate predicting directive runtimes from previous runs.
+        Predictions are used to serve the longest directives first so the slowest
+        directives do not become the tail of the pipeline.
+
+        ### Parameters:
+        :param history_file: System file path to the JSON file used to store directive durations.
+        :param smoothing: Weight of the newest duration in the exponential moving average (default: 0.5).
+
+        ### Methods:
+        - public
+          - key: Build the identity key of a directive for a given stage.
+          - predict: Predict the runtime of a directive in seconds.
+          - record: Record the measured runtime of a directive.
+          - save: Write the duration history back to the history file.
+        - private
+          - _family: Internal method to find the history entries sharing a key prefix.
+        """
+        self.history_file = history_file
+        self.smoothing = smoothing
+
+        # Start with an empty history if the file does not exist yet or is unreadable
+        try:
+            fin = open(history_file, "rt"); self.history = json.loads(fin.read()); fin.close()
+
+        except (OSError, ValueError):
+            self.history = dict()
+
+    def key(self, stage: str, directive: Union[list, tuple]) -> str:
+        """
+        Build the identity key of a directive for a given stage.
+
+        ### Parameters:
+        :param stage: Stage the directive belongs to. Supported stages are manip|train|attack|merge|evaluate|search|clean.
+        :param directive: Directive generated by scattershot.
+
+        ### Returns:
+        :return: Key identifying the directive across runs.
+        """
+        if stage == "manip":
+            # (dataset_name, manip_name, manip_tag)
+            fields = [directive[0], directive[6], directive[7]]
+
+        elif stage == "train":
+            # (dataset_name, algorithm, model_name, manip_name, manip_tag)
+            fields = [directive[0], directive[3], directive[2], directive[6], directive[7]]
+
+        elif stage == "attack":
+            # (dataset_name, attack_name, attack_tag, model_tag, shard_count, budget_count)
+            shard_count = directive[10][1] if len(directive) > 10 else 1
+            fields = [directive[0], directive[2], directive[3], directive[8], shard_count, len(directive[6].get("changes", []))]
+
+        elif stage == "merge":
+            # (dataset_name, attack_tag, model_tag, shard_count, budget_count)
+            fields = [directive[0], directive[3], directive[8], directive[10], len(directive[6]["changes"])]
+
+        elif stage in ["evaluate", "search"]:
+            # (dataset_name, attack_name, attack_tag, model_tag)
+            fields = [directive[0], directive[2], directive[3], directive[8]]
+
+        elif stage == "clean":
+            # (plot_name,)
+            fields = [directive[2]]
+
+        else:
+            raise ValueError("Received invalid stage {}. Supported stages are manip|train|attack|merge|evaluate|search|clean.".format(stage))
+
+        return "|".join([stage] + [str(field) for field in fields])
+
+    def predict(self, stage: str, directive: Union[list, tuple]) -> float:
+        """
+        Predict the runtime of a directive in seconds. Falls back to the average of
+        directives sharing all but the last identity field (e.g. the same attack on the
+        same model with another number of change budgets), then to the stage average, and finally to 0.
+
+        ### Parameters:
+        :param stage: Stage the directive belongs to.
+        :param directive: Directive generated by scattershot.
+
+        ### Returns:
+        :return: Predicted runtime of the directive in seconds.
+        """
+        key = self.key(stage, directive)
+        if key in self.history:
+            return self.history[key]["mean"]
+
+        for prefix in [key.rsplit("|", 1)[0] + "|", stage + "|"]:
+            family = self._family(prefix)
+            if family != []:
+                return sum(family) / len(family)
+
+        return 0.0
+
+    def record(self, stage: str, directive: Union[list, tuple], seconds: float) -> None:
+        """
+        Record the measured runtime of a directive.
+
+        ### Parameters:
+        :param stage: Stage the directive belongs to.
+        :param directive: Directive generated by scattershot.
+        :param seconds: Measured runtime of the directive in seconds.
+        """
+        key = self.key(stage, directive)
+        if key in self.history:
+            entry = self.history[key]
+            entry["mean"] = self.smoothing * seconds + (1 - self.smoothing) * entry["mean"]
+            entry["runs"] += 1
+
+        else:
+            self.history[key] = {"mean": seconds, "runs": 1}
+
+    def save(self) -> None:
+        """
+        Write the duration history back to the history file.
+        """
+        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+        fout = open(self.history_file, "wt"); fout.write(json.dumps(self.history, indent=4)); fout.close()
+
+    def _family(self, prefix: str) -> List[float]:
+        """
+        Internal method to find the history entries sharing a key prefix.
+
+        ### Parameters:
+        :param prefix: Key prefix to match.
+
+        ### Returns:
+        :return: Mean runtimes of the matching history entries.
+        """
+        return [entry["mean"] for key, entry in self.history.items() if key.startswith(prefix)]
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+from typing import Any, List, Union
+
+
+class RunManifest:
+    def __init__(self, manifest_file: str) -> None:
+        """
+        Run manifest class to facilitate skipping directives whose outputs are still valid.
+        The manifest records a fingerprint of the inputs of every directive that completed
+        successfully. A rerun only recomputes the directives whose inputs changed, whose
+        outputs went missing, or whose upstream directives are recomputed.
+
+        ### Parameters:
+        :param manifest_file: System file path to the JSON file used to store the fingerprints.
+
+        ### Methods:
+        - public
+          - key: Build the output key of a directive for a given stage.
+          - fingerprint: Hash the inputs of a directive.
+          - family: Get the fingerprints recorded for every directive whose key starts with a prefix.
+          - valid: Check if the outputs of a directive are still valid.
+          - schedule: Mark a directive as being recomputed.
+          - complete: Record the fingerprints of a directive that completed successfully.
+          - save: Write the manifest back to the manifest file.
+        """
+        self.manifest_file = manifest_file
+        self.pending = dict()
+
+        # Start with an empty manifest if the file does not exist yet or is unreadable
+        try:
+            fin = open(manifest_file, "rt"); self.entries = json.loads(fin.read()); fin.close()
+
+        except (OSError, ValueError):
+            self.entries = dict()
+
+    def key(self, stage: str, directive: Union[list, tuple], change: float = None) -> str:
+        """
+        Build the output key of a directive for a given stage.
+
+        ### Parameters:
+        :param stage: Stage the directive belongs to. Supported stages are train|attack|evaluate|search.
+        :param directive: Directive generated by scattershot.
+        :param change: Change budget of the adversarial example. Only used by the attack stage (default: None).
+
+        ### Returns:
+        :return: Key identifying the outputs of the directive across runs.
+        """
+        if stage == "train":
+            # (dataset_name, manip_tag, model_name) <- a model in its model directory
+            fields = [directive[0], directive[7], directive[2]]
+
+        elif stage == "attack":
+            # (dataset_name, model_tag, attack_tag, change) <- one adversarial example
+            fields = [directive[0], directive[8], directive[3], change]
+
+        elif stage in ["evaluate", "search"]:
+            # (dataset_name, model_tag, attack_tag)
+            fields = [directive[0], directive[8], directive[3]]
+
+        else:
+            raise ValueError("Received invalid stage {}. Supported stages are train|attack|evaluate|search.".format(stage))
+
+        return "|".join([stage] + [str(field) for field in fields])
+
+    def fingerprint(self, inputs: List[Any]) -> str:
+        """
+        Hash the inputs of a directive.
+
+        ### Parameters:
+        :param inputs: File digests, parameters, and upstream fingerprints the outputs depend on.
+
+        ### Returns:
+        :return: Hexadecimal fingerprint of the inputs.
+        """
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def family(self, prefix: str) -> List[str]:
+        """
+        Get the fingerprints recorded for every directive whose key starts with a prefix.
+
+        ### Parameters:
+        :param prefix: Key prefix to match (e.g. "train|dataset_name|manip_tag|" for a model directory).
+
+        ### Returns:
+        :return: Recorded fingerprints sorted by key.
+        """
+        return [self.entries[key] for key in sorted(self.entries.keys()) if key.startswith(prefix)]
+
+    def valid(self, key: str, fingerprint: str, outputs: List[str]) -> bool:
+        """
+        Check if the outputs of a directive are still valid.
+
+        ### Parameters:
+        :param key: Output key of the directive.
+        :param fingerprint: Fingerprint of the current inputs of the directive.
+        :param outputs: System file paths the directive is expected to have produced.
+
+        ### Returns:
+        :return: True if the recorded fingerprint matches and every output exists; False if otherwise.
+        """
+        return self.entries.get(key) == fingerprint and all([os.path.exists(output) for output in outputs])
+
+    def schedule(self, key: str, fingerprint: str) -> None:
+        """
+        Mark a directive as being recomputed. Its recorded fingerprint is dropped until it
+        completes successfully, so outputs left behind by an interrupted run are never trusted.
+
+        ### Parameters:
+        :param key: Output key of the directive.
+        :param fingerprint: Fingerprint of the current inputs of the directive.
+        """
+        self.entries.pop(key, None)
+        self.pending[key] = fingerprint
+
+    def complete(self, stage: str, directive: Union[list, tuple]) -> None:
+        """
+        Record the fingerprints of a directive that completed successfully and save the
+        manifest, so an interrupted run resumes from the last completed directive. An attack
+        directive records one fingerprint per change budget. The budgets of a sharded attack are
+        only recorded once its merge directive completes.
+
+        ### Parameters:
+        :param stage: Stage the directive belongs to. Directives of other stages than train|attack|merge|evaluate|search are ignored.
+        :param directive: Directive generated by scattershot.
+        """
+        if (stage == "attack" and len(directive) <= 10) or stage == "merge":
+            keys = [self.key("attack", directive, change) for change in directive[6]["changes"]]
+
+        elif stage in ["train", "evaluate", "search"]:
+            keys = [self.key(stage, directive)]
+
+        else:
+            return
+
+        for key in keys:
+            if key in self.pending:
+                self.entries[key] = self.pending.pop(key)
+
+        self.save()
+
+    def save(self) -> None:
+        """
+        Write the manifest back to the manifest file.
+        """
+        os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+        fout = open(self.manifest_file + ".part", "wt"); fout.write(json.dumps(self.entries, indent=4)); fout.close()
+        os.replace(self.manifest_file + ".part", self.manifest_file)
@@ -0,0 +1,179 @@
+import heapq
+from typing import Any, Callable, Iterable, List
+
+
+class TaskGraph:
+    def __init__(self) -> None:
+        """
+        Task graph class to facilitate dependency-driven execution of directives.
+        Every task holds a payload that is sent to a worker node and the ids of the
+        tasks it depends on. A task becomes ready as soon as all of its own upstream
+        tasks have completed, so downstream work no longer waits on a whole-stage barrier.
+        Tasks may only depend on tasks that were added before them. When a task fails,
+        every task downstream of it is skipped instead of run.
+
+        ### Methods:
+        - public
+          - add: Add a task to the graph.
+          - prioritize: Rank tasks by the predicted length of their critical path.
+          - has_ready: Check if any task is ready to be handed out.
+          - take: Take the highest priority ready tasks.
+          - complete: Mark a task as completed and release its downstream tasks.
+          - fail: Mark a task as failed and skip every task downstream of it.
+          - done: Check if every task in the graph has completed.
+          - payload: Get the payload of a task.
+        """
+        self.payloads = list()
+        self.successors = list()
+        self.pending = list()
+        self.priorities = list()
+        self.ready = list()
+        self.skipped = set()
+        self.completed = 0
+
+    def __len__(self) -> int:
+        """Return the number of tasks in the graph."""
+        return len(self.payloads)
+
+    def add(self, payload: Any, depends_on: Iterable[int] = (), priority: float = 0.0) -> int:
+        """
+        Add a task to the graph.
+
+        ### Parameters:
+        :param payload: Data sent to the worker node that executes the task.
+        :param depends_on: Ids of the tasks that must complete before this task can run (default: ()).
+        :param priority: Priority of the task. Higher priorities are handed out first (default: 0.0).
+
+        ### Returns:
+        :return: Id of the new task.
+        """
+        task_id = len(self.payloads)
+        depends_on = set(depends_on)
+        for dep in depends_on:
+            if dep >= task_id:
+                raise ValueError("Task {} can only depend on tasks added before it. Received dependency {}.".format(task_id, dep))
+
+            self.successors[dep].append(task_id)
+
+        self.payloads.append(payload)
+        self.successors.append(list())
+        self.pending.append(len(depends_on))
+        self.priorities.append(priority)
+
+        if len(depends_on) == 0:
+            heapq.heappush(self.ready, (-priority, task_id))
+
+        return task_id
+
+    def prioritize(self, cost: Callable[[Any], float]) -> None:
+        """
+        Rank tasks by the predicted length of their critical path, i.e. the task's own
+        predicted runtime plus the longest chain of downstream work behind it. Handing out
+        the highest ranked ready task first is the dependency-aware form of
+        longest-processing-time-first placement.
+
+        ### Parameters:
+        :param cost: Function returning the predicted runtime of a task payload in seconds.
+        """
+        # Tasks only depend on earlier tasks, so walking ids backwards visits successors first
+        for task_id in reversed(range(len(self.payloads))):
+            downstream = max([self.priorities[succ] for succ in self.successors[task_id]], default=0.0)
+            self.priorities[task_id] = cost(self.payloads[task_id]) + downstream
+
+        self.ready = [(-self.priorities[task_id], task_id) for _, task_id in self.ready]
+        heapq.heapify(self.ready)
+
+    def has_ready(self) -> bool:
+        """
+        Check if any task is ready to be handed out.
+
+        ### Returns:
+        :return: True if at least one task is ready; False if otherwise.
+        """
+        return len(self.ready) > 0
+
+    def take(self, count: int = 1, accept: Callable[[Any], bool] = None) -> List[int]:
+        """
+        Take the highest priority ready tasks. Ties are broken by insertion order.
+
+        ### Parameters:
+        :param count: Maximum number of tasks to take (default: 1).
+        :param accept: Function returning True if a task payload may be taken. Ready tasks
+        that are not accepted stay ready for the next call (default: None).
+
+        ### Returns:
+        :return: Ids of the tasks taken.
+        """
+        taken = list(); skipped = list()
+        while len(taken) < count and len(self.ready) > 0:
+            entry = heapq.heappop(self.ready)
+            if accept is None or accept(self.payloads[entry[1]]):
+                taken.append(entry[1])
+
+            else:
+                skipped.append(entry)
+
+        for entry in skipped:
+            heapq.heappush(self.ready, entry)
+
+        return taken
+
+    def complete(self, task_id: int) -> None:
+        """
+        Mark a task as completed and release its downstream tasks.
+
+        ### Parameters:
+        :param task_id: Id of the completed task.
+        """
+        self.completed += 1
+        for succ in self.successors[task_id]:
+            self.pending[succ] -= 1
+            if self.pending[succ] == 0 and succ not in self.skipped:
+                heapq.heappush(self.ready, (-self.priorities[succ], succ))
+
+    def fail(self, task_id: int) -> List[int]:
+        """
+        Mark a task as failed and skip every task downstream of it. The failed task and
+        the skipped tasks count as completed, so the graph can still finish.
+
+        ### Parameters:
+        :param task_id: Id of the failed task.
+
+        ### Returns:
+        :return: Ids of the tasks skipped because of the failure, in insertion order.
+        """
+        self.completed += 1
+        skipped = list(); stack = list(self.successors[task_id])
+        while len(stack) > 0:
+            succ = stack.pop()
+            if succ in self.skipped:
+                continue
+
+            # Downstream tasks cannot be ready yet since the failed task never released them
+            self.skipped.add(succ)
+            skipped.append(succ)
+            stack.extend(self.successors[succ])
+
+        self.completed += len(skipped)
+        return sorted(skipped)
+
+    def done(self) -> bool:
+        """
+        Check if every task in the graph has completed.
+
+        ### Returns:
+        :return: True if every task has completed; False if otherwise.
+        """
+        return self.completed == len(self.payloads)
+
+    def payload(self, task_id: int) -> Any:
+        """
+        Get the payload of a task.
+
+        ### Parameters:
+        :param task_id: Id of the task.
+
+        ### Returns:
+        :return: Payload of the task.
+        """
+        return self.payloads[task_id]
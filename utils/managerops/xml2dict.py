@@ -172,6 +172,11 @@ def xml2dict(xml_file: str, config_dict: dict) -> dict:
                                 feat = _data_converter(feat["value"], feat["type"])
                                 tmp_dict.update({param: feat})
 
+                        # Optional attack parameters without a default in the config are read as well
+                        for feat in current_attack.find_all(recursive=False):
+                            if feat.name not in tmp_dict and feat.has_attr("value"):
+                                tmp_dict.update({feat.name: _data_converter(feat["value"], feat.get("type", "str"))})
+
                         d["attack"][data_name][attack][current_attack["tag"]] = dict()
                         try:
                             d["attack"][data_name][attack][current_attack["tag"]]["plugin"] = current_attack["plugin"]
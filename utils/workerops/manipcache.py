@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Any, Union
+
+import joblib
+
+from ..filesystem import checksum
+
+
+class ManipCache:
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        """
+        Manipulation cache class to facilitate reusing the output of data manipulations.
+        Entries are keyed by the content of the dataset, the source of the manipulation
+        plugin, and the manipulation parameters, so every model trained on the same
+        manipulation reuses one result, within a run and across runs. The least recently
+        used entries are evicted once the cache grows past its size limit.
+
+        ### Parameters:
+        :param cache_dir: System file path to the directory that holds the cache entries.
+        :param max_bytes: Maximum combined size of the cache entries in bytes.
+
+        ### Methods:
+        - public
+          - key: Build the cache key of a data manipulation.
+          - has: Check if the cache holds an entry.
+          - load: Load the manipulated dataset of an entry.
+          - store: Move a pickled manipulated dataset into the cache.
+        - private
+          - _evict: Internal method to remove the least recently used entries until the cache fits its size limit.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, dataset_path: str, plugin_path: str, manip_params: dict) -> str:
+        """
+        Build the cache key of a data manipulation.
+
+        ### Parameters:
+        :param dataset_path: System file path to the dataset.
+        :param plugin_path: System file path to the manipulation plugin.
+        :param manip_params: Parameters of the manipulation.
+
+        ### Returns:
+        :return: Hexadecimal cache key.
+        """
+        h = hashlib.sha256()
+        h.update(checksum.filedigest(dataset_path).encode())
+        h.update(checksum.filedigest(plugin_path).encode())
+        h.update(json.dumps(manip_params, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    def has(self, key: str) -> bool:
+        """
+        Check if the cache holds an entry.
+
+        ### Parameters:
+        :param key: Cache key of the data manipulation.
+
+        ### Returns:
+        :return: True if the entry exists; False if otherwise.
+        """
+        return os.path.isfile(self.cache_dir + "/" + key + ".pkl")
+
+    def load(self, key: str) -> Union[Any, None]:
+        """
+        Load the manipulated dataset of an entry and mark the entry as recently used.
+
+        ### Parameters:
+        :param key: Cache key of the data manipulation.
+
+        ### Returns:
+        :return: Manipulated dataset, or None if the entry does not exist or was evicted while loading.
+        """
+        entry = self.cache_dir + "/" + key + ".pkl"
+        try:
+            dataset = joblib.load(entry)
+            os.utime(entry)
+
+        except (OSError, EOFError):
+            return None
+
+        return dataset
+
+    def store(self, key: str, pickle_path: str) -> None:
+        """
+        Add a pickled manipulated dataset to the cache. The pickle is moved into the cache,
+        so it no longer exists at pickle_path afterwards. The entry appears atomically, so
+        other nodes never load a partially written entry.
+
+        ### Parameters:
+        :param key: Cache key of the data manipulation.
+        :param pickle_path: System file path to the pickled manipulated dataset.
+        """
+        # Renamed in place when the pickle is on the same filesystem as the cache; copied and removed otherwise
+        partial = self.cache_dir + "/." + str(uuid.uuid4()) + ".part"
+        shutil.move(pickle_path, partial)
+        os.replace(partial, self.cache_dir + "/" + key + ".pkl")
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Internal method to remove the least recently used entries until the cache fits its size limit.
+        """
+        entries = list()
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                try:
+                    stat = os.stat(self.cache_dir + "/" + name)
+                    entries.append((stat.st_mtime, stat.st_size, name))
+
+                except OSError:
+                    continue
+
+        entries.sort()
+        total = sum([entry[1] for entry in entries])
+        for mtime, entry_size, name in entries:
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(self.cache_dir + "/" + name)
+
+            except OSError:
+                pass
+
+            total -= entry_size
+
+
+def from_config(config: dict, root_path: str) -> ManipCache:
+    """
+    Create the manipulation cache described by the "cache" block of the configuration file.
+
+    ### Parameters:
+    :param config: Parsed Jespipe configuration file.
+    :param root_path: Root directory of Jespipe. Relative cache paths are resolved against it.
+
+    ### Returns:
+    :return: Manipulation cache.
+    """
+    settings = config.get("cache", dict())
+    cache_dir = settings.get("manip_path", "data/.cache/manips")
+    if os.path.isabs(cache_dir) is False:
+        cache_dir = root_path + "/" + cache_dir
+
+    return ManipCache(cache_dir, int(float(settings.get("manip_max_gb", 10)) * 1024 ** 3))
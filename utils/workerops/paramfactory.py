@@ -4,6 +4,7 @@ from typing import List
 import joblib
 import numpy as np
 import pandas as pd
+from jespipe.plugin import handoff
 
 
 def manip_factory(dataset_path: str, manip_tag: str, manip_params: str, save_path: str, 
@@ -38,7 +39,8 @@ def manip_factory(dataset_path: str, manip_tag: str, manip_params: str, save_pat
 
 
 def train_factory(name: str, original_data_path: str, model_name: str, dataframe: pd.DataFrame, model_params: dict, 
-                    manip_params: dict, save_path: str, manip_name: str, manip_tag: str, root_path: str) -> str:
+                    manip_params: dict, save_path: str, manip_name: str, manip_tag: str, root_path: str,
+                    handoff_path: str = None) -> str:
     """
     Create parameter dictionary that will be sent out to the user-specified training plugin
     in the training stage. Save the parameter dictionary as a pickle file.
@@ -54,6 +56,7 @@ def train_factory(name: str, original_data_path: str, model_name: str, dataframe
     :param manip_name: name of the manipulation used on the pandas DataFrame.
     :param manip_tag: Tag to uniquely identify specific dataset manipulation.
     :param root_path: Root directory of Jespipe.
+    :param handoff_path: Node-local directory to share the DataFrame through instead of pickling it (default: None).
 
     ### Returns:
     :return: System file path reference to pickled parameter dictionary.
@@ -65,6 +68,10 @@ def train_factory(name: str, original_data_path: str, model_name: str, dataframe
     d["dataset_name"] = name; d["model_name"] = model_name; d["original_dataset"] = original_data_path
     d["dataframe"] = dataframe; d["model_params"] = model_params; d["manip_params"] = manip_params
 
+    # Share the DataFrame through node-local storage so the plugin can memory-map it
+    if handoff_path is not None:
+        d["dataframe"] = handoff.share(dataframe, handoff_path)
+
     # Generate save_path and log_path then add to root dictionary
     log_path = save_path + "/stat"
     d["save_path"] = save_path; d["log_path"] = log_path
@@ -89,8 +96,9 @@ def attack_factory(name: str, model_path: str, model_tag: str, model_test_featur
     :param name: Name of the attack.
     :param model_path: System file path of model to attack.
     :param model_tag: Tag used to uniquely identify models.
-    :param model_test_features: The data to manipulate for the attack.
-    :param attack_params: Parameters to use for the attack.
+    :param model_test_features: The data to manipulate for the attack, or a descriptor created by jespipe.plugin.handoff.share.
+    :param attack_params: Parameters to use for the attack. Holds the list of change budgets under "changes"
+    for plugins that declare JESPIPE_MULTI_BUDGET = True; otherwise the single budget under "change".
     :param save_path: System location save the adversarial examples.
     :param root_path: Root directory of Jespipe.
 
@@ -115,7 +123,7 @@ def attack_factory(name: str, model_path: str, model_tag: str, model_test_featur
 
 
 def attack_train_factory(adver_features: List[str], attack_name: str, model_labels: np.ndarray, 
-                            log_path: str, model_path: str, root_path: str) -> str:
+                            log_path: str, model_path: str, root_path: str, merge_log: bool = False) -> str:
     """
     Create parameter dictionary that will be sent out to the user-specified training plugin 
     in the attack stage. Save the parameter dictionary as a pickle file.
@@ -123,10 +131,12 @@ def attack_train_factory(adver_features: List[str], attack_name: str, model_labe
     ### Parameters:
     :param adver_features: List containing system file path references to adversarial data for attack.
     :param attack_name: Name for the attack that the model is being evaulated on.
-    :param model_labels: The target feature(s) to evaluate the model on.
+    :param model_labels: The target feature(s) to evaluate the model on, or a descriptor created by jespipe.plugin.handoff.share.
     :param log_path: System location to save data collected on model during attack.
     :param model_path: System file path of model.
     :param root_path: Root directory of Jespipe.
+    :param merge_log: Add the statistics to the logs the model plugin saved for the attack in an earlier call
+    instead of starting over from the baseline statistics (default: False).
 
     ### Returns:
     :return: System file path reference to pickled parameter dictionary.
@@ -138,6 +148,7 @@ def attack_train_factory(adver_features: List[str], attack_name: str, model_labe
     d["model_labels"] = model_labels
     d["log_path"] = log_path
     d["model_path"] = model_path
+    d["merge_log"] = merge_log
 
     # Establish path to file in .tmp directory and dump dictionary
     pickle_path = root_path + "/data/.tmp/" + str(uuid.uuid4()) + ".pkl"
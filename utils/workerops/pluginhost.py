@@ -0,0 +1,175 @@
+import ast
+import os
+import subprocess
+from multiprocessing.connection import Connection
+from typing import List, TextIO, Tuple, Union
+
+
+def declares(plugin_file: str, name: str, default: bool) -> bool:
+    """
+    Read a boolean flag a plugin declares at module level (e.g. JESPIPE_PERSISTENT = False).
+    The plugin is parsed, not imported, so the check is cheap and side-effect free.
+
+    ### Parameters:
+    :param plugin_file: System file path to the plugin.
+    :param name: Name of the module-level flag.
+    :param default: Value of the flag if the plugin does not declare it.
+
+    ### Returns:
+    :return: Value of the flag, or False if the plugin cannot be parsed.
+    """
+    try:
+        fin = open(plugin_file, "rt"); tree = ast.parse(fin.read()); fin.close()
+
+    except (OSError, SyntaxError):
+        return False
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any([isinstance(target, ast.Name) and target.id == name for target in node.targets]):
+            try:
+                return bool(ast.literal_eval(node.value))
+
+            except ValueError:
+                return default
+
+    return default
+
+
+def persistent(plugin_file: str) -> bool:
+    """
+    Check if a plugin may run inside a persistent plugin host. Plugins opt out by
+    setting JESPIPE_PERSISTENT = False at module level, e.g. when they rely on
+    process-wide state that must not leak into the next call.
+
+    ### Parameters:
+    :param plugin_file: System file path to the plugin.
+
+    ### Returns:
+    :return: True if the plugin may run in a plugin host; False if otherwise.
+    """
+    return declares(plugin_file, "JESPIPE_PERSISTENT", True)
+
+
+def multi_budget(plugin_file: str) -> bool:
+    """
+    Check if an attack plugin generates adversarial examples for every change budget in one call.
+    Plugins opt in by setting JESPIPE_MULTI_BUDGET = True at module level. They then receive the
+    list of budgets as attack_params["changes"] instead of a single attack_params["change"] and
+    save one adversarial example per budget.
+
+    ### Parameters:
+    :param plugin_file: System file path to the attack plugin.
+
+    ### Returns:
+    :return: True if the plugin accepts every budget in one call; False if otherwise.
+    """
+    return declares(plugin_file, "JESPIPE_MULTI_BUDGET", False)
+
+
+def shardable(plugin_file: str) -> bool:
+    """
+    Check if an attack plugin can attack a shard of the test features. Plugins opt in by setting
+    JESPIPE_SHARDABLE = True at module level. They still receive every test feature, so statistics
+    over the whole test set stay the same, together with attack_params["shard"] = [index, count], and
+    save adversarial examples for the rows of shard index out of count only. Shards are merged back
+    in shard order, so shard index must cover the rows between those of shard index - 1 and index + 1.
+
+    ### Parameters:
+    :param plugin_file: System file path to the attack plugin.
+
+    ### Returns:
+    :return: True if the plugin can attack a shard of the test features; False if otherwise.
+    """
+    return declares(plugin_file, "JESPIPE_SHARDABLE", False)
+
+
+class PluginHost:
+    def __init__(self, python_path: str, env: dict, log_file: str) -> None:
+        """
+        Plugin host class to facilitate running plugins in a long-lived Python interpreter.
+        The host is started on first use and imports every plugin module it runs only once,
+        so later calls skip the interpreter and tensorflow start-up cost. Plugins that register
+        stage handlers are called directly with in-memory objects. Requests and exit
+        statuses travel over a dedicated pair of pipes while each call's stdout and stderr
+        go to that call's logfile.
+
+        ### Parameters:
+        :param python_path: System file path to the Python interpreter used to launch the host.
+        :param env: Environment variables for the host process.
+        :param log_file: System file path to the logfile for output of the host outside plugin calls.
+
+        ### Methods:
+        - public
+          - run: Run a chain of plugin calls in the host and block until it has completed.
+          - close: Shut down the host process.
+        - private
+          - _start: Internal method to launch the host process.
+        """
+        self.python_path = python_path
+        self.env = env
+        self.log_file = log_file
+        self.process = None
+        self.requests = None
+        self.replies = None
+
+    def run(self, steps: List[Tuple[str, str, str, Union[str, None], Union[str, None]]], fout: TextIO) -> int:
+        """
+        Run a chain of plugin calls in the host and block until it has completed. A host
+        that dies during a call is restarted on the next call.
+
+        ### Parameters:
+        :param steps: List of (plugin_file, stage, parameters, inject, keep) tuples. See jespipe.plugin.host.call.
+        :param fout: Open logfile the plugins' stdout and stderr are appended to.
+
+        ### Returns:
+        :return: Exit status of the chain.
+
+        ### Raises:
+        - subprocess.SubprocessError
+          - Raised if the host process exits before answering.
+        """
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+
+        fout.flush()
+        try:
+            self.requests.send((steps, fout.name))
+            return self.replies.recv()
+
+        except (EOFError, OSError):
+            self.close()
+            raise subprocess.SubprocessError("Plugin host exited while running {}.".format(
+                ", ".join(["{} {}".format(step[0], step[1]) for step in steps])))
+
+    def close(self) -> None:
+        """
+        Shut down the host process.
+        """
+        if self.process is None:
+            return
+
+        try:
+            self.requests.send(None)
+
+        except OSError:
+            pass
+
+        self.requests.close(); self.replies.close()
+        self.process.wait()
+        self.process = None
+
+    def _start(self) -> None:
+        """
+        Internal method to launch the host process.
+        """
+        request_r, request_w = os.pipe()
+        reply_r, reply_w = os.pipe()
+
+        fout = open(self.log_file, "at")
+        self.process = subprocess.Popen([self.python_path, "-m", "jespipe.plugin.host", str(request_r), str(reply_w)],
+                                        stdin=subprocess.DEVNULL, stdout=fout, stderr=fout, env=self.env,
+                                        pass_fds=(request_r, reply_w))
+        fout.close(); os.close(request_r); os.close(reply_w)
+
+        self.requests = Connection(request_w, readable=False)
+        self.replies = Connection(reply_r, writable=False)
@@ -1,8 +1,14 @@
-from typing import List, Tuple
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Tuple, Union
 
-import numpy as np
+from mpi4py import MPI
+from tqdm import tqdm
 
 from ..filesystem import getpaths as gp
+from ..managerops.taskgraph import TaskGraph
 
 
 def generate_train(macro_list: List) -> List[Tuple[str, str, str, str, dict, str, str, str, str, dict]]:
@@ -67,11 +73,13 @@ def generate_attack(macro_list: List) -> List[Tuple[str, str, str, str, str, str
     
     ### Parameters:
     :param macro_list: Low-level attack tuple list to be convertered into a scatterable list
-    for later task delegation to the worker nodes.
+    for later task delegation to the worker nodes. Index 3 of each tuple holds the
+    (model_path, model_tag, model_root_path) of every model to attack. model_path is None
+    for models that have not been trained yet.
 
     ### Returns:
     :return: [(dataset_name, dataset_path, attack_type, attack_tag, attack_plugin, model_plugin, 
-    attack_parameters, model_path, model_root_path)]
+    attack_parameters, model_path, model_tag, model_root_path)]
     - Positional value of each index in a tuple contained in the scatterable list:
       - 0: "dataset_name"
       - 1: "/path/to/dataset"
@@ -80,8 +88,9 @@ def generate_attack(macro_list: List) -> List[Tuple[str, str, str, str, str, str
       - 4: "/path/to/attack/plugin.py"
       - 5: "/path/to/model/plugin.py"
       - 6: {"attack_param": value}
-      - 7: "/path/to/model"
-      - 8: "/path/to/model/root/path"
+      - 7: "/path/to/model" or None
+      - 8: "model_tag"
+      - 9: "/path/to/model/root/path"
     """
     # Initialize root list that will be returned to main.py
     root = list()
@@ -106,9 +115,8 @@ def generate_attack(macro_list: List) -> List[Tuple[str, str, str, str, str, str
                     # Loop through each model and then append to root list
                     if directive[3] != []:
                         for model in directive[3]:
-                            # Grab model root path (use this to find test features and test labels)
-                            model_root = model[0].split("/"); del model_root[-1]; model_root = "/".join(model_root)
-                            root.append((dataset_name, dataset_path, attack_name, attack_tag, attack_plugin, model_plugin, params, model[0], model[1], model_root))
+                            # Model root path is used to find test features and test labels
+                            root.append((dataset_name, dataset_path, attack_name, attack_tag, attack_plugin, model_plugin, params, model[0], model[1], model[2]))
 
                     else:
                         root.append((dataset_name, dataset_path, attack_name, attack_tag, attack_plugin, model_plugin, params, None, None))
@@ -154,52 +162,170 @@ def generate_clean(plot_dict: dict, save_path: str, data_path: str) -> List[Tupl
     return root
 
 
-def slice(directive_list: List, mpi_size: int) -> List[List]:
+def dispatch(communicator, comm_size: int, directives: Union[List, TaskGraph], chunk_size: int = 1, **kwargs) -> None:
     """
-    Slice up a directive list into a number of chuncks.
-    The total number of chunks is determined by how many worker 
-    nodes are available in the MPI.COMM_WORLD.
+    Serve directives to the worker nodes in the MPI.COMM_WORLD on request. Workers
+    pull the next ready directives from the manager as soon as they have a free execution
+    slot, so one slow task no longer holds up the directives queued behind it.
+    When a task graph is passed, a directive is only served once its upstream directives
+    have completed; the directives downstream of a failed directive are skipped. A worker asking for work while nothing is ready is told to retry later
+    if it still has directives running; otherwise it waits until something becomes ready.
+    Returns once every directive has completed and every worker has been told to stop.
     
     ### Parameters:
-    :param directive_list: Directive list to slice into chunks.
-    :param mpi_size: Size of the MPI.COMM_WORLD (typically MPI.COMM_WORLD.Get_size()).
-
-    ### Returns:
-    :return: List containing desired number of chunks.
+    :param communicator: Communicator variable used to communicate with nodes in the 
+    MPI.COMM_WORLD (typically comm = MPI.COMM_WORLD).
+    :param comm_size: Size of the MPI.COMM_WORLD (typically MPI.COMM_WORLD.Get_size()).
+    :param directives: Directive list or task graph of directives to serve to the worker nodes.
+    A directive list is served in order.
+    :param chunk_size: Maximum number of directives to hand out per request (default: 1).
+    - kwargs
+      - desc: Description to use for the task completion progress bar.
+      - disable: Disable the task completion progress bar (default: False).
+      - callback: Function called as callback(directive, seconds) for every directive that completed without errors.
+      - success: Function called as success(directive) for every directive that completed without errors.
+      - skip: Function called as skip(directive, skipped) once for every failed directive with the list of
+      directives skipped because of it.
+
+    ### Raises:
+    - RuntimeError
+      - Raised if no directive can become ready while the task graph is unfinished.
     """
-    # Initialize empty list that will be returned to main.py
-    root = list()
-
-    # Returned sliced list using numpy
-    tmp_list = np.array_split(directive_list, mpi_size-1)
-    for array in tmp_list:
-        root.append(array.tolist())
-
-    return root
-
-
-def delegate(communicator, comm_size: int, sliced_directives: List) -> List[int]:
+    if isinstance(directives, TaskGraph):
+        graph = directives
+
+    else:
+        graph = TaskGraph()
+        for directive in directives:
+            graph.add(directive)
+
+    active_nodes = comm_size - 1
+    waiting = dict()
+    in_flight = {node: set() for node in range(1, comm_size)}
+    callback = kwargs.get("callback")
+    success = kwargs.get("success")
+    skip = kwargs.get("skip")
+    status = MPI.Status()
+
+    with tqdm(total=len(graph), desc=kwargs.get("desc"), disable=kwargs.get("disable", False)) as progress:
+        while active_nodes > 0:
+            # Each request carries the runtime and outcome of the directives the worker finished since
+            # its last request, the number of free slots, and the stages those slots accept
+            finished, want, accept = communicator.recv(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
+            node = status.Get_source()
+            progress.update(len(finished))
+
+            for task_id, seconds, ok in finished:
+                in_flight[node].discard(task_id)
+                if ok is False:
+                    # Downstream directives would only fail against outputs that were never written
+                    skipped = graph.fail(task_id)
+                    progress.update(len(skipped))
+                    if skip is not None and skipped != []:
+                        skip(graph.payload(task_id), [graph.payload(skipped_id) for skipped_id in skipped])
+
+                    continue
+
+                graph.complete(task_id)
+                if callback is not None:
+                    callback(graph.payload(task_id), seconds)
+
+                if success is not None:
+                    success(graph.payload(task_id))
+
+            # Hand ready directives to every waiting worker
+            waiting[node] = (want, accept)
+            for waiting_node in list(waiting.keys()):
+                want, accept = waiting[waiting_node]
+                if want == 0 or graph.has_ready() is False:
+                    continue
+
+                task_ids = graph.take(min(want, chunk_size), None if accept is None else lambda payload: payload[0] in accept)
+                if task_ids != []:
+                    in_flight[waiting_node].update(task_ids)
+                    communicator.send([(task_id, graph.payload(task_id)) for task_id in task_ids], dest=waiting_node, tag=waiting_node)
+                    del waiting[waiting_node]
+
+            if graph.done():
+                # None tells the worker that the directives are drained
+                for waiting_node in waiting.keys():
+                    communicator.send(None, dest=waiting_node, tag=waiting_node)
+                    active_nodes -= 1
+
+                waiting.clear()
+
+            elif node in waiting and len(in_flight[node]) > 0:
+                # Worker still has directives running, so it reports back when one of them finishes
+                communicator.send([], dest=node, tag=node)
+                del waiting[node]
+
+            elif len(waiting) == active_nodes and all([len(tasks) == 0 for tasks in in_flight.values()]):
+                # Release every worker before giving up so that none of them blocks in recv
+                for waiting_node in waiting.keys():
+                    communicator.send(None, dest=waiting_node, tag=waiting_node)
+
+                raise RuntimeError("Task graph stalled with {} of {} directives completed.".format(graph.completed, len(graph)))
+
+
+def execute(communicator, rank: int, handler: Callable[[Any], Union[bool, None]], slots: int = 1, **kwargs) -> None:
     """
-    Send task list to every available worker node in the MPI.COMM_WORLD.
-    Task list is sent using sliced directive list.
+    Pull directives from the manager node and run them on up to slots concurrent execution
+    slots. Only the calling thread communicates with the manager node; the handler runs on a
+    thread pool, so it should hand heavy work to a subprocess. The runtime of every directive
+    is reported back with the next request, along with whether it succeeded.
     
     ### Parameters:
     :param communicator: Communicator variable used to communicate with nodes in the 
     MPI.COMM_WORLD (typically comm = MPI.COMM_WORLD).
-    :param comm_size: Size of the MPI.COMM_WORLD (typically MPI.COMM_WORLD.Get_size()).
-    :param sliced_directives: Sliced directive list containing task to send to the worker nodes.
-
-    ### Returns:
-    :return: List containing the rank of each worker node in the MPI.COMM_WORLD.
+    :param rank: Rank of the worker node in the MPI.COMM_WORLD (typically MPI.COMM_WORLD.Get_rank()).
+    :param handler: Function called as handler(directive) for every directive served. A directive
+    counts as failed if the handler returns False or raises an exception.
+    :param slots: Maximum number of directives to run at the same time (default: 1).
+    - kwargs
+      - stage_slots: Dictionary capping the number of concurrent directives per stage for
+      (stage, directive) payloads. Stages missing from the dictionary are never requested.
+      - poll: Seconds to wait before asking again when the manager has nothing ready (default: 1.0).
     """
-    # Define node rank in order to send messages out
-    node_rank = [i+1 for i in range(comm_size-1)]
+    stage_slots = kwargs.get("stage_slots")
+    poll = kwargs.get("poll", 1.0)
+    running = dict()
+    finished = list()
 
-    # Send slices out to the workers
-    node_iter = 0
-    for slice in sliced_directives:
-        communicator.send(slice, dest=node_rank[node_iter], tag=node_rank[node_iter])
-        node_iter += 1
+    def timed(directive: Any) -> Tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            ok = handler(directive) is not False
 
-    # Send node_rank back to main.py so it can track task completion
-    return node_rank
+        except Exception:
+            traceback.print_exc(); ok = False
+
+        return time.perf_counter() - start, ok
+
+    with ThreadPoolExecutor(max_workers=slots) as executor:
+        while True:
+            # Collect the directives that finished since the last request
+            for future in [future for future in running.keys() if future.done()]:
+                task_id, stage = running.pop(future)
+                seconds, ok = future.result()
+                finished.append((task_id, seconds, ok))
+
+            if stage_slots is None:
+                accept = None; want = slots - len(running)
+
+            else:
+                busy = Counter([stage for task_id, stage in running.values()])
+                accept = [stage for stage, limit in stage_slots.items() if busy[stage] < limit]
+                want = slots - len(running) if accept != [] else 0
+
+            communicator.send((finished, want, accept), dest=0, tag=rank)
+            finished = list()
+            chunk = communicator.recv(source=0, tag=rank)
+            if chunk is None:
+                break
+
+            for task_id, directive in chunk:
+                running[executor.submit(timed, directive)] = (task_id, None if stage_slots is None else directive[0])
+
+            # Ask again right away while slots are free; otherwise wait for a directive to finish
+            if chunk == [] or len(running) >= slots:
+                wait(running.keys(), timeout=poll if chunk == [] and want > 0 else None, return_when=FIRST_COMPLETED)
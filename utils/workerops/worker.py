@@ -0,0 +1,790 @@
+import collections
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from typing import List, TextIO, Tuple, Union
+
+import joblib
+import numpy as np
+from jespipe.plugin import handoff, save
+from jespipe.plugin.host import result_pickle, scratch
+
+from ..filesystem import getpaths as gp
+from . import manipcache
+from . import scattershot as sst
+from .paramfactory import (attack_factory, attack_train_factory,
+                           clean_factory, manip_factory, train_factory)
+from .pluginhost import PluginHost, multi_budget, persistent
+
+
+class Worker:
+    def __init__(self, communicator, rank: int, root_path: str, python_path: str, time: str, config_file: str) -> None:
+        """
+        Worker class to facilitate executing the tasks served by the manager node.
+        One instance runs on every worker node in the MPI.COMM_WORLD regardless of
+        the size of the MPI.COMM_WORLD. Each instance runs up to "slots" plugins at the
+        same time as set in the "workers" block of the configuration file. Unless
+        "plugin_host" is disabled, plugins run in persistent plugin hosts, one per slot.
+        Arrays are handed to plugins as .npy files under "handoff_path" on node-local
+        storage unless it is set to an empty string.
+
+        ### Parameters:
+        :param communicator: Communicator variable used to communicate with nodes in the
+        MPI.COMM_WORLD (typically comm = MPI.COMM_WORLD).
+        :param rank: Rank of the worker node in the MPI.COMM_WORLD (typically MPI.COMM_WORLD.Get_rank()).
+        :param root_path: Root directory of Jespipe.
+        :param python_path: System file path to the Python interpreter used to launch plugins.
+        :param time: Timestamp used to name the worker's log files.
+        :param config_file: System file path to the Jespipe configuration file.
+
+        ### Methods:
+        - public
+          - run: Execute the tasks served by the manager node until every task has been handed out.
+        - private
+          - _load_config: Internal method to read the worker and cache settings from the configuration file.
+          - _plugin_env: Internal method to build the environment plugins are launched with.
+          - _hosted: Internal method to check if a plugin runs in a plugin host.
+          - _launch: Internal method to run a chain of plugin calls and block until it has completed.
+          - _shared: Internal method to load a pickled array once and share it with every plugin on this node.
+          - _release: Internal method to hand back an array shared by _shared once a task is done with it.
+          - _model_path: Internal method to resolve the system file path of the model targeted by an attack directive.
+          - _train: Internal method to manipulate a dataset and train a model on it.
+          - _manip: Internal method to manipulate a dataset once for every model trained on the manipulation.
+          - _manipulate: Internal method to run a manipulation plugin on its own.
+          - _attack: Internal method to generate adversarial examples for a trained model.
+          - _merge: Internal method to merge the adversarial examples generated by the shards of an attack.
+          - _evaluate: Internal method to evaluate a trained model on its adversarial examples.
+          - _search: Internal method to search the change budgets at which a trained model breaks.
+          - _generate_adver: Internal method to run an attack plugin on a trained model for a list of change budgets.
+          - _evaluate_adver: Internal method to run the evaluation of a model plugin on a list of adversarial examples.
+          - _plot: Internal method to generate a plot with a plotting plugin.
+        """
+        self.comm = communicator
+        self.rank = rank
+        self.root_path = root_path
+        self.python_path = python_path
+        self.time = time
+        self.log_dir = "data/.logs/worker-{}".format(rank)
+        self.logger = None
+        self._load_config(config_file)
+        self.hosts = queue.Queue()
+        self.host_count = 0
+        self.persistent = dict()
+        self.handoff_root = None
+        self.handoff_cache = collections.OrderedDict()
+        self.handoff_lock = threading.Lock()
+
+    def run(self) -> None:
+        """
+        Execute the training, attack, evaluation, and plotting tasks served by the manager
+        node until the manager reports that every task has been handed out.
+        """
+        greenlight = self.comm.recv(source=0, tag=self.rank)
+        if greenlight != 1:
+            sys.exit(127)
+
+        # After getting greenlight, create logger for node
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.logger = logging.getLogger("worker-{}-logger".format(self.rank))
+        f_handler = logging.FileHandler("{}/{}.log".format(self.log_dir, self.time))
+        self.logger.addHandler(f_handler)
+        logging.getLogger(handoff.__name__).addHandler(f_handler)
+        self.logger.warning("INFO: Received greenlight message {} from manager node. Begin execution.".format(greenlight))
+
+        self.logger.warning("INFO: Running up to {} plugins at a time with {} threads each.".format(self.slots, self.threads))
+
+        if self.handoff_path != "":
+            base = self.handoff_path if os.path.isdir(self.handoff_path) else tempfile.gettempdir()
+            self.handoff_root = tempfile.mkdtemp(prefix="jespipe-worker-{}-".format(self.rank), dir=base)
+            self.logger.warning("INFO: Sharing arrays with plugins through {}.".format(self.handoff_root))
+
+        # Tasks from every stage arrive as (stage, directive) once their upstream tasks have completed
+        handlers = {"manip": self._manip, "train": self._train, "attack": self._attack, "merge": self._merge,
+                    "evaluate": self._evaluate, "search": self._search, "clean": self._plot}
+        sst.execute(self.comm, self.rank, lambda payload: handlers[payload[0]](payload[1]),
+                    slots=self.slots, stage_slots=self.stage_slots)
+
+        while self.hosts.empty() is False:
+            self.hosts.get().close()
+
+        if self.handoff_root is not None:
+            shutil.rmtree(self.handoff_root, ignore_errors=True)
+
+        self.logger.warning("INFO: Manager reported that every task has been handed out. Ending execution.")
+
+    def _load_config(self, config_file: str) -> None:
+        """
+        Internal method to read the worker and cache settings from the configuration file.
+        Stages without an entry in "stage_slots" may use every slot. When "threads_per_slot"
+        is 0, the cores available to this rank are split evenly across its slots.
+
+        ### Parameters:
+        :param config_file: System file path to the Jespipe configuration file.
+        """
+        fin = open(config_file, "rt"); config = json.loads(fin.read()); fin.close()
+        settings = config.get("workers", dict())
+        self.manip_cache = manipcache.from_config(config, self.root_path)
+
+        self.slots = max(1, int(settings.get("slots", 1)))
+        stage_slots = settings.get("stage_slots", dict())
+        self.stage_slots = {stage: min(self.slots, max(1, int(stage_slots.get(stage, self.slots))))
+                            for stage in ["manip", "train", "attack", "merge", "evaluate", "search", "clean"]}
+
+        # Cores available to this rank honour the binding set by mpirun
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+        self.use_hosts = bool(settings.get("plugin_host", True))
+        self.handoff_path = settings.get("handoff_path", "/dev/shm")
+        self.handoff_limit = int(float(settings.get("handoff_cache_gb", 2)) * 2**30)
+        self.pin_threads = self.slots > 1 or int(settings.get("threads_per_slot", 0)) > 0
+        self.threads = int(settings.get("threads_per_slot", 0))
+        if self.threads <= 0:
+            self.threads = max(1, cores // self.slots)
+
+        # Memory limit of the node split evenly across its slots; 0 means no limit
+        self.slot_rss = int(float(settings.get("rss_limit_gb", 0)) * 2**30) // self.slots
+
+    def _plugin_env(self) -> dict:
+        """
+        Internal method to build the environment plugins are launched with. Thread pools
+        of OpenMP, BLAS, and TensorFlow are pinned to the slot's share of the cores so that
+        concurrent plugins do not oversubscribe the node. Plugins can read the share from
+        the JESPIPE_SLOT_THREADS environment variable, and the resident set size they may
+        use from JESPIPE_SLOT_RSS_BYTES.
+
+        ### Returns:
+        :return: Environment variables for the plugin subprocess.
+        """
+        env = dict(os.environ)
+        env["JESPIPE_SLOT_THREADS"] = str(self.threads)
+        env["JESPIPE_SLOT_RSS_BYTES"] = str(self.slot_rss)
+        if self.pin_threads:
+            for var in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"]:
+                env[var] = str(self.threads)
+
+            # Inter-op parallelism would spawn a second pool of the same size
+            env["TF_NUM_INTEROP_THREADS"] = "1"
+
+        return env
+
+    def _hosted(self, plugin_file: str) -> bool:
+        """
+        Internal method to check if a plugin runs in a plugin host.
+
+        ### Parameters:
+        :param plugin_file: System file path to the plugin.
+
+        ### Returns:
+        :return: True if plugin hosts are enabled and the plugin did not opt out; False if otherwise.
+        """
+        if plugin_file not in self.persistent:
+            self.persistent[plugin_file] = self.use_hosts and persistent(plugin_file)
+
+        return self.persistent[plugin_file]
+
+    def _launch(self, steps: List[Tuple[str, str, str, Union[str, None], Union[str, None]]], fout: TextIO) -> int:
+        """
+        Internal method to run a chain of plugin calls and block until it has completed.
+        Chains run in an idle plugin host. A single call to a plugin that cannot run in a
+        plugin host gets a fresh interpreter instead, and its result is still moved to
+        the keep path of the call if one is set. Results without a keep path are removed.
+
+        ### Parameters:
+        :param steps: List of (plugin_file, stage, parameters, inject, keep) tuples. See jespipe.plugin.host.call.
+        :param fout: Open logfile for the plugins' stdout and stderr.
+
+        ### Returns:
+        :return: Exit status of the chain.
+        """
+        if all([self._hosted(step[0]) for step in steps]) is False:
+            if len(steps) > 1:
+                raise ValueError("Only plugin hosts can chain plugin calls. Received {} calls.".format(len(steps)))
+
+            # Plugins hand their result back by printing the path to a pickle
+            output = tempfile.TemporaryFile(mode="w+t")
+            status = subprocess.run([self.python_path, steps[0][0], steps[0][1], steps[0][2]], stdout=output, stderr=fout,
+                                    env=self._plugin_env()).returncode
+            output.seek(0)
+            lines = output.read()
+            output.close()
+            fout.write(lines)
+            fout.flush()
+            pickle_path = result_pickle(lines)
+            if pickle_path is not None:
+                if status == 0 and steps[0][4] is not None:
+                    shutil.move(pickle_path, steps[0][4])
+
+                elif scratch(pickle_path, steps[0][2]):
+                    os.remove(pickle_path)
+
+            return status
+
+        # At most one host per slot is ever created since every slot runs one chain at a time
+        try:
+            host = self.hosts.get_nowait()
+
+        except queue.Empty:
+            self.host_count += 1
+            host = PluginHost(self.python_path, self._plugin_env(),
+                              "{}/{}-host-{}.log".format(self.log_dir, self.time, self.host_count))
+
+        try:
+            return host.run(steps, fout)
+
+        finally:
+            self.hosts.put(host)
+
+    def _shared(self, pickle_path: str) -> object:
+        """
+        Internal method to load a pickled array once and share it with every plugin on this node.
+        Every change budget of an attack reuses the same test features, so they are only read
+        from the shared filesystem once per worker instead of once per task. Every call must be
+        matched by a call to _release once the task is done with the array.
+
+        ### Parameters:
+        :param pickle_path: System file path to the pickled array.
+
+        ### Returns:
+        :return: Descriptor of the shared array, or the array itself if sharing is disabled or the array cannot be shared.
+        """
+        if self.handoff_root is None:
+            return joblib.load(pickle_path)
+
+        key = (pickle_path, os.path.getmtime(pickle_path))
+        with self.handoff_lock:
+            if key not in self.handoff_cache:
+                shared = handoff.share(joblib.load(pickle_path), self.handoff_root + "/cache")
+
+                # Objects that cannot be shared are passed by pickle and not cached
+                if handoff.is_descriptor(shared) is False:
+                    return shared
+
+                self.handoff_cache[key] = {"shared": shared, "users": 0, "bytes": handoff.nbytes(shared)}
+
+            # Entries are kept in least recently used order
+            self.handoff_cache.move_to_end(key)
+            self.handoff_cache[key]["users"] += 1
+            return self.handoff_cache[key]["shared"]
+
+    def _release(self, shared: object) -> None:
+        """
+        Internal method to hand back an array shared by _shared once a task is done with it.
+        Arrays no task is using stay cached until the cache holds more than "handoff_cache_gb"
+        of the "workers" block of the configuration file; the least recently used ones are removed first.
+
+        ### Parameters:
+        :param shared: Descriptor or array returned by _shared.
+        """
+        if self.handoff_root is None:
+            return
+
+        with self.handoff_lock:
+            for entry in self.handoff_cache.values():
+                if entry["shared"] is shared:
+                    entry["users"] -= 1
+                    break
+
+            total = sum([entry["bytes"] for entry in self.handoff_cache.values()])
+            for key in list(self.handoff_cache.keys()):
+                if total <= self.handoff_limit:
+                    break
+
+                entry = self.handoff_cache[key]
+                if entry["users"] > 0:
+                    continue
+
+                handoff.remove(entry["shared"])
+                total -= entry["bytes"]
+                del self.handoff_cache[key]
+
+    def _model_path(self, task: tuple) -> Union[str, None]:
+        """
+        Internal method to resolve the system file path of the model targeted by an attack directive.
+        Models trained in the same run are only known by their model root path until training completes.
+
+        ### Parameters:
+        :param task: Attack directive generated by scattershot.generate_attack.
+
+        ### Returns:
+        :return: System file path to the model, or None if the model was not found.
+        """
+        if task[7] is not None:
+            return task[7]
+
+        model_list = gp.getmodels(task[9], format=".h5")
+        if model_list == []:
+            self.logger.warning("ERROR: No trained model found in {}. Please review the training logfiles for error diagnostics.".format(task[9]))
+            return None
+
+        return model_list[0]
+
+    def _train(self, task: tuple) -> bool:
+        """
+        Internal method to manipulate a dataset and train a model on it. The manipulation
+        is skipped when its result is already in the manipulation cache.
+
+        ### Parameters:
+        :param task: Training directive generated by scattershot.generate_train with the cache key
+        of its manipulation appended, or None if it has no manipulation.
+
+        ### Returns:
+        :return: True if the model was trained; False if otherwise.
+        """
+        self.logger.warning("INFO: Beginning training of model {} using directive list {}.".format(task[2], task))
+
+        # Check if task[6], task[7], task[8], or task[9] is None
+        # If so, skip execution and tell user they need to mention something.
+        if task[6] is None or task[7] is None or task[8] is None or task[9] is None:
+            self.logger.warning("ERROR: Skipping model {} because no manipulation was specified " +
+                                "Please use the tag <vanilla tag='default1' /> or something similiar " +
+                                "in your control file.")
+            return False
+
+        manip_save_path = self.root_path + "/data/" + task[0] + "/maniped_data"
+        if os.path.exists(manip_save_path) is False:
+            os.makedirs(manip_save_path, exist_ok=True)
+
+        self.logger.warning("INFO: Using {} on dataset {} with parameters {}.".format(task[6], task[0], task[9]))
+
+        # Created special directory for each individual manipulation
+        save_path = self.root_path + "/data/" + task[0] + "/models/" + task[7]
+        if os.path.exists(save_path):
+            shutil.rmtree(save_path, ignore_errors=True)
+
+        os.makedirs(save_path, exist_ok=True)
+
+        # Perform data manipulation using manipulation plugin unless the result is already cached
+        param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, self.root_path + "/data/.tmp", self.root_path)
+        dataframe = self.manip_cache.load(task[10]) if task[10] is not None else None
+        handoff_path = None; keep = None
+
+        if dataframe is not None:
+            self.logger.warning("INFO: Reusing cached result of {} on dataset {}.".format(task[6], task[0]))
+
+            # Keep the copy of the manipulated dataset the manipulation plugin would have saved
+            if os.path.isfile(manip_save_path + "/" + task[7] + ".csv") is False:
+                save.dataframe(manip_save_path, task[7], dataframe)
+
+        elif self._hosted(task[8]) and self._hosted(task[5]):
+            # Manipulated DataFrame is handed straight to the training plugin inside the plugin host
+            keep = self.root_path + "/data/.tmp/" + str(uuid.uuid4()) + ".pkl" if task[10] is not None else None
+            train_param = train_factory(task[0], task[1], task[2], None, task[4], task[9],
+                                        save_path, task[6], task[7], self.root_path)
+            steps = [(task[8], "train", param_dict, None, keep), (task[5], "train", train_param, "dataframe", None)]
+
+        else:
+            maniped_pickle = self._manipulate(task, param_dict)
+            if maniped_pickle is None:
+                os.remove(param_dict)
+                return False
+
+            dataframe = joblib.load(maniped_pickle)
+            if task[10] is not None:
+                self.manip_cache.store(task[10], maniped_pickle)
+
+            else:
+                os.remove(maniped_pickle)
+
+        if dataframe is not None:
+            # Create dictionary that will be passed to the training plugin
+            handoff_path = None if self.handoff_root is None else self.handoff_root + "/" + str(uuid.uuid4())
+            train_param = train_factory(task[0], task[1], task[2], dataframe, task[4], task[9],
+                                        save_path, task[6], task[7], self.root_path, handoff_path=handoff_path)
+            steps = [(task[5], "train", train_param, None, None)]
+
+        # Spawn plugin execution and block until the training section of the plugin has completed
+        self.logger.warning("INFO: Training model...")
+        file_output = "{}/{}-{}-{}-{}.log".format(self.log_dir, self.time, task[2], task[6], task[7])
+        self.logger.warning("INFO: Saving output of {} for model {} to logfile {}.".format(task[5], task[2], file_output))
+
+        # Open a file that the training plugin can use for stdout and stderr
+        fout = open(file_output, "wt")
+
+        try:
+            status = self._launch(steps, fout)
+
+        except subprocess.SubprocessError:
+            status = None
+
+        if status != 0:
+            self.logger.warning("ERROR: Build for model {} failed. Please review logfile {} for error diagnostics.".format(task[2], file_output))
+
+        # Close the file the plugin is using to log stdout and stderr
+        fout.close()
+
+        if handoff_path is not None:
+            shutil.rmtree(handoff_path, ignore_errors=True)
+
+        if keep is not None and os.path.isfile(keep):
+            self.manip_cache.store(task[10], keep)
+
+        # Parameter pickles of the training plugin can hold the whole manipulated dataset
+        for pickle_path in [param_dict, train_param]:
+            if os.path.isfile(pickle_path):
+                os.remove(pickle_path)
+
+        return status == 0
+
+    def _manip(self, task: tuple) -> bool:
+        """
+        Internal method to manipulate a dataset once for every model trained on the manipulation.
+        The result is stored in the manipulation cache for the training directives to pick up.
+
+        ### Parameters:
+        :param task: Training directive generated by scattershot.generate_train with the cache key appended.
+
+        ### Returns:
+        :return: True if the manipulated dataset is in the manipulation cache; False if otherwise.
+        """
+        if self.manip_cache.has(task[10]):
+            return True
+
+        self.logger.warning("INFO: Using {} on dataset {} with parameters {} for every model trained on it.".format(task[6], task[0], task[9]))
+        manip_save_path = self.root_path + "/data/" + task[0] + "/maniped_data"
+        os.makedirs(manip_save_path, exist_ok=True)
+
+        param_dict = manip_factory(task[1], task[7], task[9], manip_save_path, self.root_path + "/data/.tmp", self.root_path)
+        maniped_pickle = self._manipulate(task, param_dict)
+        os.remove(param_dict)
+        if maniped_pickle is None:
+            return False
+
+        self.manip_cache.store(task[10], maniped_pickle)
+        return True
+
+    def _manipulate(self, task: tuple, param_dict: str) -> Union[str, None]:
+        """
+        Internal method to run a manipulation plugin on its own.
+
+        ### Parameters:
+        :param task: Training directive generated by scattershot.generate_train.
+        :param param_dict: System file path to the pickled parameter dictionary for the manipulation plugin.
+
+        ### Returns:
+        :return: System file path to the pickled manipulated dataset, or None if the manipulation failed.
+        """
+        # The manipulated dataset returned by the plugin is kept as a pickle
+        maniped_pickle = self.root_path + "/data/.tmp/" + str(uuid.uuid4()) + ".pkl"
+        file_output = "{}/{}-manip-{}-{}-{}.log".format(self.log_dir, self.time, task[0], task[6], str(uuid.uuid4())[:8])
+        fout = open(file_output, "wt")
+        try:
+            status = self._launch([(task[8], "train", param_dict, None, maniped_pickle)], fout)
+
+        except subprocess.SubprocessError:
+            status = None
+
+        fout.close()
+
+        if status != 0 or os.path.isfile(maniped_pickle) is False:
+            self.logger.warning("ERROR: Manipulation {} of dataset {} failed. Please review logfile {} for error diagnostics.".format(task[6], task[0], file_output))
+            return None
+
+        return maniped_pickle
+
+    def _attack(self, task: tuple) -> bool:
+        """
+        Internal method to generate adversarial examples for a trained model at every change
+        budget of an attack. Plugins that accept every budget at once load the model and
+        compute the benign predictions a single time; other plugins are called once per budget.
+
+        ### Parameters:
+        :param task: Adversarial example generation directive expanded from scattershot.generate_attack. Shards of
+        an attack carry (shard_index, shard_count) at index 10 and save their adversarial examples under
+        adver_examples/.shards/shard_index until the merge task of the attack concatenates them.
+
+        ### Returns:
+        :return: True if the adversarial examples were generated for every budget; False if otherwise.
+        """
+        model_path = self._model_path(task)
+        if model_path is None:
+            return False
+
+        self.logger.warning("INFO: Beginning adversarial attack on model {} with attack {}".format(model_path, task[2]))
+
+        # Get model name
+        model_name = model_path.split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
+
+        # Get change values
+        changes = task[6]["changes"]
+        shard = task[10] if len(task) > 10 else None
+
+        self.logger.warning("INFO: Generating adversial examples with minimum change set to {}.".format(changes))
+
+        # Open file that the attack plugin can use as a log file
+        file_output = "{}/{}-attack-{}-{}-{}-{}-{}.log".format(self.log_dir, self.time, task[2], task[3], model_name, changes[0], changes[-1])
+        if shard is not None:
+            file_output = file_output[:-len(".log")] + "-shard-{}.log".format(shard[0])
+            self.logger.warning("INFO: Attacking shard {} of {} of the test features.".format(shard[0] + 1, shard[1]))
+
+        self.logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
+        fout = open(file_output, "wt")
+
+        attack_params = {key: value for key, value in task[6].items() if key != "changes"}
+        save_root = self.root_path + "/data/" + task[0] + "/adver_examples"
+        if shard is not None:
+            attack_params["shard"] = list(shard); save_root += "/.shards/{}".format(shard[0])
+
+        test_features = self._shared(gp.gettestfeat(task[9], feature_file="test_features.pkl"))
+        try:
+            status = self._generate_adver(task, model_path, attack_params, changes, test_features, fout, save_root=save_root)
+
+        finally:
+            self._release(test_features)
+
+        if status != 0:
+            self.logger.warning("ERROR: Attack on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
+
+        # Close the attack plugin log file
+        fout.close()
+
+        return status == 0
+
+    def _merge(self, task: tuple) -> bool:
+        """
+        Internal method to merge the adversarial examples generated by the shards of an attack
+        into one adversarial example per change budget, exactly as an attack without shards saves them.
+
+        ### Parameters:
+        :param task: Adversarial example generation directive expanded from scattershot.generate_attack
+        with the number of shards at index 10.
+
+        ### Returns:
+        :return: True if the adversarial examples of every budget were merged; False if otherwise.
+        """
+        shard_root = self.root_path + "/data/" + task[0] + "/adver_examples/.shards"
+        save_path = self.root_path + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8]
+        shard_paths = ["{}/{}/{}/{}".format(shard_root, i, task[3], task[8]) for i in range(task[10])]
+
+        self.logger.warning("INFO: Merging {} shards of attack {} on model {}.".format(task[10], task[3], task[8]))
+        try:
+            for change in task[6]["changes"]:
+                parts = [joblib.load(shard_path + "/{}.pkl".format(change)) for shard_path in shard_paths]
+                save.adver_example(save_path, change, np.concatenate(parts))
+
+        except (OSError, ValueError) as e:
+            self.logger.warning("ERROR: Failed to merge the shards of attack {} on model {}. Received error {}.".format(task[3], task[8], e))
+            return False
+
+        for shard_path in shard_paths:
+            shutil.rmtree(shard_path, ignore_errors=True)
+
+        return True
+
+    def _evaluate(self, task: tuple) -> bool:
+        """
+        Internal method to evaluate a trained model on its adversarial examples.
+
+        ### Parameters:
+        :param task: Attack directive generated by scattershot.generate_attack.
+
+        ### Returns:
+        :return: True if the model was evaluated; False if otherwise.
+        """
+        model_path = self._model_path(task)
+        if model_path is None:
+            return False
+
+        self.logger.warning("INFO: Beginning evaluation of model {} using adversarial examples.".format(model_path))
+
+        # Get model name
+        model_name = model_path.split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
+
+        # Open file that the training plugin can use as a log file during evaluation
+        file_output = "{}/{}-eval-{}-{}-{}.log".format(self.log_dir, self.time, task[2], task[3], model_name)
+        self.logger.warning("INFO: Saving output of {} evaluation logfile {}.".format(model_path, file_output))
+        fout = open(file_output, "wt")
+
+        adver_examples = gp.getfiles(self.root_path + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8])
+        status = self._evaluate_adver(task, model_path, adver_examples, fout)
+        if status != 0:
+            self.logger.warning("ERROR: Evaluation for model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
+
+        # Close the training plugin log file
+        fout.close()
+
+        return status == 0
+
+    def _search(self, task: tuple) -> bool:
+        """
+        Internal method to search the change budgets at which a trained model breaks instead of
+        sweeping every budget of the grid. The search starts from the smallest, middle, and largest
+        budgets and keeps bisecting the intervals of the grid whose metric jumps by more than the
+        tolerance until every jump is resolved or no budget is left between its ends. Every round
+        only evaluates its new budgets, so the model plugin's evaluation must return a dictionary
+        mapping each of them to its metrics and add them to the earlier rounds' statistics when
+        "merge_log" is set.
+
+        ### Parameters:
+        :param task: Attack directive generated by scattershot.generate_attack with the budget grid
+        stored under "changes" and the tolerance under "adaptive_tolerance".
+
+        ### Returns:
+        :return: True if the search completed; False if otherwise.
+        """
+        model_path = self._model_path(task)
+        if model_path is None:
+            return False
+
+        # Get model name
+        model_name = model_path.split("/"); model_name = model_name[-1].split("."); model_name = model_name[0]
+
+        grid = task[6]["changes"]; tolerance = task[6]["adaptive_tolerance"]; metric = task[6].get("adaptive_metric", "rmse")
+        attack_params = {key: value for key, value in task[6].items() if key not in ["changes", "adaptive_tolerance", "adaptive_metric"]}
+        adver_path = self.root_path + "/data/" + task[0] + "/adver_examples/" + task[3] + "/" + task[8]
+
+        self.logger.warning("INFO: Searching {} change budgets between {} and {} for attack {} on model {} with {} tolerance {}.".format(
+            len(grid), grid[0], grid[-1], task[2], model_path, metric, tolerance))
+
+        # Open file that the attack and model plugins can use as a log file
+        file_output = "{}/{}-search-{}-{}-{}.log".format(self.log_dir, self.time, task[2], task[3], model_name)
+        self.logger.warning("INFO: Saving output of {} for attack {} to logfile {}.".format(task[3], task[2], file_output))
+        fout = open(file_output, "wt")
+
+        test_features = self._shared(gp.gettestfeat(task[9], feature_file="test_features.pkl"))
+        metrics_file = self.root_path + "/data/.tmp/" + str(uuid.uuid4()) + ".pkl"
+        values = dict()
+        pending = sorted(set([0, (len(grid) - 1) // 2, len(grid) - 1]))
+        status = 0
+        try:
+            while pending != []:
+                status = self._generate_adver(task, model_path, attack_params, [grid[i] for i in pending], test_features, fout)
+                if status != 0:
+                    break
+
+                # Only the new budgets are evaluated; the model plugin adds them to the statistics of the earlier rounds
+                status = self._evaluate_adver(task, model_path, [adver_path + "/{}.pkl".format(grid[i]) for i in pending], fout,
+                                              keep=metrics_file, merge_log=values != dict())
+                if status != 0:
+                    break
+
+                try:
+                    results = joblib.load(metrics_file); os.remove(metrics_file)
+                    values.update({i: results[str(grid[i])][metric] for i in pending})
+
+                except (OSError, KeyError, TypeError) as e:
+                    self.logger.warning("ERROR: Model plugin {} did not return the {} of every change budget. Received error {}.".format(task[5], metric, e))
+                    status = None
+                    break
+
+                # Bisect the intervals whose metric still jumps by more than the tolerance
+                searched = sorted(values.keys())
+                pending = [(low + high) // 2 for low, high in zip(searched[:-1], searched[1:])
+                           if high - low > 1 and abs(values[high] - values[low]) > tolerance]
+
+                self.logger.warning("INFO: Searched {} of {} change budgets. Refining {} intervals.".format(len(searched), len(grid), len(pending)))
+
+        finally:
+            self._release(test_features)
+
+            # Close the plugin log file
+            fout.close()
+
+        if status != 0:
+            self.logger.warning("ERROR: Search on model {} failed. Please review logfile {} for error diagnostics.".format(model_name, file_output))
+
+        return status == 0
+
+    def _generate_adver(self, task: tuple, model_path: str, attack_params: dict, changes: List[float], test_features: object, fout: TextIO,
+                        save_root: str = None) -> int:
+        """
+        Internal method to run an attack plugin on a trained model for a list of change budgets.
+
+        ### Parameters:
+        :param task: Attack directive generated by scattershot.generate_attack.
+        :param model_path: System file path to the model being attacked.
+        :param attack_params: Parameters of the attack without the change budgets.
+        :param changes: Change budgets to generate adversarial examples for.
+        :param test_features: Test features of the model, or their shared descriptor.
+        :param fout: Open logfile for the plugin's stdout and stderr.
+        :param save_root: System file path to save the adversarial examples under (default: adver_examples of the dataset).
+
+        ### Returns:
+        :return: Exit status of the attack plugin, or None if it could not be launched.
+        """
+        if save_root is None:
+            save_root = self.root_path + "/data/" + task[0] + "/adver_examples"
+
+        # Split the budgets into one call per budget for plugins that only take a single budget
+        if multi_budget(task[4]):
+            calls = [dict(attack_params, changes=changes)]
+
+        else:
+            calls = [dict(attack_params, change=change) for change in changes]
+
+        status = 0
+        for params in calls:
+            attack_param = attack_factory(task[3], model_path, task[8], test_features, params, save_root, self.root_path)
+            try:
+                status = self._launch([(task[4], "attack", attack_param, None, None)], fout)
+
+            except subprocess.SubprocessError:
+                status = None
+
+            if status != 0:
+                break
+
+        return status
+
+    def _evaluate_adver(self, task: tuple, model_path: str, adver_examples: List[str], fout: TextIO, keep: str = None,
+                        merge_log: bool = False) -> int:
+        """
+        Internal method to run the evaluation of a model plugin on a list of adversarial examples.
+
+        ### Parameters:
+        :param task: Attack directive generated by scattershot.generate_attack.
+        :param model_path: System file path to the model being evaluated.
+        :param adver_examples: System file paths to the pickled adversarial examples.
+        :param fout: Open logfile for the plugin's stdout and stderr.
+        :param keep: System file path to pickle the result of the evaluation to (default: None).
+        :param merge_log: Add the statistics to those saved for the attack by an earlier evaluation (default: False).
+
+        ### Returns:
+        :return: Exit status of the model plugin, or None if it could not be launched.
+        """
+        test_labels = self._shared(gp.gettestlabel(task[9], label_file="test_labels.pkl"))
+        train_attack_param = attack_train_factory(adver_examples, task[3], test_labels,
+                                                    task[9] + "/stat", model_path, self.root_path, merge_log=merge_log)
+        try:
+            return self._launch([(task[5], "attack", train_attack_param, None, keep)], fout)
+
+        except subprocess.SubprocessError:
+            return None
+
+        finally:
+            self._release(test_labels)
+
+    def _plot(self, task: tuple) -> bool:
+        """
+        Internal method to generate a plot with a plotting plugin.
+
+        ### Parameters:
+        :param task: Plotting directive generated by scattershot.generate_clean.
+
+        ### Returns:
+        :return: True if the plot was generated; False if otherwise.
+        """
+        self.logger.warning("INFO: Generating plot {}.".format(task[2]))
+        file_output = "{}/{}-plot-{}.log".format(self.log_dir, self.time, task[2])
+        self.logger.warning("INFO: Saving output of plotting plugin to logfile {}.".format(file_output))
+        fout = open(file_output, "wt")
+
+        clean_param = clean_factory(task[1], task[2], task[3], self.root_path)
+
+        try:
+            status = self._launch([(task[0], "clean", clean_param, None, None)], fout)
+
+        except subprocess.SubprocessError:
+            status = None
+
+        if status != 0:
+            self.logger.warning("ERROR: Plotting failed. Please review logfile {} for error diagnostics.".format(file_output))
+
+        fout.close()
+
+        return status == 0